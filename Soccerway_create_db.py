@@ -4,31 +4,211 @@ import pandas as pd
 import datetime
 import click
 import logging
+import logging.handlers
+import queue
+import atexit
 import sys
+import os
+import csv
+import time
+import tempfile
 import config
+import metrics
+import profiling
+from db_functions import pooled_connection, insert_statement, get_indexes, has_fulltext
+from dataset_functions import read_dataset, NUMBER_COLUMNS
 
 DB_NAME = config.DB_NAME
 LOGGER = config.LOGGER
 LOGGER_FILE = config.LOG_FILE
 
+# Inserted columns of the tables, in the order of the adjusted data frames' columns
+PLAYERS_COLUMNS = ["first_name", "last_name", "nationality", "birthdate", "birthplace",
+                   "position", "height", "weight", "foot_right", "url"]
+INJURIES_COLUMNS = ["player_id", "description", "start_date", "end_date"]
+PLAYER_TEAM_COLUMNS = ["player_id", "team_id", "start_date", "end_date"]
+PLAYER_SEASON_COLUMNS = ["player_id", "team_id", "season", "Minutes_played", "Appearances", "Lineups",
+                         "Substitute_in", "Substitute_out", "on_bench", "Goal", "Yellow_card", "Yellow_2nd",
+                         "Red_card"]
+
+# Indexes of the columns looked up by the find_* and refresh functions: table, index name, columns and kind
+INDEXES = [("leagues", "leagues_url", ["url"], "INDEX"),
+           ("leagues", "leagues_country", ["country"], "INDEX"),
+           ("teams", "teams_url", ["url"], "INDEX"),
+           ("teams", "teams_name", ["name"], "INDEX"),
+           ("players", "players_url", ["url"], "INDEX"),
+           ("players", "players_last_first_name", ["last_name", "first_name"], "INDEX"),
+           ("players", "players_name", ["first_name", "last_name"], "FULLTEXT INDEX"),
+           ("injuries", "injuries_player_start", ["player_id", "start_date"], "INDEX")]
+
+
+_log_listeners = {}
+
 
 def define_logger(logger_name, log_file):
     """defining logging parameters
+    Records are only put on a queue by the logging thread, and written to the log file and stdout
+    by a background listener thread, so logging doesn't wait for disk or terminal I/O.
+    The logger is set up once per name and file, and shared by all modules which define it.
+    The level is config.LOG_LEVEL (DEBUG also logs every team and player scraped).
     """
-    logging.getLogger(logger_name).handlers.clear()
     logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.INFO)
+    if _log_listeners.get(logger_name, (None,))[0] == log_file:
+        return logger
+
+    stop_log_listener(logger_name)
+    logger.handlers.clear()
+    logger.setLevel(config.LOG_LEVEL)
     ##
     file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.INFO)
     formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     file_handler.setFormatter(formatter)
     ##
-    logger.addHandler(file_handler)
-    logger.addHandler(logging.StreamHandler(sys.stdout))
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, logging.StreamHandler(sys.stdout))
+    listener.start()
+    _log_listeners[logger_name] = (log_file, listener)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     return logger
 
 
+def stop_log_listener(logger_name):
+    """
+    Write all queued records of a logger, and stop its listener thread.
+    :param logger_name: Logger's name
+    :return:
+    """
+    log_file, listener = _log_listeners.pop(logger_name, (None, None))
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def stop_log_listeners():
+    """
+    Write all queued records of all loggers (at exit), and stop their listener threads.
+    :return:
+    """
+    for logger_name in list(_log_listeners):
+        stop_log_listener(logger_name)
+
+
+atexit.register(stop_log_listeners)
+
+
+def start_progress(logger, name, total=None):
+    """
+    Start counting the items of a long loop (e.g. players), which are logged in periodic progress
+    lines instead of a line per item (see update_progress).
+    :param logger: Logger of the progress lines
+    :param name: Name of the counted items
+    :param total: Number of items expected (None if unknown)
+    :return: Dictionary of the progress' state
+    """
+    now = time.time()
+    return {"logger": logger, "name": name, "total": total, "done": 0,
+            "start": now, "logged_at": now, "logged_done": 0}
+
+
+def update_progress(progress, count=1):
+    """
+    Count finished items, and log a progress line every config.LOG_PROGRESS_EVERY items
+    or config.LOG_PROGRESS_SECONDS seconds.
+    :param progress: Progress' state (see start_progress)
+    :param count: Number of items finished
+    :return:
+    """
+    progress["done"] += count
+    now = time.time()
+    if progress["done"] - progress["logged_done"] >= config.LOG_PROGRESS_EVERY or \
+            now - progress["logged_at"] >= config.LOG_PROGRESS_SECONDS:
+        log_progress(progress, now)
+
+
+def log_progress(progress, now=None):
+    """
+    Log a progress line: items done (out of the total, if known) and their rate.
+    :param progress: Progress' state (see start_progress)
+    :param now: Current time (time.time())
+    :return:
+    """
+    now = time.time() if now is None else now
+    elapsed = max(now - progress["start"], 1e-6)
+    if progress["total"]:
+        progress["logger"].info("Scraped %d/%d %s (%.1f %s/s).", progress["done"], progress["total"],
+                                progress["name"], progress["done"] / elapsed, progress["name"])
+    else:
+        progress["logger"].info("Scraped %d %s (%.1f %s/s).", progress["done"], progress["name"],
+                                progress["done"] / elapsed, progress["name"])
+    progress["logged_at"], progress["logged_done"] = now, progress["done"]
+
+
+def insert_rows(con, table, columns, df):
+    """
+    Insert all rows of a data frame into a table in bulk, and log the loading rate
+    (also recorded in the db_insert_seconds and db_rows metrics).
+    Rows are inserted by batched multi-row INSERTs (executemany), or loaded from a
+    temporary CSV file by LOAD DATA LOCAL INFILE, according to config.DB_LOAD_METHOD.
+    :param con: DB connection
+    :param table: Name of the table to insert into
+    :param columns: Table's columns, in the order of the data frame's columns
+    :param df: Data frame of the rows to insert
+    :return:
+    """
+    start = time.time()
+
+    if config.DB_LOAD_METHOD == "load_data" and config.DB_BACKEND == "mysql":
+        load_data_infile(con, table, columns, df)
+    else:
+        query = insert_statement(table, tuple(columns))
+        # Typed columns (e.g. read from Parquet) are inserted as Python values, and their missing values as NULL
+        rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+        uncommitted = 0
+        with con.cursor() as cur:
+            for batch_start in range(0, len(rows), config.DB_INSERT_BATCH_SIZE):
+                batch = rows[batch_start:batch_start + config.DB_INSERT_BATCH_SIZE]
+                cur.executemany(query, batch)
+                uncommitted += len(batch)
+                if uncommitted >= config.DB_COMMIT_SIZE:
+                    con.commit()
+                    uncommitted = 0
+    con.commit()
+
+    elapsed = time.time() - start
+    metrics.observe("db_insert_seconds", elapsed, table=table)
+    metrics.increment("db_rows", df.shape[0], table=table)
+    logger.info("Inserted %d rows into %s table in %.2f seconds (%.0f rows/s).",
+                df.shape[0], table, elapsed, df.shape[0] / max(elapsed, 1e-6))
+
+
+def load_data_infile(con, table, columns, df):
+    """
+    Load a data frame into a table through a temporary CSV file and LOAD DATA LOCAL INFILE.
+    The connection must allow it (local_infile=True, and local_infile enabled on the server).
+    :param con: DB connection
+    :param table: Name of the table to load into
+    :param columns: Table's columns, in the order of the data frame's columns
+    :param df: Data frame of the rows to load
+    :return:
+    """
+    df = df.applymap(lambda value: int(value) if isinstance(value, bool) else value)
+
+    csv_file = tempfile.NamedTemporaryFile('w', suffix=".csv", delete=False, encoding='utf-8', newline='')
+    try:
+        df.to_csv(csv_file, header=False, index=False, na_rep="NULL", quoting=csv.QUOTE_MINIMAL,
+                  date_format="%Y-%m-%d")
+        csv_file.close()
+        with con.cursor() as cur:
+            cur.execute(f"""LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+                            CHARACTER SET utf8mb4
+                            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                            LINES TERMINATED BY '\\n'
+                            ({', '.join(columns)})""", (csv_file.name,))
+    finally:
+        os.remove(csv_file.name)
+
+
 def create_db(host, root, password):
     """
     connect to mysql and create a new schema.
@@ -37,14 +217,13 @@ def create_db(host, root, password):
     :param password: MySQL password
     :return: 
     """
-    con = pymysql.connect(host, root, password)
-    with con.cursor() as cur:
-        cur.execute(f"""CREATE DATABASE IF NOT EXISTS {DB_NAME};""")
-        cur.execute(f"""USE {DB_NAME};""")
-    con.commit()
-    con.close()
-    logger.warning(f"Database {DB_NAME} already exists.")
-    logger.info(f"The database {DB_NAME} exists.")
+    with pooled_connection(host, root, password, db=None) as con:
+        with con.cursor() as cur:
+            cur.execute(f"""CREATE DATABASE IF NOT EXISTS {DB_NAME};""")
+            cur.execute(f"""USE {DB_NAME};""")
+        con.commit()
+        logger.warning(f"Database {DB_NAME} already exists.")
+        logger.info(f"The database {DB_NAME} exists.")
 
 
 def create_leagues(host, root, password, dict_to_read=None):
@@ -53,29 +232,23 @@ def create_leagues(host, root, password, dict_to_read=None):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
-    :param dict_to_read: Dictionary to read instead of a json file, if it is not the initial creation of DB
+    :param dict_to_read: Dictionary to read instead of the dataset files, if it is not the initial creation of DB
     :return:
     """
-    con = pymysql.connect(host, root, password, db=DB_NAME)
-    with con.cursor() as cur:
-        cur.execute('''CREATE TABLE IF NOT EXISTS leagues (
-                    id INT PRIMARY KEY AUTO_INCREMENT,
-                    name VARCHAR(50) CHARACTER SET utf8mb4,
-                    country VARCHAR(25) CHARACTER SET utf8mb4,
-                    url VARCHAR(255))''')
-
-        # Reading the default json file if no other dictionary was sent as an argument
-        if dict_to_read:
-            dict_df = pd.DataFrame(dict_to_read).T
-        else:
-            dict_df = pd.read_json("league.json").T
-
-        for ROW in dict_df.index:
-            cur.execute("""INSERT INTO leagues (name, country, url) VALUES (%s, %s, %s)""",
-                        list(dict_df.loc[ROW, :]))
-    con.commit()
-    logger.warning(f"leagues table already exists.")
-    logger.info("leagues table exists.")
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            cur.execute('''CREATE TABLE IF NOT EXISTS leagues (
+                        id INT PRIMARY KEY AUTO_INCREMENT,
+                        name VARCHAR(50) CHARACTER SET utf8mb4,
+                        country VARCHAR(25) CHARACTER SET utf8mb4,
+                        url VARCHAR(255))''')
+
+            # Reading the default dataset files if no other dictionary was sent as an argument
+            for dict_df in read_dataset("league", dict_to_read):
+                insert_rows(con, "leagues", ["name", "country", "url"], dict_df)
+        con.commit()
+        logger.warning(f"leagues table already exists.")
+        logger.info("leagues table exists.")
 
 
 def create_teams(host, root, password, dict_to_read=None):
@@ -84,37 +257,31 @@ def create_teams(host, root, password, dict_to_read=None):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
-    :param dict_to_read: Dictionary to read instead of a json file, if it is not the initial creation of DB
+    :param dict_to_read: Dictionary to read instead of the dataset files, if it is not the initial creation of DB
     :return:
     """
-    con = pymysql.connect(host, root, password, db=DB_NAME)
-    with con.cursor() as cur:
-        cur.execute(f"""USE {DB_NAME};""")
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            cur.execute(f"""USE {DB_NAME};""")
 
-        cur.execute('''CREATE TABLE IF NOT EXISTS teams (
-                            id INT PRIMARY KEY AUTO_INCREMENT,
-                            league_id INT,
-                            name VARCHAR(50) CHARACTER SET utf8mb4,
-                            url VARCHAR(255),
-                            FOREIGN KEY (league_id) 
-                            REFERENCES leagues(id))''')
+            cur.execute('''CREATE TABLE IF NOT EXISTS teams (
+                                id INT PRIMARY KEY AUTO_INCREMENT,
+                                league_id INT,
+                                name VARCHAR(50) CHARACTER SET utf8mb4,
+                                url VARCHAR(255),
+                                FOREIGN KEY (league_id) 
+                                REFERENCES leagues(id))''')
 
-        # Reading the default json file if no other dictionary was sent as an argument
-        if dict_to_read:
-            dict_df = pd.DataFrame(dict_to_read).T
-        else:
-            dict_df = pd.read_json("team.json").T
+            # Reading the default dataset files if no other dictionary was sent as an argument
+            for dict_df in read_dataset("team", dict_to_read):
+                dict_df["league_id"] += 1
 
-        dict_df["league_id"] += 1
+                logger.info(f"Starts updating teams table.")
+                insert_rows(con, "teams", ["league_id", "name", "url"], dict_df)
 
-        logger.info(f"Starts updating teams table.")
-        for ROW in dict_df.index:
-            cur.execute("""INSERT INTO teams (league_id, name, url) VALUES (%s, %s, %s)""",
-                        list(dict_df.loc[ROW, :]))
-
-    con.commit()
-    logger.warning(f"teams table already exists.")
-    logger.info("teams table exists.")
+        con.commit()
+        logger.warning(f"teams table already exists.")
+        logger.info("teams table exists.")
 
 
 def create_players(host, root, password, dict_to_read=None):
@@ -125,54 +292,35 @@ def create_players(host, root, password, dict_to_read=None):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
-    :param dict_to_read: Dictionary to read instead of a json file, if it is not the initial creation of DB
+    :param dict_to_read: Dictionary to read instead of the dataset files, if it is not the initial creation of DB
     :return:
     """
-    con = pymysql.connect(host, root, password, db=DB_NAME)
-    with con.cursor() as cur:
-        cur.execute(f"""USE {DB_NAME};""")
-
-        cur.execute('''CREATE TABLE IF NOT EXISTS players (
-                      id INT PRIMARY KEY AUTO_INCREMENT,
-                      first_name VARCHAR(50) CHARACTER SET utf8mb4,
-                      last_name VARCHAR(50) CHARACTER SET utf8mb4,
-                      nationality VARCHAR(50) CHARACTER SET utf8mb4,
-                      birthdate DATE,
-                      birthplace VARCHAR(50) CHARACTER SET utf8mb4,              
-                      position VARCHAR(50) CHARACTER SET utf8mb4, 
-                      height FLOAT,
-                      weight FLOAT,
-                      foot_right BOOLEAN,
-                      url VARCHAR(255))''')
-
-        # Reading the default json file if no other dictionary was sent as an argument
-        if dict_to_read:
-            dict_df = pd.DataFrame(dict_to_read).T
-        else:
-            dict_df = pd.read_json("player.json").T
-
-        dict_df = adjust_info(dict_df)
-        logger.info("Start updating players table.")
-        for ROW in dict_df.index:
-            cur.execute("""INSERT INTO players (first_name, 
-                                                last_name,
-                                                nationality,
-                                                birthdate,
-                                                birthplace,
-                                                position,
-                                                height,
-                                                weight,
-                                                foot_right,
-                                                url)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                        list(dict_df.loc[ROW, :]))
-            if (ROW % 1000) == 0:
-                con.commit()
-                logger.info(f"Updated {ROW} players in the table.")
-    con.commit()
-    logger.warning(f"players table already exists.")
-    r_num = pd.read_sql("SELECT COUNT(*) AS num FROM players;", con)
-    logger.info(f"players table is up to date. \nThere are {int(r_num.num)} \
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            cur.execute(f"""USE {DB_NAME};""")
+
+            cur.execute('''CREATE TABLE IF NOT EXISTS players (
+                          id INT PRIMARY KEY AUTO_INCREMENT,
+                          first_name VARCHAR(50) CHARACTER SET utf8mb4,
+                          last_name VARCHAR(50) CHARACTER SET utf8mb4,
+                          nationality VARCHAR(50) CHARACTER SET utf8mb4,
+                          birthdate DATE,
+                          birthplace VARCHAR(50) CHARACTER SET utf8mb4,              
+                          position VARCHAR(50) CHARACTER SET utf8mb4, 
+                          height FLOAT,
+                          weight FLOAT,
+                          foot_right BOOLEAN,
+                          url VARCHAR(255))''')
+
+            # Reading the default dataset files if no other dictionary was sent as an argument
+            for dict_df in read_dataset("player", dict_to_read):
+                dict_df = adjust_info(dict_df)
+                logger.info("Start updating players table.")
+                insert_rows(con, "players", PLAYERS_COLUMNS, dict_df)
+        con.commit()
+        logger.warning(f"players table already exists.")
+        r_num = pd.read_sql("SELECT COUNT(*) AS num FROM players;", con)
+        logger.info(f"players table is up to date. \nThere are {int(r_num.num)} \
 players in the table.")
 
 
@@ -183,29 +331,19 @@ def adjust_info(df):
     :param df: Data frame to adjust
     :return df: Adjusted data frame
     """
-    df = df.loc[:, df.columns != "Age"]
-    df = df.loc[:, df.columns != "Place of birth"]
+    df = df.loc[:, (df.columns != "Age") & (df.columns != "Place of birth")].copy()
 
-    # Convert birthday from string to date.
-    for ind, date in zip(df.index, df["Date of birth"]):
-        if str(date) == 'nan':
-            df.loc[ind, "Date of birth"] = datetime.datetime.now()
-        else:
-            df.loc[ind, "Date of birth"] = datetime.datetime.strptime(str(date), "%d %B %Y")
+    # Convert birthday from string to date (missing birthdays are the current date).
+    missing_birth = df["Date of birth"].isna() | (df["Date of birth"].astype(str) == 'nan')
+    birth_dates = pd.to_datetime(df["Date of birth"].where(~missing_birth), format="%d %B %Y")
+    df["Date of birth"] = birth_dates.where(~missing_birth, pd.Timestamp(datetime.datetime.now()))
 
     # remove height and weight extension (cm / kg)
-    df["Height"][df["Height"].notna()] = \
-        df["Height"][df["Height"].notna()].apply(lambda x: x[:-3])
-    df["Height"][df["Height"].isna()] = 0
-
-    df["Weight"][df["Weight"].notna()] = \
-        df["Weight"][df["Weight"].notna()].apply(lambda x: x[:-3])
-    df["Weight"][df["Weight"].isna()] = 0
+    for column in ["Height", "Weight"]:
+        df[column] = df[column].astype(str).str[:-3].where(df[column].notna(), 0)
 
     # convert right/left foot to boolean
-    df['Foot'][df['Foot'].notnull()] = \
-        df['Foot'][df['Foot'].notnull()] == 'Right'
-    df['Foot'][df['Foot'].isnull()] = -1
+    df['Foot'] = (df['Foot'] == 'Right').astype(object).where(df['Foot'].notnull(), -1)
 
     df = df[["First name", "Last name", "Nationality", "Date of birth",
              "Country of birth", "Position", "Height", "Weight", "Foot", "url"]]
@@ -220,40 +358,29 @@ def create_injuries(host, root, password, dict_to_read=None):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
-    :param dict_to_read: Dictionary to read instead of a json file, if it is not the initial creation of DB
+    :param dict_to_read: Dictionary to read instead of the dataset files, if it is not the initial creation of DB
     :return:
     """
-    con = pymysql.connect(host, root, password, db=DB_NAME)
-    with con.cursor() as cur:
-        cur.execute('''CREATE TABLE IF NOT EXISTS injuries (
-                      id INT PRIMARY KEY AUTO_INCREMENT,
-                      player_id INT,
-                      description VARCHAR(50) CHARACTER SET utf8mb4,
-                      start_date DATE,
-                      end_date DATE,
-                      FOREIGN KEY (player_id) 
-                        REFERENCES players(id))''')
-
-        # Reading the default json file if no other dictionary was sent as an argument
-        if dict_to_read:
-            dict_df = pd.DataFrame(dict_to_read).T
-        else:
-            dict_df = pd.read_json("injury.json").T
-
-        dict_df = adjust_injuries(dict_df)
-        logger.info("Start updating injuries table.")
-        for ROW in dict_df.index:
-            cur.execute("""INSERT INTO injuries 
-                        (player_id, description, start_date, end_date)
-                        VALUES (%s, %s, %s, %s)""", list(dict_df.loc[ROW, :]))
-
-            if (ROW % 1000) == 0:
-                con.commit()
-                logger.info(f"updated {ROW} injuries in the table.")
-    con.commit()
-    logger.warning(f"injuries table already exists.")
-    r_num = pd.read_sql("SELECT COUNT(*) AS num FROM injuries;", con)
-    logger.info(f"injuries table is up to date. \nThere are {int(r_num.num)} injuries in the table")
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            cur.execute('''CREATE TABLE IF NOT EXISTS injuries (
+                          id INT PRIMARY KEY AUTO_INCREMENT,
+                          player_id INT,
+                          description VARCHAR(50) CHARACTER SET utf8mb4,
+                          start_date DATE,
+                          end_date DATE,
+                          FOREIGN KEY (player_id) 
+                            REFERENCES players(id))''')
+
+            # Reading the default dataset files if no other dictionary was sent as an argument
+            for dict_df in read_dataset("injury", dict_to_read):
+                dict_df = adjust_injuries(dict_df)
+                logger.info("Start updating injuries table.")
+                insert_rows(con, "injuries", INJURIES_COLUMNS, dict_df)
+        con.commit()
+        logger.warning(f"injuries table already exists.")
+        r_num = pd.read_sql("SELECT COUNT(*) AS num FROM injuries;", con)
+        logger.info(f"injuries table is up to date. \nThere are {int(r_num.num)} injuries in the table")
 
 
 def adjust_injuries(df):
@@ -262,12 +389,13 @@ def adjust_injuries(df):
     :param df: Data frame to adjust
     :return df: Adjusted data frame
     """
-    for ind, date in zip(df.index, df["start_date"]):
-        df.loc[ind, "start_date"] = datetime.datetime.strptime(date, "%d/%m/%y")
-        if df.loc[ind, "end_date"] is None:
-            df.loc[ind, "end_date"] = datetime.datetime.strptime("01/01/1111", "%d/%m/%Y")
-        else:
-            df.loc[ind, "end_date"] = datetime.datetime.strptime(df.loc[ind, "end_date"], "%d/%m/%y")
+    df = df.copy()
+    df["start_date"] = pd.to_datetime(df["start_date"], format="%d/%m/%y")
+
+    # Missing end dates are 01/01/1111, which is out of pandas' dates range - so kept as datetime objects
+    end_dates = pd.to_datetime(df["end_date"], format="%d/%m/%y")
+    df["end_date"] = pd.Series(end_dates.dt.to_pydatetime(), index=df.index, dtype=object).where(
+        end_dates.notna(), datetime.datetime(1111, 1, 1))
     df["player_id"] += 1
 
     df = df[["player_id", "description", "start_date", "end_date"]]
@@ -282,44 +410,31 @@ def create_players_by_team(host, root, password, dict_to_read=None):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
-    :param dict_to_read: Dictionary to read instead of a json file, if it is not the initial creation of DB
+    :param dict_to_read: Dictionary to read instead of the dataset files, if it is not the initial creation of DB
     :return:
     """
-    con = pymysql.connect(host, root, password, db=DB_NAME)
-    with con.cursor() as cur:
-        cur.execute('''CREATE TABLE IF NOT EXISTS player_team (
-                      id INT PRIMARY KEY AUTO_INCREMENT,
-                      player_id INT,
-                      team_id INT,
-                      start_date DATE,
-                      end_date DATE,
-                        FOREIGN KEY (player_id) 
-                        REFERENCES players(id),
-                        FOREIGN KEY (team_id) 
-                        REFERENCES teams(id))''')
-
-        # Reading the default json file if no other dictionary was sent as an argument
-        if dict_to_read:
-            dict_df = pd.DataFrame(dict_to_read).T
-        else:
-            dict_df = pd.read_json("player_team.json").T
-
-        dict_df = adjust_teams(dict_df)
-        logger.info("start updating player_team table.")
-        for ROW in dict_df.index:
-            cur.execute("""INSERT INTO player_team 
-                        (player_id,
-                         team_id,
-                         start_date,
-                         end_date)
-                         VALUES (%s, %s, %s, %s)""", list(dict_df.loc[ROW, :]))
-            if (ROW % 1000) == 0:
-                con.commit()
-                logger.info(f"updated {ROW} fields in the player_team table.")
-    con.commit()
-    logger.warning(f"player_team table already exists.")
-    r_num = pd.read_sql("SELECT COUNT(*) AS num FROM player_team;", con)
-    logger.info(f"player_team table is up to date. \nThere are {int(r_num.num)} \
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            cur.execute('''CREATE TABLE IF NOT EXISTS player_team (
+                          id INT PRIMARY KEY AUTO_INCREMENT,
+                          player_id INT,
+                          team_id INT,
+                          start_date DATE,
+                          end_date DATE,
+                            FOREIGN KEY (player_id) 
+                            REFERENCES players(id),
+                            FOREIGN KEY (team_id) 
+                            REFERENCES teams(id))''')
+
+            # Reading the default dataset files if no other dictionary was sent as an argument
+            for dict_df in read_dataset("player_team", dict_to_read):
+                dict_df = adjust_teams(dict_df)
+                logger.info("start updating player_team table.")
+                insert_rows(con, "player_team", PLAYER_TEAM_COLUMNS, dict_df)
+        con.commit()
+        logger.warning(f"player_team table already exists.")
+        r_num = pd.read_sql("SELECT COUNT(*) AS num FROM player_team;", con)
+        logger.info(f"player_team table is up to date. \nThere are {int(r_num.num)} \
 rows in the players_team table.")
 
 
@@ -330,16 +445,12 @@ def adjust_teams(df):
     :param df: Data frame to adjust
     :return df: Adjusted data frame
     """
-    df = df[["player_id", "team_id", "start", "end"]]
-    df = df[df["team_id"].notna()]
+    df = df.loc[df["team_id"].notna(), ["player_id", "team_id", "start", "end"]].copy()
 
     df["player_id"] += 1
     df["team_id"] += 1
-    df["end"].fillna("01/01/70", inplace=True)
-
-    for i in df.index:
-        df.loc[i, "start"] = datetime.datetime.strptime(df.loc[i, "start"], "%d/%m/%y")
-        df.loc[i, "end"] = datetime.datetime.strptime(df.loc[i, "end"], "%d/%m/%y")
+    df["start"] = pd.to_datetime(df["start"], format="%d/%m/%y")
+    df["end"] = pd.to_datetime(df["end"], format="%d/%m/%y").fillna(pd.Timestamp(1970, 1, 1))
 
     df.index = range(df.shape[0])
 
@@ -354,66 +465,66 @@ def create_players_by_season(host, root, password, dict_to_read=None):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
-    :param dict_to_read: Dictionary to read instead of a json file, if it is not the initial creation of DB
+    :param dict_to_read: Dictionary to read instead of the dataset files, if it is not the initial creation of DB
     :return:
     """
-    con = pymysql.connect(host, root, password, db=DB_NAME)
-    with con.cursor() as cur:
-        cur.execute('''CREATE TABLE IF NOT EXISTS player_season (
-                      id INT PRIMARY KEY AUTO_INCREMENT,
-                      player_id INT,
-                      team_id INT,
-                      season VARCHAR(9),
-                      Minutes_played INT,
-                      Appearances INT,
-                      Lineups INT,
-                      Substitute_in INT,
-                      Substitute_out INT,
-                      on_bench INT,
-                      Goal INT,
-                      Yellow_card INT,
-                      Yellow_2nd INT,
-                      Red_card INT,
-                        FOREIGN KEY (player_id) 
-                        REFERENCES players(id),
-                        FOREIGN KEY (team_id) 
-                        REFERENCES teams(id))''')
-
-        # Reading the default json file if no other dictionary was sent as an argument
-        if dict_to_read:
-            dict_df = pd.DataFrame(dict_to_read).T
-        else:
-            dict_df = pd.read_json("player_season.json").T
-
-        dict_df = adjust_seasons(dict_df)
-        logger.info("start updating player_season table.")
-        for ROW in dict_df.index:
-            cur.execute("""INSERT INTO player_season 
-                        (player_id,
-                          team_id,
-                          season,
-                          Minutes_played,
-                          Appearances,
-                          Lineups,
-                          Substitute_in,
-                          Substitute_out,
-                          on_bench,
-                          Goal,
-                          Yellow_card,
-                          Yellow_2nd,
-                          Red_card)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                        list(dict_df.loc[ROW, :]))
-            if (ROW % 1000) == 0:
-                con.commit()
-                logger.info(f"updated {ROW} fields in the player_season table.")
-    con.commit()
-    logger.warning(f"player_season table already exists.")
-    r_num = pd.read_sql("SELECT COUNT(*) AS num FROM player_season;", con)
-    logger.info(f"player_season table is up to date. \nThere are {int(r_num.num)} \
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            cur.execute('''CREATE TABLE IF NOT EXISTS player_season (
+                          id INT PRIMARY KEY AUTO_INCREMENT,
+                          player_id INT,
+                          team_id INT,
+                          season VARCHAR(9),
+                          Minutes_played INT,
+                          Appearances INT,
+                          Lineups INT,
+                          Substitute_in INT,
+                          Substitute_out INT,
+                          on_bench INT,
+                          Goal INT,
+                          Yellow_card INT,
+                          Yellow_2nd INT,
+                          Red_card INT,
+                            FOREIGN KEY (player_id) 
+                            REFERENCES players(id),
+                            FOREIGN KEY (team_id) 
+                            REFERENCES teams(id))''')
+
+            # Reading the default dataset files if no other dictionary was sent as an argument
+            for dict_df in read_dataset("player_season", dict_to_read):
+                dict_df = adjust_seasons(dict_df)
+                logger.info("start updating player_season table.")
+                insert_rows(con, "player_season", PLAYER_SEASON_COLUMNS, dict_df)
+        con.commit()
+        logger.warning(f"player_season table already exists.")
+        r_num = pd.read_sql("SELECT COUNT(*) AS num FROM player_season;", con)
+        logger.info(f"player_season table is up to date. \nThere are {int(r_num.num)} \
 rows in the players_season table.")
 
 
+def create_indexes(host, root, password):
+    """
+    Create the indexes of the columns looked up by the find_* and refresh functions.
+    Indexes which already exist are skipped, so it also migrates DBs created without them.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :return:
+    """
+    with pooled_connection(host, root, password) as con:
+        with con.cursor() as cur:
+            existing = get_indexes(cur)
+
+            for table, index_name, columns, index_kind in INDEXES:
+                if (table, index_name) in existing or (index_kind == "FULLTEXT INDEX" and not has_fulltext()):
+                    continue
+                start = time.time()
+                cur.execute(f"""CREATE {index_kind} {index_name} ON {table} ({', '.join(columns)})""")
+                logger.info("Created index %s on %s (%s) in %.2f seconds.",
+                            index_name, table, ', '.join(columns), time.time() - start)
+    logger.info("All indexes exist.")
+
+
 def adjust_seasons(df):
     """
     Adjust the data frame to the player seasons table format
@@ -427,7 +538,12 @@ def adjust_seasons(df):
              "Goal", "Yellow card", "Yellow 2nd/RC", "Red card"]]
     df["player_id"] += 1
     df["Team_id"] += 1
-    df[df == '?'] = -1
+    df = df.replace('?', -1)
+    # Typed columnar files keep unknown statistics ('?') as missing values, which can't be told from
+    # other missing values, so all their missing statistics are -1 (other inputs keep them missing)
+    typed_columns = [column for column in NUMBER_COLUMNS["player_season"]
+                     if pd.api.types.is_extension_array_dtype(df[column])]
+    df[typed_columns] = df[typed_columns].fillna(-1)
 
     return df
 
@@ -439,20 +555,26 @@ logger = define_logger(LOGGER, LOGGER_FILE)
 @click.option('--host', '-h', default='localhost', prompt='Please insert the MySQL host name:', help='MySQL host name')
 @click.option('--root', '-r', default='root', prompt='Please insert the MySQL root:', help='MySQL root')
 @click.option('--password', '-ps', default='', prompt='Please insert the MySQL password:', help='MySQL password')
-def main(host, root, password):
+@click.option('--profile', is_flag=True, help='Profile the run (see profiling.py)')
+def main(host, root, password, profile):
     """
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
+    :param profile: Whether to profile the run
     :return:
     """
-    create_db(host, root, password)
-    create_leagues(host, root, password)
-    create_teams(host, root, password)
-    create_players(host, root, password)
-    create_injuries(host, root, password)
-    create_players_by_team(host, root, password)
-    create_players_by_season(host, root, password)
+    with profiling.profiled("create_db", profile):
+        create_db(host, root, password)
+        create_leagues(host, root, password)
+        create_teams(host, root, password)
+        create_players(host, root, password)
+        create_injuries(host, root, password)
+        create_players_by_team(host, root, password)
+        create_players_by_season(host, root, password)
+        # Created after the bulk loading, so rows aren't indexed one by one while inserted
+        create_indexes(host, root, password)
+    metrics.export_metrics("create_db")
 
 
 if __name__ == "__main__":
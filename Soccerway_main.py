@@ -2,6 +2,7 @@
 from find_and_add_functions import find_league, find_team, find_player
 from Soccerway_create_db import define_logger
 import config
+import profiling
 import click
 
 logger = define_logger(config.LOGGER, config.LOG_FILE)
@@ -36,7 +37,8 @@ def find_from_input(input_str, input_type, host, root, password, fun="find_leagu
 @click.option('--host', '-h', default='localhost', prompt='Please insert the MySQL host name:', help='MySQL host name')
 @click.option('--root', '-r', default='root', prompt='Please insert the MySQL root:', help='MySQL root')
 @click.option('--password', '-ps', default='', prompt='Please insert the MySQL password:', help='MySQL password')
-def main(url, country, league, team, player, host, root, password):
+@click.option('--profile', is_flag=True, help='Profile the run (see profiling.py)')
+def main(url, country, league, team, player, host, root, password, profile):
     """
     main function that runs the scraping
     # :param number: number of top leagues user want to extract.
@@ -48,13 +50,15 @@ def main(url, country, league, team, player, host, root, password):
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
+    :param profile: Whether to profile the run
     :return:
     """
-    logger.info(find_from_input(url,     'url',     host, root, password, fun="find_league"))
-    logger.info(find_from_input(country, 'country', host, root, password, fun="find_league"))
-    logger.info(find_from_input(league,  'name',    host, root, password, fun="find_league"))
-    logger.info(find_from_input(team,    'name',    host, root, password, fun="find_team"))
-    logger.info(find_from_input(player,  'name',    host, root, password, fun="find_player"))
+    with profiling.profiled("main", profile):
+        logger.info(find_from_input(url,     'url',     host, root, password, fun="find_league"))
+        logger.info(find_from_input(country, 'country', host, root, password, fun="find_league"))
+        logger.info(find_from_input(league,  'name',    host, root, password, fun="find_league"))
+        logger.info(find_from_input(team,    'name',    host, root, password, fun="find_team"))
+        logger.info(find_from_input(player,  'name',    host, root, password, fun="find_player"))
 
 
 if __name__ == '__main__':
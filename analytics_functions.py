@@ -0,0 +1,114 @@
+"""
+Analytics of the scraped datasets, without MySQL.
+The datasets are loaded from their files (typed Parquet/ Feather files, or JSON/ NDJSON, see
+dataset_functions) into data frames shaped as the DB's tables, and can be queried with SQL
+on an in-memory SQLite database.
+"""
+
+import sqlite3
+import click
+import pandas as pd
+import config
+from dataset_functions import read_dataset, dataset_exists, DATASET_FILES
+from Soccerway_create_db import define_logger, adjust_info, adjust_injuries, adjust_teams, adjust_seasons, \
+    PLAYERS_COLUMNS, INJURIES_COLUMNS, PLAYER_TEAM_COLUMNS, PLAYER_SEASON_COLUMNS
+
+logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+
+def load_dataset(file_name):
+    """
+    Load a whole dataset from its files (in the format of config.OUTPUT_FORMAT).
+    :param file_name: Base name of the dataset's files (e.g. "player")
+    :return: Data frame of the dataset, whose index is the records' counter
+    """
+    return pd.concat(list(read_dataset(file_name)))
+
+
+def with_ids(df, columns, ids):
+    """
+    Name a table's columns as in the DB, and add its id column.
+    :param df: Adjusted data frame of the table
+    :param columns: Table's columns (without the id), in the order of the data frame's columns
+    :param ids: Ids of the rows
+    :return: Data frame of the table
+    """
+    df = df.copy()
+    df.columns = columns
+    df.insert(0, "id", list(ids))
+    return df.reset_index(drop=True)
+
+
+def adjust_teams_dataset(df):
+    """
+    Adjust the teams' data frame to the teams table format (as create_teams does).
+    :param df: Data frame to adjust
+    :return df: Adjusted data frame
+    """
+    df = df[["league_id", "name", "url"]].copy()
+    df["league_id"] += 1
+    return df
+
+
+# Tables: their dataset, the function adjusting it (as when inserted), their columns, and whether their ids are
+# the records' counter + 1 (leagues, teams and players, as other tables reference them), or their rows' order
+TABLES = {"leagues": ("leagues", lambda df: df[["name", "country", "url"]], ["name", "country", "url"], True),
+          "teams": ("teams", adjust_teams_dataset, ["league_id", "name", "url"], True),
+          "players": ("players", adjust_info, PLAYERS_COLUMNS, True),
+          "injuries": ("injuries", adjust_injuries, INJURIES_COLUMNS, False),
+          "player_team": ("players_teams", adjust_teams, PLAYER_TEAM_COLUMNS, False),
+          "player_season": ("players_seasons", adjust_seasons, PLAYER_SEASON_COLUMNS, False)}
+
+
+def load_tables():
+    """
+    Load the saved datasets as the DB's tables (adjusted as when they are inserted, with the same ids).
+    Datasets which weren't saved are skipped.
+    :return: Dictionary of the tables' data frames, keyed by the tables' names
+    """
+    tables = {}
+    for table, (dataset, adjust_function, columns, counter_ids) in TABLES.items():
+        if not dataset_exists(DATASET_FILES[dataset]):
+            logger.warning(f"No {DATASET_FILES[dataset]} dataset was saved, skipping the {table} table.")
+            continue
+        df = adjust_function(load_dataset(DATASET_FILES[dataset]))
+        ids = df.index + 1 if counter_ids else range(1, df.shape[0] + 1)
+        tables[table] = with_ids(df, columns, ids)
+
+    return tables
+
+
+def query(sql, tables=None):
+    """
+    Run an SQL query over the tables, in an in-memory SQLite database.
+    :param sql: SQL query (SQLite's dialect), on the DB's tables and columns
+    :param tables: Dictionary of the tables' data frames (all datasets' tables by default, see load_tables)
+    :return: Data frame of the query's results
+    """
+    tables = load_tables() if tables is None else tables
+    con = sqlite3.connect(":memory:")
+    try:
+        for table, df in tables.items():
+            df.to_sql(table, con, index=False)
+        return pd.read_sql(sql, con)
+    finally:
+        con.close()
+
+
+@click.command()
+@click.option('--sql', '-q', required=True, help='SQL query on the DB\'s tables (e.g. "SELECT COUNT(*) FROM injuries")')
+@click.option('--input-format', '-f', type=click.Choice(["json", "ndjson", "parquet", "feather"]),
+              default=config.OUTPUT_FORMAT, help='Format of the datasets\' files')
+def main(sql, input_format):
+    """
+    Query the scraped datasets without MySQL.
+    :param sql: SQL query on the DB's tables
+    :param input_format: Format of the datasets' files
+    :return:
+    """
+    config.OUTPUT_FORMAT = input_format
+    logger.info(query(sql).to_string())
+
+
+if __name__ == '__main__':
+    main()
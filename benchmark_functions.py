@@ -0,0 +1,702 @@
+"""
+Benchmarks of the project's hot functions.
+Every benchmark runs offline, on synthetic or saved data, and logs its timings, besides the
+DB benchmarks (plans and queries), which run on an existing DB.
+"""
+
+import datetime
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import click
+import numpy as np
+import pandas as pd
+import config
+from Soccerway_create_db import define_logger, adjust_info, adjust_injuries, adjust_teams, insert_rows, \
+    INJURIES_COLUMNS, stop_log_listener, start_progress, update_progress, log_progress
+from db_functions import pooled_connection, explain, has_fulltext, transaction
+from scraping_functions import scrape_leagues, scrape_teams, scrape_players, get_player_injuries, \
+    get_player_info, get_player_seasons, get_player_teams, get_career_table_headers, close_parser_pool
+from parsing_functions import make_soup, make_player_soup, PLAYER_PAGE_BLOCKS
+from records import to_records, to_dicts
+from dataset_functions import read_dataset, write_columnar, COLUMNAR_FORMATS, PYARROW_INSTALLED
+
+logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+# Lookups of the find_* functions: the query, and a query of the DB's values to look up with it
+LOOKUP_QUERIES = {
+    "league by url": ("SELECT * FROM leagues WHERE url IN (%s)", "SELECT url FROM leagues"),
+    "league by country": ("SELECT * FROM leagues WHERE country IN (%s)", "SELECT country FROM leagues"),
+    "team by name": ("SELECT * FROM teams WHERE name IN (%s)", "SELECT name FROM teams"),
+    "team by url": ("SELECT * FROM teams WHERE url IN (%s)", "SELECT url FROM teams"),
+    "player by url": ("SELECT * FROM players WHERE url IN (%s)", "SELECT url FROM players"),
+    "player by name": ("SELECT * FROM players WHERE first_name = %s AND last_name = %s",
+                       "SELECT first_name, last_name FROM players"),
+    "player name search": ("SELECT * FROM players WHERE MATCH(first_name, last_name) AGAINST (%s IN BOOLEAN MODE)",
+                           "SELECT CONCAT(last_name, '*') FROM players WHERE CHAR_LENGTH(last_name) >= 3"),
+    "player's injuries": ("SELECT * FROM injuries WHERE player_id = %s ORDER BY start_date",
+                          "SELECT id FROM players")}
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+
+def random_date(rnd, year_format="%y"):
+    """
+    Get a random date string, in soccerway's format.
+    :param rnd: random.Random instance to use
+    :param year_format: Format of the year ("%y" or "%Y")
+    :return: Date string in the format of "%d/%m/%y"
+    """
+    date = datetime.date(rnd.randint(1971, 2020), rnd.randint(1, 12), rnd.randint(1, 28))
+    return date.strftime("%d/%m/" + year_format)
+
+
+def synthetic_players(rows, seed=0):
+    """
+    Create a data frame of players, as read from player.json.
+    :param rows: Number of players
+    :param seed: Seed of the random values
+    :return: Data frame of players
+    """
+    rnd = random.Random(seed)
+    players = {}
+    for n in range(rows):
+        players[n] = {"First name": f"First{n}", "Last name": f"Last{n}", "Nationality": "Spain",
+                      "Date of birth": 'nan' if rnd.random() < 0.05 else
+                      f"{rnd.randint(1, 28)} {rnd.choice(MONTHS)} {rnd.randint(1970, 2002)}",
+                      "Age": "27", "Country of birth": "Spain", "Place of birth": "Sevilla",
+                      "Position": rnd.choice(["Goalkeeper", "Defender", "Midfielder", "Attacker"]),
+                      "Height": None if rnd.random() < 0.1 else f"{rnd.randint(160, 200)} cm",
+                      "Weight": None if rnd.random() < 0.1 else f"{rnd.randint(60, 95)} kg",
+                      "Foot": rnd.choice([None, "Left", "Right", "Both"]),
+                      "url": f"{config.SOCCER_URL}/players/player-{n}/{n}/"}
+    return pd.DataFrame(players).T
+
+
+def synthetic_injuries(rows, seed=0):
+    """
+    Create a data frame of injuries, as read from injury.json.
+    :param rows: Number of injuries
+    :param seed: Seed of the random values
+    :return: Data frame of injuries
+    """
+    rnd = random.Random(seed)
+    injuries = {}
+    for n in range(rows):
+        injuries[n] = {"player_id": n // 3, "description": "Knee Injury", "start_date": random_date(rnd),
+                       "end_date": None if rnd.random() < 0.1 else random_date(rnd)}
+    return pd.DataFrame(injuries).T
+
+
+def synthetic_players_teams(rows, seed=0):
+    """
+    Create a data frame of players' teams, as read from player_team.json.
+    :param rows: Number of players' teams
+    :param seed: Seed of the random values
+    :return: Data frame of players' teams
+    """
+    rnd = random.Random(seed)
+    players_teams = {}
+    for n in range(rows):
+        players_teams[n] = {"player_id": n // 4, "team": "Team", "team_url": f"{config.SOCCER_URL}/teams/team/",
+                            "team_id": None if rnd.random() < 0.5 else rnd.randint(0, 99),
+                            "start": random_date(rnd), "end": None if rnd.random() < 0.2 else random_date(rnd)}
+    return pd.DataFrame(players_teams).T
+
+
+####################################################
+# Row by row implementations of the adjust_* functions, kept as the reference of the benchmarks
+
+
+def legacy_adjust_info(df):
+    df = df.loc[:, df.columns != "Age"]
+    df = df.loc[:, df.columns != "Place of birth"]
+
+    for ind, date in zip(df.index, df["Date of birth"]):
+        if str(date) == 'nan':
+            df.loc[ind, "Date of birth"] = datetime.datetime.now()
+        else:
+            df.loc[ind, "Date of birth"] = datetime.datetime.strptime(str(date), "%d %B %Y")
+
+    df["Height"][df["Height"].notna()] = \
+        df["Height"][df["Height"].notna()].apply(lambda x: x[:-3])
+    df["Height"][df["Height"].isna()] = 0
+
+    df["Weight"][df["Weight"].notna()] = \
+        df["Weight"][df["Weight"].notna()].apply(lambda x: x[:-3])
+    df["Weight"][df["Weight"].isna()] = 0
+
+    df['Foot'][df['Foot'].notnull()] = \
+        df['Foot'][df['Foot'].notnull()] == 'Right'
+    df['Foot'][df['Foot'].isnull()] = -1
+
+    df = df[["First name", "Last name", "Nationality", "Date of birth",
+             "Country of birth", "Position", "Height", "Weight", "Foot", "url"]]
+
+    return df
+
+
+def legacy_adjust_injuries(df):
+    for ind, date in zip(df.index, df["start_date"]):
+        df.loc[ind, "start_date"] = datetime.datetime.strptime(date, "%d/%m/%y")
+        if df.loc[ind, "end_date"] is None:
+            df.loc[ind, "end_date"] = datetime.datetime.strptime("01/01/1111", "%d/%m/%Y")
+        else:
+            df.loc[ind, "end_date"] = datetime.datetime.strptime(df.loc[ind, "end_date"], "%d/%m/%y")
+    df["player_id"] += 1
+
+    df = df[["player_id", "description", "start_date", "end_date"]]
+
+    return df
+
+
+def legacy_adjust_teams(df):
+    df = df[["player_id", "team_id", "start", "end"]]
+    df = df[df["team_id"].notna()]
+
+    df["player_id"] += 1
+    df["team_id"] += 1
+    df["end"].fillna("01/01/70", inplace=True)
+
+    for i in df.index:
+        df.loc[i, "start"] = datetime.datetime.strptime(df.loc[i, "start"], "%d/%m/%y")
+        df.loc[i, "end"] = datetime.datetime.strptime(df.loc[i, "end"], "%d/%m/%y")
+
+    df.index = range(df.shape[0])
+
+    df = df[["player_id", "team_id", "start", "end"]]
+
+    return df
+
+
+####################################################
+
+
+def same_rows(df, reference, skip_columns=()):
+    """
+    Check whether two data frames hold the same values (regardless of their dtypes).
+    :param df: Data frame to check
+    :param reference: Reference data frame
+    :param skip_columns: Columns which aren't compared (e.g. ones holding the current time)
+    :return: True if both have the same index, columns and values.
+    """
+    if list(df.columns) != list(reference.columns) or list(df.index) != list(reference.index):
+        return False
+
+    columns = [column for column in df.columns if column not in skip_columns]
+    return df[columns].astype(object).values.tolist() == reference[columns].astype(object).values.tolist()
+
+
+def benchmark_adjust(rows=100000, legacy_rows=None):
+    """
+    Compare the vectorized adjust_* functions with their row by row versions.
+    The row by row versions run on legacy_rows rows only (they are very slow) and their
+    timing is extrapolated linearly to the full number of rows.
+    :param rows: Number of rows of every synthetic data frame
+    :param legacy_rows: Number of rows the row by row versions run on (all rows if None)
+    :return results: Dictionary of (vectorized seconds, row by row seconds, identical output) per function
+    """
+    legacy_rows = legacy_rows or rows
+    cases = [("adjust_info", adjust_info, legacy_adjust_info, synthetic_players, ["Date of birth"]),
+             ("adjust_injuries", adjust_injuries, legacy_adjust_injuries, synthetic_injuries, []),
+             ("adjust_teams", adjust_teams, legacy_adjust_teams, synthetic_players_teams, [])]
+    results = {}
+
+    for name, function, legacy_function, make_frame, skip_columns in cases:
+        df = make_frame(rows)
+
+        start = time.perf_counter()
+        adjusted = function(df.copy())
+        seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_adjusted = legacy_function(df.iloc[:legacy_rows].copy())
+        legacy_seconds = (time.perf_counter() - start) * rows / legacy_rows
+
+        identical = same_rows(function(df.iloc[:legacy_rows].copy()), legacy_adjusted, skip_columns)
+        results[name] = (seconds, legacy_seconds, identical)
+        logger.info(f"{name}: {seconds:.3f}s vectorized, {legacy_seconds:.3f}s row by row for {rows} rows "
+                    f"(x{legacy_seconds / seconds:.0f} faster), identical output: {identical}")
+
+    return results
+
+
+def extract_player(player_soup, player_url):
+    """
+    Extract all data of a player's page, as done while scraping.
+    :param player_soup: Player's soup (parsed HTML)
+    :param player_url: Player's URL
+    :return: Tuple of the player's info, injuries, seasons and teams dictionaries.
+    """
+    injuries, _ = get_player_injuries(player_soup, {}, 0, 0)
+    seasons, _, first_date, current_team, current_team_url = get_player_seasons(player_soup, {}, 0, 0, {})
+    teams, _ = get_player_teams(player_soup, {}, 0, 0, {}, first_date, current_team, current_team_url)
+    info = get_player_info(player_soup, {}, 0, player_url)
+    return info, injuries, seasons, teams
+
+
+def read_pages(pages_dir, sub_dir=""):
+    """
+    Read saved pages.
+    :param pages_dir: Directory of saved pages (searched recursively).
+    :param sub_dir: Only pages under this sub directory are read (e.g. "players").
+    :return pages: Dictionary of pages' paths and their HTML.
+    """
+    pages = {}
+    for dir_path, _, file_names in os.walk(os.path.join(pages_dir, sub_dir)):
+        for file_name in sorted(file_names):
+            path = os.path.join(dir_path, file_name)
+            if file_name.endswith(".html"):
+                with open(path, encoding='utf-8') as page:
+                    pages[path] = page.read()
+    return dict(sorted(pages.items()))
+
+
+def check_parser_parity(pages):
+    """
+    Check every parsing backend (and targeted parsing) extracts the same data from players'
+    pages as the reference - Python's html.parser over the whole page.
+    :param pages: Dictionary of players' pages (path or URL, and HTML)
+    :return mismatches: List of (page, parser, targeted) which extracted different data.
+    """
+    mismatches = []
+    for page_name, page in pages.items():
+        reference = extract_player(make_soup(page, parser="html.parser"), page_name)
+
+        for parser in ["html.parser", "lxml"]:
+            for parse_only in [None, PLAYER_PAGE_BLOCKS]:
+                extracted = extract_player(make_soup(page, parse_only, parser), page_name)
+                if extracted != reference:
+                    mismatches.append((page_name, parser, parse_only is not None))
+
+    logger.info(f"Parsers parity: {len(mismatches)} mismatches in {len(pages)} players' pages.")
+    for page_name, parser, targeted in mismatches:
+        logger.warning(f"{page_name} is extracted differently by {parser} (targeted: {targeted}).")
+
+    return mismatches
+
+
+def log_latencies(name, latencies):
+    """
+    Log the median and 95th percentile of latencies.
+    :param name: Name of the measured function
+    :param latencies: List of latencies (in seconds)
+    :return: Tuple of the p50 and p95 latencies (in milliseconds)
+    """
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    logger.info(f"{name}: p50 {p50:.3f}ms, p95 {p95:.3f}ms ({len(latencies)} calls)")
+    return p50, p95
+
+
+def benchmark_parsing(pages, repeat=5):
+    """
+    Measure the latency of parsing players' pages and of every function extracting their data.
+    :param pages: Dictionary of players' pages (path or URL, and HTML)
+    :param repeat: Number of times every page is processed
+    :return results: Dictionary of (p50, p95) latencies in milliseconds per function, and pages/s.
+    """
+    latencies = {name: [] for name in ["make_player_soup", "get_player_injuries", "get_player_info",
+                                       "get_player_seasons", "get_player_teams", "get_career_table_headers"]}
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        for page_name, page in pages.items():
+            call_start = time.perf_counter()
+            player_soup = make_player_soup(page)
+            latencies["make_player_soup"].append(time.perf_counter() - call_start)
+
+            call_start = time.perf_counter()
+            get_player_injuries(player_soup, {}, 0, 0)
+            latencies["get_player_injuries"].append(time.perf_counter() - call_start)
+
+            call_start = time.perf_counter()
+            get_player_info(player_soup, {}, 0, page_name)
+            latencies["get_player_info"].append(time.perf_counter() - call_start)
+
+            call_start = time.perf_counter()
+            _, _, first_date, current_team, current_team_url = get_player_seasons(player_soup, {}, 0, 0, {})
+            latencies["get_player_seasons"].append(time.perf_counter() - call_start)
+
+            call_start = time.perf_counter()
+            get_player_teams(player_soup, {}, 0, 0, {}, first_date, current_team, current_team_url)
+            latencies["get_player_teams"].append(time.perf_counter() - call_start)
+
+            career_table = player_soup.find('table', class_="playerstats career sortable table")
+            if career_table:
+                call_start = time.perf_counter()
+                get_career_table_headers(career_table)
+                latencies["get_career_table_headers"].append(time.perf_counter() - call_start)
+
+    pages_per_second = repeat * len(pages) / (time.perf_counter() - start)
+    results = {name: log_latencies(name, values) for name, values in latencies.items() if values}
+    results["pages/s"] = pages_per_second
+    logger.info(f"Parsed and extracted {pages_per_second:.1f} players' pages/s.")
+
+    return results
+
+
+def benchmark_scraping_chain(pages_dir):
+    """
+    Run the whole scrape_leagues -> scrape_teams -> scrape_players chain over saved pages,
+    measuring its duration, pages/s and peak memory.
+    :param pages_dir: Directory of saved pages (see http_client.get_offline_page)
+    :return results: Dictionary of the seconds of every stage, pages/s and peak memory (MB).
+    """
+    offline_pages_dir, config.OFFLINE_PAGES_DIR = config.OFFLINE_PAGES_DIR, pages_dir
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        leagues = scrape_leagues()
+        leagues_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        teams = scrape_teams(leagues)
+        teams_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        players = scrape_players(teams)[0]
+        players_seconds = time.perf_counter() - start
+
+        peak_memory = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+        config.OFFLINE_PAGES_DIR = offline_pages_dir
+
+    # Competitions page, leagues' pages, squads' pages and players' pages
+    pages_num = 1 + len(leagues) + len(teams) + len(players)
+    total_seconds = leagues_seconds + teams_seconds + players_seconds
+    results = {"scrape_leagues": leagues_seconds, "scrape_teams": teams_seconds,
+               "scrape_players": players_seconds, "pages/s": pages_num / total_seconds,
+               "peak memory (MB)": peak_memory}
+    logger.info(f"Scraping chain: {pages_num} pages in {total_seconds:.2f}s ({pages_num / total_seconds:.1f} pages/s), "
+                f"scrape_leagues {leagues_seconds:.2f}s, scrape_teams {teams_seconds:.2f}s, "
+                f"scrape_players {players_seconds:.2f}s, peak memory {peak_memory:.1f}MB.")
+
+    return results
+
+
+def benchmark_dataset_formats(rows=100000):
+    """
+    Compare loading synthetic datasets from JSON files (as saved by scraping_functions) and from
+    typed columnar files (Parquet and Feather), up to their adjusted data frames inserted into the DB.
+    :param rows: Number of rows of every synthetic dataset
+    :return results: Dictionary of (seconds, identical output) per dataset and format
+    """
+    if not PYARROW_INSTALLED:
+        logger.info("Skipping the formats benchmark, Parquet and Feather need pyarrow.")
+        return {}
+
+    cases = [("player", adjust_info, synthetic_players, ["Date of birth"]),
+             ("injury", adjust_injuries, synthetic_injuries, []),
+             ("player_team", adjust_teams, synthetic_players_teams, [])]
+    output_format = config.OUTPUT_FORMAT
+    results = {}
+    with tempfile.TemporaryDirectory() as datasets_dir:
+        try:
+            for file_name, adjust_function, make_frame, skip_columns in cases:
+                path = os.path.join(datasets_dir, file_name)
+                df = make_frame(rows)
+                with open(path + ".json", 'w') as json_file:
+                    json_file.write(df.T.to_json())
+                for file_format in COLUMNAR_FORMATS:
+                    write_columnar(path, df, file_format)
+
+                reference = None
+                for file_format in ["json"] + list(COLUMNAR_FORMATS):
+                    config.OUTPUT_FORMAT = file_format
+                    start = time.perf_counter()
+                    adjusted = pd.concat([adjust_function(chunk) for chunk in read_dataset(path)])
+                    seconds = time.perf_counter() - start
+                    # Columnar files are read in chunks, and adjust_teams numbers the rows of every chunk
+                    adjusted = adjusted.reset_index(drop=True)
+
+                    reference = adjusted if reference is None else reference
+                    identical = same_rows(adjusted, reference, skip_columns)
+                    results[(file_name, file_format)] = (seconds, identical)
+                    logger.info(f"Loading {rows} rows of {file_name} from {file_format}: {seconds:.3f}s, "
+                                f"identical output: {identical}")
+        finally:
+            config.OUTPUT_FORMAT = output_format
+
+    return results
+
+
+def benchmark_records_memory(pages_dir, copies=100):
+    """
+    Measure the memory of the players' datasets scraped from saved pages, kept as dictionaries
+    (as they used to be) and as record objects (see records.py). The datasets are copied several
+    times, sharing their values, so the measured memory is the records' own (their containers).
+    :param pages_dir: Directory of saved pages (see http_client.get_offline_page)
+    :param copies: Number of copies of the datasets kept
+    :return results: Dictionary of the bytes per record of dictionaries and of record objects.
+    """
+    offline_pages_dir, config.OFFLINE_PAGES_DIR = config.OFFLINE_PAGES_DIR, pages_dir
+    try:
+        datasets = dict(zip(("players", "injuries", "players_seasons", "players_teams"),
+                            scrape_players(scrape_teams(scrape_leagues()))))
+    finally:
+        config.OFFLINE_PAGES_DIR = offline_pages_dir
+    dictionaries = {dataset: to_dicts(records) for dataset, records in datasets.items()}
+    records_num = sum(len(records) for records in dictionaries.values()) * copies
+
+    results = {}
+    for name, copy_datasets in (
+            ("dictionaries", lambda: {dataset: {n: dict(record) for n, record in records.items()}
+                                      for dataset, records in dictionaries.items()}),
+            ("records", lambda: {dataset: to_records(dataset, records)
+                                 for dataset, records in dictionaries.items()})):
+        tracemalloc.start()
+        try:
+            kept = [copy_datasets() for _ in range(copies)]
+            results[name] = tracemalloc.get_traced_memory()[0] / records_num
+        finally:
+            tracemalloc.stop()
+        del kept
+
+    logger.info(f"Memory of {records_num} records: dictionaries {results['dictionaries']:.0f} bytes per record, "
+                f"records {results['records']:.0f} bytes per record "
+                f"({1 - results['records'] / results['dictionaries']:.0%} less).")
+    return results
+
+
+def benchmark_parse_workers(pages_dir, workers_options=None):
+    """
+    Run scrape_players over saved pages with different numbers of parsing processes,
+    checking that all of them produce exactly the same records (and ids).
+    :param pages_dir: Directory of saved pages (see http_client.get_offline_page)
+    :param workers_options: Numbers of parsing processes to compare (1 and PARSE_WORKERS by default).
+    :return results: Dictionary of the numbers of parsing processes and their seconds.
+    """
+    offline_pages_dir, config.OFFLINE_PAGES_DIR = config.OFFLINE_PAGES_DIR, pages_dir
+    parse_workers = config.PARSE_WORKERS
+    results = {}
+    reference = None
+    workers_options = workers_options or sorted({1, parse_workers})
+    try:
+        teams = scrape_teams(scrape_leagues())
+        for workers in workers_options:
+            config.PARSE_WORKERS = workers
+            start = time.perf_counter()
+            datasets = scrape_players(teams)
+            results[workers] = time.perf_counter() - start
+            close_parser_pool()
+
+            reference = reference or datasets
+            logger.info(f"scrape_players with {workers} parsing processes: {results[workers]:.2f}s, "
+                        f"identical output: {datasets == reference}")
+    finally:
+        config.OFFLINE_PAGES_DIR = offline_pages_dir
+        config.PARSE_WORKERS = parse_workers
+
+    return results
+
+
+def benchmark_logging(players=20000):
+    """
+    Compare the time the crawl loop spends logging its players: a line per player written
+    synchronously (as logged before), and the queued logger with per-player lines at DEBUG
+    level and periodic progress lines (see define_logger and update_progress).
+    Both loggers write to a temporary file and to stdout (redirected to another temporary file).
+    :param players: Number of players logged
+    :return results: Dictionary of the loggers and the seconds spent in the loop.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        stdout, sys.stdout = sys.stdout, open(os.path.join(log_dir, "stdout.log"), 'w')
+        try:
+            sync_logger = logging.getLogger("benchmark_sync")
+            sync_logger.propagate = False
+            sync_logger.setLevel(logging.INFO)
+            sync_logger.addHandler(logging.FileHandler(os.path.join(log_dir, "sync.log")))
+            sync_logger.addHandler(logging.StreamHandler(sys.stdout))
+            start = time.perf_counter()
+            for n in range(players):
+                sync_logger.info(f"scraped data on player: player {n}")
+            results["synchronous"] = time.perf_counter() - start
+            for handler in sync_logger.handlers:
+                handler.close()
+            sync_logger.handlers.clear()
+
+            queued_logger = define_logger("benchmark_queued", os.path.join(log_dir, "queued.log"))
+            queued_logger.propagate = False
+            start = time.perf_counter()
+            progress = start_progress(queued_logger, "players")
+            for n in range(players):
+                queued_logger.debug("scraped data on player: %s", f"player {n}")
+                update_progress(progress)
+            log_progress(progress)
+            results["queued"] = time.perf_counter() - start
+            stop_log_listener("benchmark_queued")
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    for name, seconds in results.items():
+        logger.info(f"Logging {players} players, {name}: {seconds:.3f}s "
+                    f"({seconds / players * 1e6:.1f} us per player)")
+    return results
+
+
+def sample_lookup_values(cur, values_query, samples):
+    """
+    Sample random values of the DB to look up.
+    :param cur: DB cursor
+    :param values_query: Query of the values (see LOOKUP_QUERIES)
+    :param samples: Number of values to sample
+    :return: List of tuples of the queries' parameters
+    """
+    cur.execute(f"{values_query} ORDER BY RAND() LIMIT %s", (samples,))
+    return list(cur.fetchall())
+
+
+def check_query_plans(host, root, password):
+    """
+    Check with EXPLAIN that every lookup of the find_* functions uses an index (see Soccerway_create_db.INDEXES),
+    instead of scanning the whole table.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :return results: Dictionary of the lookups and the index they use (None for a full scan).
+    """
+    results = {}
+    with pooled_connection(host, root, password) as con, con.cursor() as cur:
+        for name, (query, values_query) in LOOKUP_QUERIES.items():
+            if "MATCH" in query and not has_fulltext():
+                continue
+            values = sample_lookup_values(cur, values_query, 1)
+            if not values:
+                logger.warning(f"{name}: no values to look up, the plan wasn't checked.")
+                continue
+
+            results[name], details = explain(cur, query, values[0])
+            if results[name]:
+                logger.info(f"{name}: uses index {results[name]} ({details}).")
+            else:
+                logger.warning(f"{name}: scans the whole table ({details}).")
+
+    return results
+
+
+def benchmark_queries(host, root, password, samples=200):
+    """
+    Measure the latency of the lookups of the find_* functions, with random values of the DB.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :param samples: Number of values looked up by every query
+    :return results: Dictionary of (p50, p95) latencies in milliseconds per lookup.
+    """
+    results = {}
+    with pooled_connection(host, root, password) as con, con.cursor() as cur:
+        for name, (query, values_query) in LOOKUP_QUERIES.items():
+            if "MATCH" in query and not has_fulltext():
+                continue
+            latencies = []
+            for values in sample_lookup_values(cur, values_query, samples):
+                start = time.perf_counter()
+                cur.execute(query, values)
+                cur.fetchall()
+                latencies.append(time.perf_counter() - start)
+            if latencies:
+                results[name] = log_latencies(name, latencies)
+
+    return results
+
+
+def benchmark_db_load(host, root, password, rows=100000):
+    """
+    Measure the loading rate of insert_rows (see config.DB_LOAD_METHOD) with synthetic injuries,
+    loaded into a scratch table with the injuries table's columns.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :param rows: Number of loaded rows
+    :return: Number of rows loaded per second
+    """
+    df = adjust_injuries(synthetic_injuries(rows))
+
+    with pooled_connection(host, root, password) as con:
+        with transaction(con) as cur:
+            cur.execute("DROP TABLE IF EXISTS benchmark_injuries")
+            cur.execute('''CREATE TABLE benchmark_injuries (
+                          id INT PRIMARY KEY AUTO_INCREMENT,
+                          player_id INT,
+                          description VARCHAR(50) CHARACTER SET utf8mb4,
+                          start_date DATE,
+                          end_date DATE)''')
+
+        start = time.perf_counter()
+        insert_rows(con, "benchmark_injuries", INJURIES_COLUMNS, df)
+        seconds = time.perf_counter() - start
+
+        with transaction(con) as cur:
+            cur.execute("DROP TABLE benchmark_injuries")
+
+    logger.info(f"Loaded {rows} rows into the {config.DB_BACKEND} DB in {seconds:.2f}s ({rows / seconds:.0f} rows/s).")
+    return rows / seconds
+
+
+BENCHMARKS = ["adjust", "parsing", "chain", "parity", "workers", "logging", "memory", "formats"]
+DB_BENCHMARKS = ["plans", "queries", "load"]
+
+
+@click.command()
+@click.option('--benchmark', '-b', type=click.Choice(BENCHMARKS + DB_BENCHMARKS), multiple=True,
+              help='Benchmark to run (can be given multiple times, all offline benchmarks by default).')
+@click.option('--rows', '-n', default=100000, help='Number of rows of the synthetic data frames.')
+@click.option('--legacy-rows', default=5000, help='Number of rows the row by row versions run on.')
+@click.option('--pages-dir', default=os.path.join("fixtures", "pages"), help='Directory of saved pages.')
+@click.option('--repeat', default=5, help='Number of times every saved page is parsed.')
+@click.option('--host', '-h', default=config.HOST, help='MySQL host name (for the DB benchmarks)')
+@click.option('--root', '-r', default=config.ROOT, help='MySQL root (for the DB benchmarks)')
+@click.option('--password', '-ps', default='', help='MySQL password (for the DB benchmarks)')
+@click.option('--backend', type=click.Choice(["mysql", "sqlite"]), default=config.DB_BACKEND,
+              help='DB backend of the DB benchmarks (sqlite uses config.SQLITE_FILE).')
+def main(benchmark, rows, legacy_rows, pages_dir, repeat, host, root, password, backend):
+    """
+    Run the benchmarks.
+    :param benchmark: Benchmarks to run (all offline benchmarks if empty).
+    :param rows: Number of rows of the synthetic data frames.
+    :param legacy_rows: Number of rows the row by row versions run on.
+    :param pages_dir: Directory of saved pages.
+    :param repeat: Number of times every saved page is parsed.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :param backend: DB backend of the DB benchmarks
+    :return:
+    """
+    benchmark = benchmark or BENCHMARKS
+    config.DB_BACKEND = backend
+
+    if "adjust" in benchmark:
+        benchmark_adjust(rows, legacy_rows)
+    if "parsing" in benchmark:
+        benchmark_parsing(read_pages(pages_dir, "players"), repeat)
+    if "chain" in benchmark:
+        benchmark_scraping_chain(pages_dir)
+    if "parity" in benchmark:
+        check_parser_parity(read_pages(pages_dir, "players"))
+    if "workers" in benchmark:
+        benchmark_parse_workers(pages_dir)
+    if "logging" in benchmark:
+        benchmark_logging()
+    if "memory" in benchmark:
+        benchmark_records_memory(pages_dir)
+    if "formats" in benchmark:
+        benchmark_dataset_formats(rows)
+    if "plans" in benchmark:
+        check_query_plans(host, root, password)
+    if "queries" in benchmark:
+        benchmark_queries(host, root, password)
+    if "load" in benchmark:
+        benchmark_db_load(host, root, password, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Checkpoint journal of the scraping pipeline.
+Every finished stage (leagues, teams, each player and each team's squad) is appended
+to a JSON-lines journal together with the running counters, so a run which crashed
+can be restarted from where it stopped, with the exact same ids.
+Players' entries are synced to the disk together, every config.CHECKPOINT_SYNC_EVERY players
+and at the end of every stage. When the records are streamed to NDJSON files, the journal
+holds only the keys and counters, and the files themselves hold the records.
+"""
+
+import json
+import os
+import config
+from records import to_records, json_default
+
+DATASETS = ("players", "injuries", "players_seasons", "players_teams")
+
+
+def int_keys(dictionary):
+    """
+    Convert back the keys of a dictionary read from JSON into integers.
+    :param dictionary: Dictionary whose keys are counters saved as strings.
+    :return: The same dictionary, with integer keys.
+    """
+    return {int(key): value for key, value in dictionary.items()}
+
+
+def load_checkpoint(journal_file=None):
+    """
+    Replay the checkpoint journal of a previous run (if there is one).
+    :param journal_file: Path of the journal (config.CHECKPOINT_FILE by default).
+    :return checkpoint: Dictionary of the restored state - leagues and teams scraped, the keys of
+    finished squads and players, the last counters, the URLs of the players scraped (and their ids),
+    the players' datasets scraped so far (unless they were streamed to NDJSON files, which is
+    marked by "streamed") and the entries not synced to the journal yet.
+    """
+    checkpoint = {"journal": journal_file or config.CHECKPOINT_FILE, "leagues": None, "teams": None,
+                  "done": set(), "counters": None, "seen_players": {}, "streamed": False, "pending": []}
+    for dataset in DATASETS:
+        checkpoint[dataset] = {}
+
+    if not os.path.exists(checkpoint["journal"]):
+        return checkpoint
+
+    with open(checkpoint["journal"]) as journal:
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break   # Last line was cut in the middle by the crash
+
+            if entry["stage"] in ("leagues", "teams"):
+                checkpoint[entry["stage"]] = to_records(entry["stage"], int_keys(entry["data"]))
+                continue
+
+            checkpoint["done"].add(entry["key"])
+            checkpoint["counters"] = entry["counters"]
+            if entry["stage"] == "player":
+                # Player's key is its team's URL and its href, and its id is one less than the player counter
+                checkpoint["seen_players"][config.SOCCER_URL + entry["key"].split(' ', 1)[1]] = \
+                    entry["counters"][0] - 1
+                checkpoint["streamed"] = "records" not in entry
+            for dataset, records in entry.get("records", {}).items():
+                checkpoint[dataset].update(to_records(dataset, int_keys(records)))
+
+    return checkpoint
+
+
+def record_checkpoint(checkpoint, stage, key=None, counters=None, records=None, data=None, writers=None):
+    """
+    Append a finished stage to the checkpoint journal. Players' entries are kept until
+    config.CHECKPOINT_SYNC_EVERY of them are pending, other stages sync the journal at once.
+    :param checkpoint: Checkpoint state (as returned by load_checkpoint).
+    :param stage: Name of the finished stage (leagues/ teams/ player/ squad).
+    :param key: Unique key of the finished player or squad.
+    :param counters: Running counters after the stage was finished.
+    :param records: Dictionary of the datasets' records added by the stage (None if they are streamed).
+    :param data: Whole result of the stage (for leagues and teams).
+    :param writers: Open NDJSON files the records are streamed to (see dataset_functions), synced before the journal.
+    :return:
+    """
+    entry = {"stage": stage}
+    if data is not None:
+        entry["data"] = data
+    else:
+        entry.update({"key": key, "counters": counters})
+        if records is not None:
+            entry["records"] = records
+
+    checkpoint["pending"].append(json.dumps(entry, default=json_default) + '\n')
+    if stage != "player" or len(checkpoint["pending"]) >= config.CHECKPOINT_SYNC_EVERY:
+        sync_checkpoint(checkpoint, writers)
+
+
+def sync_checkpoint(checkpoint, writers=None):
+    """
+    Write the pending entries to the checkpoint journal, and sync it to the disk. The NDJSON files
+    are synced first, so the journal never counts records which aren't in them.
+    :param checkpoint: Checkpoint state (as returned by load_checkpoint).
+    :param writers: Open NDJSON files the records are streamed to (see dataset_functions).
+    :return:
+    """
+    if not checkpoint["pending"]:
+        return
+
+    for writer in (writers or {}).values():
+        writer.flush()
+        os.fsync(writer.fileno())
+
+    with open(checkpoint["journal"], 'a') as journal:
+        journal.writelines(checkpoint["pending"])
+        journal.flush()
+        os.fsync(journal.fileno())
+    checkpoint["pending"].clear()
+
+
+def clear_checkpoint(checkpoint):
+    """
+    Remove the checkpoint journal once a run was finished successfully.
+    :param checkpoint: Checkpoint state (as returned by load_checkpoint).
+    :return:
+    """
+    if os.path.exists(checkpoint["journal"]):
+        os.remove(checkpoint["journal"])
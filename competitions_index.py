@@ -0,0 +1,118 @@
+"""
+Index of soccerway.com's competitions page.
+The countries (and the URL of their first league) and the competitions listed in the page are
+extracted once, and kept in memory and on disk for config.COMPETITIONS_INDEX_TTL seconds, so
+scraping the leagues, adding a league and checking countries don't download and parse it again.
+"""
+
+import json
+import os
+import time
+import config
+import http_client
+from parsing_functions import make_soup
+from Soccerway_create_db import define_logger
+
+SOCCER_URL = config.SOCCER_URL
+logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+_competitions_index = None
+
+
+def get_competitions_index():
+    """
+    Get the index of the competitions page, from memory, from disk, or else by fetching and parsing the page.
+    :return: Dictionary of the index's countries, competitions, source and fetching time.
+    """
+    global _competitions_index
+
+    source = [SOCCER_URL, config.OFFLINE_PAGES_DIR]
+    if not is_fresh(_competitions_index, source):
+        _competitions_index = load_competitions_index()
+    if not is_fresh(_competitions_index, source):
+        _competitions_index = build_competitions_index()
+        _competitions_index["source"] = source
+        save_competitions_index(_competitions_index)
+
+    return _competitions_index
+
+
+def is_fresh(competitions_index, source):
+    """
+    Check whether an index can be used.
+    :param competitions_index: Index of the competitions page (or None)
+    :param source: Site and offline pages' directory the index should have been built from
+    :return: True if the index was built from the same source, less than COMPETITIONS_INDEX_TTL seconds ago.
+    """
+    return competitions_index is not None and competitions_index["source"] == source and \
+        time.time() - competitions_index["fetched"] <= config.COMPETITIONS_INDEX_TTL
+
+
+def build_competitions_index():
+    """
+    Fetch and parse the competitions page.
+    :return: Dictionary of the countries (and the URL of their first league), the competitions
+    (name, country and URL, in the page's order) and the fetching time.
+    """
+    competitions_page_soup = make_soup(http_client.get_text(SOCCER_URL + "/competitions/"))
+
+    competitions = []
+    for competition in competitions_page_soup.find_all('li', class_=["odd", "even"]):
+        competitions.append(
+            {'name': str(competition.text),
+             'country': competition.contents[0].attrs['href'].rsplit('national/')[1].split('/')[0].title(),
+             'url': SOCCER_URL + competition.contents[0].attrs['href']})
+
+    countries = {}
+    areas_soup = competitions_page_soup.find('ul', class_='areas')
+    for country_soup in areas_soup.find_all('div', class_="row"):
+        countries[country_soup.a.text.strip().title()] = SOCCER_URL + country_soup.a["href"]
+
+    logger.info("Indexed %d countries and %d competitions.", len(countries), len(competitions))
+    return {"countries": countries, "competitions": competitions, "fetched": time.time()}
+
+
+def load_competitions_index(index_file=None):
+    """
+    Load the index saved on disk.
+    :param index_file: Path of the index file (config.COMPETITIONS_INDEX_FILE by default)
+    :return: Dictionary of the index (None if it wasn't saved or can't be read, so it is built again)
+    """
+    index_file = index_file or config.COMPETITIONS_INDEX_FILE
+    if not os.path.exists(index_file):
+        return None
+    with open(index_file) as index:
+        try:
+            return json.load(index)
+        except ValueError as error:
+            logger.warning("The competitions index %s can't be read (%s), it is built again.", index_file, error)
+            return None
+
+
+def save_competitions_index(competitions_index, index_file=None):
+    """
+    Save the index on disk.
+    :param competitions_index: Dictionary of the index
+    :param index_file: Path of the index file (config.COMPETITIONS_INDEX_FILE by default)
+    :return:
+    """
+    index_file = index_file or config.COMPETITIONS_INDEX_FILE
+    with open(index_file + ".tmp", 'w') as index:
+        json.dump(competitions_index, index)
+    os.replace(index_file + ".tmp", index_file)
+
+
+def get_countries_dict():
+    """
+    Get the countries that exist in soccerway.com and the midterm URL to their first leagues
+    :return countries_dict: Dictionary of countries exist in soccerway.com and their URL
+    """
+    return get_competitions_index()["countries"]
+
+
+def get_competitions():
+    """
+    Get the competitions listed in soccerway.com, in the order of the competitions page.
+    :return: List of dictionaries of the competitions' name, country and URL
+    """
+    return get_competitions_index()["competitions"]
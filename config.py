@@ -2,14 +2,91 @@
 Configuration file of the project, containing useful constants.
 """
 
-SOCCER_URL = "https://int.soccerway.com"
+import os
+
+# Can be overridden by the SOCCER_URL environment variable (e.g. to use soccerway_server.py)
+SOCCER_URL = os.environ.get("SOCCER_URL", "https://int.soccerway.com")
 TOP_LEAGUES_NUM = 5
+MAX_WORKERS = 8     # Maximal number of pages fetched concurrently while scraping
+PARSE_WORKERS = os.cpu_count() or 1     # Number of processes parsing players' pages (1 parses them in place)
+
+# HTTP client (connection pooling and timeouts, in seconds)
+HTTP_POOL_CONNECTIONS = 4   # Number of hosts to keep a pool of connections for
+HTTP_POOL_MAXSIZE = MAX_WORKERS     # Maximal number of kept-alive connections per host
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 30
+
+# Adaptive rate limiting (requests/s per host) and retries of failed requests (delays in seconds)
+HTTP_START_RATE = 5.0
+HTTP_MIN_RATE = 0.5
+HTTP_MAX_RATE = 50.0
+HTTP_HOST_MAX_RATES = {"api.sportradar.us": 1.0}     # Hosts with a lower maximal rate
+HTTP_RATE_BURST = MAX_WORKERS   # Maximal number of requests sent at once after an idle period
+HTTP_RATE_INCREASE = 1.05   # Multiplies a host's rate after every successful request
+HTTP_RATE_DECREASE = 0.7    # Multiplies a host's rate after every failed request
+HTTP_MAX_RETRIES = 5
+HTTP_BACKOFF_BASE = 1.0
+HTTP_BACKOFF_CAP = 60.0
+
+# On-disk cache of fetched pages (times to live are in seconds)
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_DIR = ".http_cache"
+HTTP_CACHE_MAX_BYTES = 500 * 1024 ** 2
+HTTP_CACHE_FLUSH_EVERY = 100    # Number of changes after which the cache index is written to disk
+HTTP_CACHE_TTL = {
+    "competition": 7 * 24 * 3600,
+    "squad": 24 * 3600,
+    "player": 6 * 3600,
+    "default": 24 * 3600}
+
+COMPETITIONS_INDEX_FILE = "competitions_index.json"  # Countries and competitions of the competitions page
+COMPETITIONS_INDEX_TTL = 7 * 24 * 3600
+
+OFFLINE_PAGES_DIR = None    # Directory of saved pages (e.g. "fixtures/pages") to read instead of fetching
+
+HTML_PARSER = "lxml"    # "lxml" (falls back to "html.parser" if lxml isn't installed) or "html.parser"
+TARGETED_PARSING = True     # Parse only the scraped blocks of players' pages
+
+CHECKPOINT_FILE = "scrape_checkpoint.jsonl"    # Journal used to resume a crashed scraping run
+CHECKPOINT_SYNC_EVERY = 50   # Players journaled between syncs of the checkpoint journal to the disk
+REFRESH_STATE_FILE = "refresh_state.json"  # Hashes of players' blocks from the last incremental refresh
+REFRESH_BATCH_SIZE = 200    # Number of players' pages fetched and refreshed together
+# "ndjson" streams every record as it is scraped, "json" saves each dataset at the end, and "parquet"/
+# "feather" save each dataset at the end as a typed columnar file (needs pyarrow)
+OUTPUT_FORMAT = "ndjson"
+COLUMNAR_MEMORY_MAP = True  # Whether Parquet/ Feather files are read memory-mapped
+DB_CHUNK_SIZE = 10000   # Maximal number of records read at once from an NDJSON file
+
+METRICS_FILE = "metrics_{run}.json"   # JSON summary of the metrics of every run (scraping/ create_db/ ...)
+METRICS_PROMETHEUS_FILE = None  # Prometheus text file of the metrics (e.g. "metrics_{run}.prom"), None to skip it
+METRICS_SAMPLE_SIZE = 10000     # Number of last timings of every metric kept for its quantiles
+
+PROFILE_DIR = "profiles"        # Directory of the profiles of runs with --profile
+PROFILE_TOP_N = 30              # Number of functions listed in every section of a profile's report
+# Functions listed in the "Hot functions" section of a profile's report (prefixes of their names)
+PROFILE_HOT_FUNCTIONS = ("scrape_specific_player", "parse_player_page", "get_player_seasons",
+                         "get_player_teams", "get_player_injuries", "adjust_", "insert_rows",
+                         "load_data_infile", "find_league", "find_team", "find_player", "lookup_rows",
+                         "lookup_players")
+
 DB_NAME = "soccer_injuries"
+DB_BACKEND = "mysql"    # "mysql" or "sqlite" (an embedded database file, no server needed)
+SQLITE_FILE = DB_NAME + ".sqlite"   # Database file of the SQLite backend
 LOGGER = "scrap"
 LOG_FILE = "log_file.log"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")   # DEBUG also logs every team and player scraped
+LOG_PROGRESS_EVERY = 100        # Number of players scraped between progress lines in the log
+LOG_PROGRESS_SECONDS = 30       # Maximal number of seconds between progress lines in the log
 HOST = 'localhost'
 ROOT = 'root'
 
+# Bulk loading of the DB tables
+FULLTEXT_MIN_WORD_LENGTH = 3    # Shortest word of the FULLTEXT index (innodb_ft_min_token_size)
+DB_POOL_SIZE = 4    # Maximal number of idle connections kept open (per host, user and database)
+DB_LOAD_METHOD = "executemany"  # "executemany" (batched multi-row INSERTs) or "load_data" (LOAD DATA LOCAL INFILE)
+DB_INSERT_BATCH_SIZE = 1000     # Number of rows sent in every multi-row INSERT
+DB_COMMIT_SIZE = 10000      # Number of rows inserted in every transaction
+
 API_TOURNAMENT_DICT = {
     "Spain": 8,
     "England": 17,
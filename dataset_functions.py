@@ -0,0 +1,257 @@
+"""
+Reading and writing of the scraped datasets.
+Besides the original JSON files (one object keyed by counters), every dataset can be
+streamed into a newline-delimited JSON file (one record per line, e.g. player.jsonl)
+while it is scraped, and read back lazily in bounded chunks when creating the DB.
+Datasets can also be saved as typed columnar files (Parquet or Arrow IPC/ Feather, which
+need pyarrow), whose ids, dates and statistics keep their types when read back.
+"""
+
+import json
+import os
+from itertools import islice
+import click
+import pandas as pd
+import config
+from records import to_dataframe
+
+# pyarrow is an optional dependency, needed only by the columnar formats (ParquetFile.iter_batches needs 3.0)
+PYARROW_MIN_VERSION = (3, 0)
+try:
+    import pyarrow.feather
+    import pyarrow.parquet
+    PYARROW_VERSION = tuple(int(part) for part in pyarrow.__version__.split(".")[:2])
+except ImportError:
+    PYARROW_VERSION = None
+PYARROW_INSTALLED = PYARROW_VERSION is not None and PYARROW_VERSION >= PYARROW_MIN_VERSION
+
+# Datasets and the base name of their files
+DATASET_FILES = {"leagues": "league",
+                 "teams": "team",
+                 "players": "player",
+                 "injuries": "injury",
+                 "players_seasons": "player_season",
+                 "players_teams": "player_team"}
+
+# Columnar formats and the extension of their files
+COLUMNAR_FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+# Types of the datasets' columns in the columnar files (other columns are kept as strings)
+ID_COLUMNS = ["league_id", "player_id", "team_id", "Team_id", "Comp_id"]
+DATE_COLUMNS = {"player": {"Date of birth": "%d %B %Y"},
+                "injury": {"start_date": "%d/%m/%y", "end_date": "%d/%m/%y"},
+                "player_team": {"start": "%d/%m/%y", "end": "%d/%m/%y"}}
+NUMBER_COLUMNS = {"player_season": ["Minutes played", "Appearances", "Lineups", "Substitute in",
+                                    "Substitute out", "Substitutes on bench", "Goal", "Yellow card",
+                                    "Yellow 2nd/RC", "Red card"]}
+
+
+def open_ndjson_writers(mode='w'):
+    """
+    Open the NDJSON files of all datasets for writing.
+    :param mode: 'w' to start new files, 'a' to append to existing ones.
+    :return writers: Dictionary of open files, keyed by dataset name.
+    """
+    return {dataset: open(file_name + ".jsonl", mode, encoding='utf-8')
+            for dataset, file_name in DATASET_FILES.items()}
+
+
+def write_ndjson_records(writers, dataset, records):
+    """
+    Append records to the NDJSON file of a dataset, one record per line.
+    :param writers: Dictionary of open files (as returned by open_ndjson_writers).
+    :param dataset: Name of the dataset the records belong to.
+    :param records: Dictionary of records (dictionaries or record objects, see records.py), keyed by their
+    counter (saved as the "id" field).
+    :return:
+    """
+    writer = writers[dataset]
+    for record_id, record in records.items():
+        writer.write(json.dumps({"id": record_id, **record}) + '\n')
+
+
+def truncate_ndjson_datasets(counters):
+    """
+    Cut the NDJSON files of datasets back to their records whose counter is below the given one
+    (the records of the players finished before a crash, see checkpoint_functions).
+    :param counters: Dictionary of datasets' names and the counter of their first record to drop.
+    :return:
+    """
+    for dataset, counter in counters.items():
+        file_name = DATASET_FILES[dataset] + ".jsonl"
+        if not os.path.exists(file_name):
+            continue
+        with open(file_name, encoding='utf-8') as ndjson_file, \
+                open(file_name + ".tmp", 'w', encoding='utf-8') as truncated_file:
+            for line in ndjson_file:
+                try:
+                    if json.loads(line)["id"] >= counter:
+                        break
+                except ValueError:
+                    break   # Last line was cut in the middle by the crash
+                truncated_file.write(line)
+        os.replace(file_name + ".tmp", file_name)
+
+
+def close_ndjson_writers(writers):
+    """
+    Close the NDJSON files of all datasets.
+    :param writers: Dictionary of open files (as returned by open_ndjson_writers).
+    :return:
+    """
+    for writer in writers.values():
+        writer.close()
+
+
+def read_dataset(file_name, dict_to_read=None, chunk_size=config.DB_CHUNK_SIZE):
+    """
+    Read a dataset as data frames whose index is the records' counter.
+    A dictionary which was given is used as is, otherwise the dataset's NDJSON file is read
+    lazily in chunks (if streaming output is used and it exists), or else its JSON file at once.
+    :param file_name: Base name of the dataset's files (e.g. "player").
+    :param dict_to_read: Dictionary of records to read instead of the files.
+    :param chunk_size: Maximal number of records in every chunk read from an NDJSON file.
+    :return: Generator of data frames.
+    """
+    if dict_to_read:
+        yield to_dataframe(dict_to_read)
+
+    elif config.OUTPUT_FORMAT == "ndjson" and os.path.exists(file_name + ".jsonl"):
+        with open(file_name + ".jsonl", encoding='utf-8') as ndjson_file:
+            while True:
+                chunk = {}
+                for line in islice(ndjson_file, chunk_size):
+                    record = json.loads(line)
+                    chunk[record.pop("id")] = record
+                if not chunk:
+                    break
+                # Built as the data frames of dictionaries, so values and dtypes are the same
+                yield pd.DataFrame(chunk).T
+
+    elif config.OUTPUT_FORMAT in COLUMNAR_FORMATS and \
+            os.path.exists(file_name + COLUMNAR_FORMATS[config.OUTPUT_FORMAT]):
+        yield from read_columnar(file_name, config.OUTPUT_FORMAT, chunk_size)
+
+    else:
+        yield pd.read_json(file_name + ".json").T
+
+
+def dataset_exists(file_name):
+    """
+    Check whether a dataset was saved, in any format.
+    :param file_name: Base name of the dataset's files (e.g. "player")
+    :return: True if one of its files exists
+    """
+    return any(os.path.exists(file_name + extension)
+               for extension in [".json", ".jsonl"] + list(COLUMNAR_FORMATS.values()))
+
+
+def check_pyarrow():
+    """
+    Check that pyarrow, needed by the columnar formats, is installed (in a supported version).
+    :return:
+    """
+    if not PYARROW_INSTALLED:
+        installed = "isn't installed" if PYARROW_VERSION is None else f"{pyarrow.__version__} is installed"
+        raise ImportError(f"Parquet and Feather datasets need the optional pyarrow >= "
+                          f"{'.'.join(map(str, PYARROW_MIN_VERSION))} ({installed}): pip install \"pyarrow>=3.0\"")
+
+
+def to_typed_dataframe(file_name, df):
+    """
+    Convert a dataset's data frame (of scraped strings) into the typed data frame saved in the
+    columnar files: its counter as an "id" column, nullable integer ids, dates (missing ones are NaT),
+    integer statistics (unknown ones, "?", are missing), and strings.
+    :param file_name: Base name of the dataset's files (e.g. "player", or its path)
+    :param df: Data frame of the dataset, whose index is the records' counter
+    :return: Typed data frame
+    """
+    date_columns = DATE_COLUMNS.get(os.path.basename(file_name), {})
+    number_columns = NUMBER_COLUMNS.get(os.path.basename(file_name), [])
+    df = df.rename_axis("id").reset_index()
+    for column in df.columns:
+        if column == "id" or column in ID_COLUMNS:
+            df[column] = pd.to_numeric(df[column]).astype("Int64")
+        elif column in date_columns:
+            df[column] = pd.to_datetime(df[column], format=date_columns[column], errors="coerce")
+        elif column in number_columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+        else:
+            df[column] = df[column].map(lambda value: None if pd.isna(value) else str(value))
+    return df
+
+
+def write_columnar(file_name, df, file_format):
+    """
+    Save a dataset as a typed columnar file (see to_typed_dataframe), e.g. player.parquet.
+    :param file_name: Base name of the dataset's files (e.g. "player")
+    :param df: Data frame of the dataset, whose index is the records' counter
+    :param file_format: "parquet" or "feather" (Arrow IPC)
+    :return:
+    """
+    check_pyarrow()
+    table = pyarrow.Table.from_pandas(to_typed_dataframe(file_name, df), preserve_index=False)
+    if file_format == "parquet":
+        pyarrow.parquet.write_table(table, file_name + COLUMNAR_FORMATS[file_format],
+                                    row_group_size=config.DB_CHUNK_SIZE)
+    else:
+        pyarrow.feather.write_feather(table, file_name + COLUMNAR_FORMATS[file_format],
+                                      chunksize=config.DB_CHUNK_SIZE)
+
+
+def read_columnar(file_name, file_format, chunk_size=config.DB_CHUNK_SIZE):
+    """
+    Read a dataset's columnar file in chunks, memory-mapped if config.COLUMNAR_MEMORY_MAP is set.
+    :param file_name: Base name of the dataset's files (e.g. "player")
+    :param file_format: "parquet" or "feather" (Arrow IPC)
+    :param chunk_size: Maximal number of records in every chunk
+    :return: Generator of typed data frames, whose index is the records' counter
+    """
+    check_pyarrow()
+    path = file_name + COLUMNAR_FORMATS[file_format]
+    if file_format == "parquet":
+        parquet_file = pyarrow.parquet.ParquetFile(path, memory_map=config.COLUMNAR_MEMORY_MAP)
+        batches = parquet_file.iter_batches(batch_size=chunk_size)
+    else:
+        table = pyarrow.feather.read_table(path, memory_map=config.COLUMNAR_MEMORY_MAP)
+        batches = table.to_batches(max_chunksize=chunk_size)
+
+    for batch in batches:
+        yield batch.to_pandas().set_index("id").rename_axis(None)
+
+
+def save_columnar_datasets(datasets, file_format):
+    """
+    Save scraped datasets as columnar files (see write_columnar).
+    :param datasets: Dictionary of the datasets' records (keyed by counters), keyed by dataset name
+    :param file_format: "parquet" or "feather" (Arrow IPC)
+    :return:
+    """
+    for dataset, records in datasets.items():
+        write_columnar(DATASET_FILES[dataset], to_dataframe(records), file_format)
+
+
+@click.command()
+@click.option('--source', '-s', type=click.Choice(["json", "ndjson"]), default=config.OUTPUT_FORMAT,
+              help='Format of the datasets to export')
+@click.option('--to', '-t', 'file_format', type=click.Choice(list(COLUMNAR_FORMATS)), default="parquet",
+              help='Columnar format to export the datasets to')
+def main(source, file_format):
+    """
+    Export the saved datasets (JSON or NDJSON files) into columnar files.
+    :param source: Format of the datasets to export
+    :param file_format: Columnar format to export the datasets to
+    :return:
+    """
+    from Soccerway_create_db import define_logger
+    logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+    config.OUTPUT_FORMAT = source
+    for file_name in DATASET_FILES.values():
+        if os.path.exists(file_name + (".jsonl" if source == "ndjson" else ".json")):
+            write_columnar(file_name, pd.concat(list(read_dataset(file_name))), file_format)
+            logger.info(f"Exported {file_name} to {file_name + COLUMNAR_FORMATS[file_format]}.")
+
+
+if __name__ == '__main__':
+    main()
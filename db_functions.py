@@ -0,0 +1,171 @@
+"""
+DB access layer of the project.
+Connections are kept open in a pool (per MySQL host, user and database), so all create_*,
+find_* and add_* calls of a run borrow the same few connections instead of connecting and
+authenticating again for every call. Statements are built once per table and reused.
+The backend is MySQL, or an embedded SQLite file (config.DB_BACKEND, see sqlite_backend).
+"""
+
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+import pymysql
+import config
+import sqlite_backend
+
+DB_ERRORS = (pymysql.Error, sqlite3.Error)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect(host, root, password, db=config.DB_NAME):
+    """
+    Open a new connection to the DB backend (to config.SQLITE_FILE for the SQLite backend).
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :param db: Database to use (None to connect without selecting one)
+    :return: DB connection
+    """
+    if config.DB_BACKEND == "sqlite":
+        return sqlite_backend.connect(config.SQLITE_FILE)
+    return pymysql.connect(host, root, password, db=db,
+                           local_infile=config.DB_LOAD_METHOD == "load_data")
+
+
+@contextmanager
+def pooled_connection(host, root, password, db=config.DB_NAME):
+    """
+    Borrow a connection from the pool (opening a new one if none is idle), and give it back when done.
+    Up to config.DB_POOL_SIZE idle connections are kept open for every host, user and database.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :param db: Database to use (None to connect without selecting one)
+    :return: DB connection
+    """
+    key = (host, root, password, db)
+    with _pools_lock:
+        idle = _pools.setdefault(key, [])
+        con = idle.pop() if idle else None
+
+    if con is None:
+        con = connect(host, root, password, db)
+    else:
+        con.ping(reconnect=True)    # The server may have closed it while it was idle
+
+    try:
+        yield con
+    finally:
+        release_connection(key, con)
+
+
+def release_connection(key, con):
+    """
+    Give a borrowed connection back to its pool, or close it if the pool is full.
+    A transaction left open is rolled back (as closing the connection would do), so the next
+    borrower doesn't see uncommitted changes or an old snapshot of the tables.
+    :param key: Tuple of the connection's host, user, password and database
+    :param con: DB connection
+    :return:
+    """
+    if not con.open:
+        return
+    try:
+        con.rollback()
+    except DB_ERRORS:
+        con.close()     # A broken connection isn't given back to the pool
+        return
+
+    with _pools_lock:
+        idle = _pools.setdefault(key, [])
+        if len(idle) < config.DB_POOL_SIZE:
+            idle.append(con)
+            return
+    con.close()
+
+
+@contextmanager
+def transaction(con):
+    """
+    Run statements in a single transaction, which is committed if the block ends normally
+    and rolled back if it raises.
+    :param con: DB connection
+    :return: Cursor of the connection
+    """
+    try:
+        with con.cursor() as cur:
+            yield cur
+    except BaseException:
+        con.rollback()
+        raise
+    con.commit()
+
+
+def close_pools():
+    """
+    Close all idle connections of the pools.
+    :return:
+    """
+    with _pools_lock:
+        for idle in _pools.values():
+            for con in idle:
+                if con.open:
+                    con.close()
+        _pools.clear()
+
+
+atexit.register(close_pools)
+
+
+def has_fulltext():
+    """
+    Check whether the DB backend supports FULLTEXT indexes and MATCH ... AGAINST searches.
+    :return: True for MySQL
+    """
+    return config.DB_BACKEND == "mysql"
+
+
+def get_indexes(cur):
+    """
+    Get the indexes of the project's database.
+    :param cur: DB cursor
+    :return: Set of tuples of the indexes' table and name
+    """
+    if config.DB_BACKEND == "sqlite":
+        return sqlite_backend.get_indexes(cur)
+
+    cur.execute("""SELECT DISTINCT table_name, index_name FROM information_schema.statistics
+                   WHERE table_schema = %s""", (config.DB_NAME,))
+    return {(table.lower(), index_name) for table, index_name in cur.fetchall()}
+
+
+def explain(cur, query, args):
+    """
+    Get the index a query uses, by its query plan.
+    :param cur: DB cursor
+    :param query: Statement to explain
+    :param args: Sequence of the statement's parameters
+    :return: Tuple of the index's name (None if the whole table is scanned) and the plan's details
+    """
+    if config.DB_BACKEND == "sqlite":
+        return sqlite_backend.explain(cur, query, args)
+
+    cur.execute(f"EXPLAIN {query}", args)
+    columns = [column[0] for column in cur.description]
+    plan = dict(zip(columns, cur.fetchone()))
+    return plan["key"], f"{plan['type']} on {plan['table']}, {plan['rows']} rows examined"
+
+
+@lru_cache(maxsize=None)
+def insert_statement(table, columns):
+    """
+    Build (once) the INSERT statement of a table.
+    :param table: Name of the table
+    :param columns: Tuple of the inserted columns
+    :return: INSERT statement with a %s placeholder for every column
+    """
+    return f"""INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"""
@@ -1,11 +1,14 @@
 
-import requests
-from bs4 import BeautifulSoup
+import re
 import pymysql
 import click
 import datetime
 
 import config
+import http_client
+from db_functions import pooled_connection, has_fulltext
+from parsing_functions import make_soup
+from competitions_index import get_countries_dict
 from scraping_functions import scrape_leagues, scrape_teams, scrape_players
 from Soccerway_create_db import define_logger, create_teams, create_players,\
     create_injuries, create_players_by_team, create_players_by_season
@@ -15,6 +18,8 @@ SOCCER_URL = config.SOCCER_URL
 DB_NAME = config.DB_NAME
 logger = define_logger(config.LOGGER, config.LOG_FILE)
 
+FULLTEXT_INDEX_MISSING = 1191   # MySQL error of MATCH on columns without a FULLTEXT index
+
 
 def find_league(argin, argtype, host='localhost', root='root', password=''):
     """
@@ -26,36 +31,55 @@ def find_league(argin, argtype, host='localhost', root='root', password=''):
     :param password: MySQL password
     :return results: Query's results
     """
-    con = pymysql.connect(host, root, password)
     results = []
 
-    with con.cursor() as cur:
-        cur.execute(f"""USE {DB_NAME};""")
+    with pooled_connection(host, root, password) as con, con.cursor() as cur:
+        found = lookup_rows(cur, "leagues", argtype, argin)
 
         for inp in argin:
             if argtype == "country" and inp not in get_countries_dict().keys():
                 logger.info(f"{inp} is not one of the possible countries.")
                 continue
 
-            cur.execute(f"""SELECT * FROM leagues WHERE {argtype}='{inp}'""")
-            result = cur.fetchall()
+            result = found.get(inp)
             if result:
                 results.append(result)
 
             else:
                 logger.info(f"League is not inside the DB - starting to scrape its teams and players.")
                 add_league(inp, argtype, con, host, root, password)
-                cur.execute(f"""SELECT * FROM leagues WHERE {argtype}='{inp}'""")
+                cur.execute(f"""SELECT * FROM leagues WHERE {argtype} = %s""", (inp,))
                 result = cur.fetchall()
                 if result:
                     results.append(result)
                 else:
                     logger.info(f"{inp} was not found on site.")
 
-    con.close()
     return results
 
 
+def lookup_rows(cur, table, column, values):
+    """
+    Find the rows of several values of a column in a single query (instead of a query per value).
+    :param cur: DB cursor
+    :param table: Name of the table
+    :param column: Column to look the values up in (e.g. name/ country/ url)
+    :param values: Values to look up
+    :return: Dictionary of the values found and the tuples of their rows (matched case insensitively, as in MySQL).
+    """
+    values = list(values)
+    if not values:
+        return {}
+
+    cur.execute(f"""SELECT {column}, {table}.* FROM {table}
+                    WHERE {column} IN ({', '.join(['%s'] * len(values))})""", values)
+    rows = {}
+    for row in cur.fetchall():
+        rows.setdefault(str(row[0]).lower(), []).append(row[1:])
+
+    return {value: tuple(rows[value.lower()]) for value in values if value.lower() in rows}
+
+
 def add_league(inp_to_add, type_to_add, con, host, root, password):
     """
     Add a league which doesn't exist in the DB to it.
@@ -69,11 +93,11 @@ def add_league(inp_to_add, type_to_add, con, host, root, password):
     """
     with con.cursor() as cur:
         if type_to_add == "url":
-            league_soup = BeautifulSoup(requests.get(inp_to_add).text, 'html.parser')
+            league_soup = make_soup(http_client.get_text(inp_to_add))
             league_site = inp_to_add
         elif type_to_add == "country":
             midterm_url = get_countries_dict()[inp_to_add]
-            league_soup = BeautifulSoup(requests.get(midterm_url).text, 'html.parser')
+            league_soup = make_soup(http_client.get_text(midterm_url))
             league_site = SOCCER_URL + league_soup.find('ul', class_="left-tree").li.a["href"]
         else:
             league_soup, league_site = get_first_search_result(
@@ -99,7 +123,7 @@ def get_first_search_result(searching_site, player=None):
     :return result_soup: HTML of the first result's site
     :return result_site: URL of the first result's site
     """
-    search_soup = BeautifulSoup(requests.get(searching_site).text, 'html.parser')
+    search_soup = make_soup(http_client.get_text(searching_site))
 
     first_result = None
     result_soup = None
@@ -117,29 +141,11 @@ def get_first_search_result(searching_site, player=None):
 
     if first_result:
         result_site = SOCCER_URL + first_result
-        result_soup = BeautifulSoup(requests.get(result_site).text, 'html.parser')
+        result_soup = make_soup(http_client.get_text(result_site))
 
     return result_soup, result_site
 
 
-def get_countries_dict():
-    """
-    Get the countries that exist in soccerway.com and the midterm URL to their first leagues
-    :return countries_dict: Dictionary of countries exist in soccerway.com and their URL
-    """
-    competitions_page_soup = BeautifulSoup(requests.get(
-        SOCCER_URL + "/competitions/").text, 'html.parser')
-
-    competitions_page_soup = competitions_page_soup.find('ul', class_='areas')
-    countries_soup = competitions_page_soup.find_all('div', class_="row")
-
-    countries_dict = {}
-    for country_soup in countries_soup:
-        countries_dict[country_soup.a.text.strip().title()] = SOCCER_URL + country_soup.a["href"]
-
-    return countries_dict
-
-
 def add_all_teams_and_players_in_league(league_dict, con, host, root, password):
     """
     Add all teams and players data within the league to be added
@@ -169,7 +175,19 @@ def add_all_teams_and_players_in_league(league_dict, con, host, root, password):
         teams_dict = add_league_teams(league_dict, team_counter, host, root, password)
 
         add_teams_players(teams_dict, player_count, injury_count, player_season_count,
-                          player_team_count, host, root, password)
+                          player_team_count, host, root, password, get_db_players_index(con))
+
+
+def get_db_players_index(con):
+    """
+    Create an index of the players' URLs already in the DB, so they aren't scraped and added again
+    when a league is reached again (through one of its teams or players).
+    :param con: DB connection
+    :return: Dictionary of players' URLs and their ids as scraped (one less than their DB ids)
+    """
+    with con.cursor() as cur:
+        cur.execute("""SELECT id, url FROM players WHERE url IS NOT NULL""")
+        return {url: player_id - 1 for player_id, url in cur.fetchall()}
 
 
 def add_league_teams(league_diction, team_count, host, root, password):
@@ -189,7 +207,7 @@ def add_league_teams(league_diction, team_count, host, root, password):
 
 
 def add_teams_players(teams_dictionary, player_counter, injury_counter, player_season_counter,
-                      player_team_counter, host, root, password):
+                      player_team_counter, host, root, password, seen_players=None):
     """
     Add all teams in a league which doesn't exist in the DB to it.
     :param teams_dictionary: Dictionary of teams to add.
@@ -200,11 +218,12 @@ def add_teams_players(teams_dictionary, player_counter, injury_counter, player_s
     :param host: MySQL host name
     :param root: MySQL root name
     :param password: MySQL password
+    :param seen_players: Dictionary of players' URLs already in the DB and their ids (see get_db_players_index)
     :return :
     """
     players, injuries, players_seasons, players_teams = \
         scrape_players(teams_dictionary, player_counter, injury_counter, player_season_counter,
-                       player_team_counter)
+                       player_team_counter, seen_players=seen_players)
     if players:
         create_players(host, root, password, dict_to_read=players)
         create_injuries(host, root, password, dict_to_read=injuries)
@@ -225,29 +244,26 @@ def find_team(argin, argtype, host='localhost', root='root', password=''):
     :param password: MySQL password
     :return results: Query's results
     """
-    con = pymysql.connect(host, root, password)
     results = []
 
-    with con.cursor() as cur:
-        cur.execute(f"""USE {DB_NAME};""")
+    with pooled_connection(host, root, password) as con, con.cursor() as cur:
+        found = lookup_rows(cur, "teams", argtype, argin)
 
         for inp in argin:
-            cur.execute(f"""SELECT * FROM teams WHERE {argtype}='{inp}'""")
-            result = cur.fetchall()
+            result = found.get(inp)
             if result:
                 results.append(result)
 
             else:
                 team_name = add_team(inp, argtype, host, root, password)
                 con.commit()
-                cur.execute(f"""SELECT * FROM teams WHERE name='{team_name}'""")
+                cur.execute("""SELECT * FROM teams WHERE name = %s""", (team_name,))
                 result = cur.fetchall()
                 if result:
                     results.append(result)
                 else:
                     logger.info(f"{inp} was not found on site.")
 
-    con.close()
     return results
 
 
@@ -264,7 +280,7 @@ def add_team(inp_to_add, type_to_add, host, root, password):
     team_name = ""
 
     if type_to_add == "url":
-        team_soup = BeautifulSoup(requests.get(inp_to_add).text, 'html.parser')
+        team_soup = make_soup(http_client.get_text(inp_to_add))
         team_site = inp_to_add
     else:
         team_soup, team_site = get_first_search_result(
@@ -295,45 +311,115 @@ def find_player(argin, argtype, host='localhost', root='root', password=''):
     :param password: MySQL password
     :return results: Query's results
     """
-    con = pymysql.connect(host, root, password)
     results = []
 
-    with con.cursor() as cur:
-        cur.execute(f"""USE {DB_NAME};""")
+    with pooled_connection(host, root, password) as con, con.cursor() as cur:
+        if argtype == "name":
+            found = lookup_players(cur, argin)
+        else:
+            found = lookup_rows(cur, "players", argtype, argin)
 
         for inp in argin:
-            if argtype == "name":
-                if len(inp.split()) == 1:
-                    cur.execute(f"""SELECT * FROM players WHERE last_name LIKE '%{inp}%'""")
-                else:
-                    first_name = inp.split()[0]
-                    last_name = inp.split()[-1]
-                    cur.execute(f"""SELECT * FROM players WHERE
-                                    first_name LIKE '%{first_name}%' AND
-                                    last_name LIKE '%{last_name}%'""")
-            else:
-                cur.execute(f"""SELECT * FROM players WHERE {argtype}='{inp}'""")
-
-            result = cur.fetchall()
+            result = found.get(inp)
             if result:
                 results.append(result)
 
             else:
                 first, last = add_player(inp, argtype, host, root, password)
                 con.commit()
-                cur.execute(f"""SELECT * FROM players WHERE
-                                                first_name='{first}' AND
-                                                last_name='{last}'""")
+                cur.execute("""SELECT * FROM players WHERE first_name = %s AND last_name = %s""", (first, last))
                 result = cur.fetchall()
                 if result:
                     results.append(result)
                 else:
                     logger.info(f"{inp} was not found on site.")
 
-    con.close()
     return results
 
 
+def get_name_parts(name):
+    """
+    Split a searched player's name into the parts looked up.
+    :param name: Player's last name, or first and last name
+    :return: Tuple of the first name (None if only a last name was given) and the last name
+    """
+    parts = name.split()
+    if len(parts) == 1:
+        return None, parts[0]
+    return parts[0], parts[-1]
+
+
+def match_player_name(name_parts, first_name, last_name):
+    """
+    Check whether a player's name contains a searched name (case insensitively, as LIKE '%...%' does).
+    :param name_parts: Searched first and last name (see get_name_parts)
+    :param first_name: Player's first name
+    :param last_name: Player's last name
+    :return: True if the player matches the searched name
+    """
+    first, last = name_parts
+    return last.lower() in (last_name or "").lower() and \
+        (first is None or first.lower() in (first_name or "").lower())
+
+
+def lookup_players(cur, names):
+    """
+    Find the players of several names in at most two queries: a FULLTEXT search of all the names'
+    words, and a LIKE search of the names it didn't find (parts of words, words shorter than the FULLTEXT
+    minimal word length, or a DB created without the FULLTEXT index).
+    :param cur: DB cursor
+    :param names: Players' names (a last name, or a first and last name)
+    :return: Dictionary of the names found and the tuples of their players' rows.
+    """
+    names_parts = {name: get_name_parts(name) for name in names if name.split()}
+    found = {}
+
+    words = {re.sub(r"\W", "", part) for name_parts in names_parts.values() for part in name_parts if part}
+    words = [word for word in words if len(word) >= config.FULLTEXT_MIN_WORD_LENGTH]
+    if words and has_fulltext():
+        try:
+            cur.execute("""SELECT first_name, last_name, players.* FROM players
+                           WHERE MATCH(first_name, last_name) AGAINST (%s IN BOOLEAN MODE)""",
+                        (" ".join(word + "*" for word in words),))
+            found = match_players(cur.fetchall(), names_parts)
+        except pymysql.MySQLError as error:
+            if error.args[0] != FULLTEXT_INDEX_MISSING:
+                raise
+
+    missing = {name: name_parts for name, name_parts in names_parts.items() if name not in found}
+    if missing:
+        conditions = []
+        params = []
+        for first, last in missing.values():
+            if first is None:
+                conditions.append("last_name LIKE %s")
+                params.append(f"%{last}%")
+            else:
+                conditions.append("(first_name LIKE %s AND last_name LIKE %s)")
+                params.extend([f"%{first}%", f"%{last}%"])
+        cur.execute(f"""SELECT first_name, last_name, players.* FROM players
+                        WHERE {' OR '.join(conditions)}""", params)
+        found.update(match_players(cur.fetchall(), missing))
+
+    return found
+
+
+def match_players(rows, names_parts):
+    """
+    Assign the players found by a batched search to the names they match.
+    :param rows: Rows of first name, last name and all the players' columns
+    :param names_parts: Dictionary of the searched names and their parts (see get_name_parts)
+    :return: Dictionary of the names which were matched and the tuples of their players' rows.
+    """
+    matched = {}
+    for row in rows:
+        for name, name_parts in names_parts.items():
+            if match_player_name(name_parts, row[0], row[1]):
+                matched.setdefault(name, []).append(row[2:])
+
+    return {name: tuple(players_rows) for name, players_rows in matched.items()}
+
+
 def add_player(inp_to_add, type_to_add, host, root, password):
     """
     Add a player which doesn't exist in the DB to it.
@@ -348,7 +434,7 @@ def add_player(inp_to_add, type_to_add, host, root, password):
     detail_dict = {}
 
     if type_to_add == "url":
-        player_soup = BeautifulSoup(requests.get(inp_to_add).text, 'html.parser')
+        player_soup = make_soup(http_client.get_text(inp_to_add))
         player_site = inp_to_add
     else:
         player_soup, player_site = get_first_search_result(
@@ -0,0 +1,218 @@
+"""
+Persistent on-disk cache of fetched pages.
+Pages are kept as compressed blobs next to a JSON index, keyed by URL. Every class of
+pages (competitions, squads, players) has its own time to live, stale pages are
+revalidated with ETag / Last-Modified, and the least recently used pages are evicted
+once the cache exceeds its size cap.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+import config
+
+INDEX_FILE = "index.json"
+
+_index = None
+_total_size = 0     # Size of all cached blobs, kept up to date so stores don't sum the whole index
+_dirty_writes = 0
+_lock = threading.RLock()
+
+
+def url_class(url):
+    """
+    Classify a URL by the kind of page it points at, to decide its time to live.
+    :param url: URL of the page.
+    :return: One of the keys of config.HTTP_CACHE_TTL.
+    """
+    path = urlparse(url).path
+    if path.endswith("/squad/"):
+        return "squad"
+    # Matched from the start of the path, so e.g. the players' search (/search/players/) isn't a player page
+    if path.startswith("/players/"):
+        return "player"
+    if path.startswith(("/competitions/", "/national/", "/international/")):
+        return "competition"
+    return "default"
+
+
+def _load_index():
+    """
+    Load the cache index from disk (only once per run).
+    :return: Dictionary of cached entries, keyed by URL.
+    """
+    global _index, _total_size
+
+    if _index is None:
+        index_path = os.path.join(config.HTTP_CACHE_DIR, INDEX_FILE)
+        try:
+            with open(index_path) as index_file:
+                _index = json.load(index_file)
+        except (OSError, ValueError):
+            _index = {}
+        _total_size = sum(entry["size"] for entry in _index.values())
+
+    return _index
+
+
+def flush():
+    """
+    Write the cache index to disk, if it was changed since it was last written.
+    :return:
+    """
+    global _dirty_writes
+
+    with _lock:
+        if _index is None or not _dirty_writes:
+            return
+        os.makedirs(config.HTTP_CACHE_DIR, exist_ok=True)
+        index_path = os.path.join(config.HTTP_CACHE_DIR, INDEX_FILE)
+        with open(index_path + ".tmp", 'w') as index_file:
+            json.dump(_index, index_file)
+        os.replace(index_path + ".tmp", index_path)
+        _dirty_writes = 0
+
+
+def _mark_dirty():
+    """
+    Count a change of the index, and write it to disk every few changes.
+    :return:
+    """
+    global _dirty_writes
+
+    _dirty_writes += 1
+    if _dirty_writes >= config.HTTP_CACHE_FLUSH_EVERY:
+        flush()
+
+
+def _read_blob(entry):
+    """
+    Read and decompress the page of a cache entry.
+    :param entry: Entry of the cache index.
+    :return: The page's text, or None if its blob is missing or corrupted.
+    """
+    try:
+        with open(os.path.join(config.HTTP_CACHE_DIR, entry["file"]), 'rb') as blob:
+            return zlib.decompress(blob.read()).decode('utf-8')
+    except (OSError, zlib.error):
+        return None
+
+
+def get_fresh(url):
+    """
+    Get a cached page, if it is still within its time to live.
+    :param url: URL of the page.
+    :return: The page's text, or None if it isn't cached or is stale.
+    """
+    with _lock:
+        entry = _load_index().get(url)
+        if entry is None:
+            return None
+        if time.time() - entry["fetched"] > config.HTTP_CACHE_TTL[url_class(url)]:
+            return None
+
+        text = _read_blob(entry)
+        if text is not None:
+            entry["accessed"] = time.time()
+            _mark_dirty()
+        return text
+
+
+def revalidation_headers(url):
+    """
+    Get the conditional request headers of a stale cached page.
+    :param url: URL of the page.
+    :return: Dictionary of If-None-Match / If-Modified-Since headers (empty if not cached).
+    """
+    with _lock:
+        entry = _load_index().get(url)
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def refresh(url):
+    """
+    Renew a cached page after the server answered it wasn't modified (304).
+    :param url: URL of the page.
+    :return: The cached page's text, or None if it can no longer be read.
+    """
+    with _lock:
+        entry = _load_index().get(url)
+        if entry is None:
+            return None
+
+        text = _read_blob(entry)
+        if text is not None:
+            entry["fetched"] = entry["accessed"] = time.time()
+            _mark_dirty()
+        return text
+
+
+def store(url, response):
+    """
+    Save a fetched page in the cache, evicting old pages if the cache became too big.
+    :param url: URL of the page.
+    :param response: requests.Response of the page.
+    :return:
+    """
+    global _total_size
+
+    blob = zlib.compress(response.text.encode('utf-8'))
+    file_name = hashlib.sha1(url.encode('utf-8')).hexdigest() + ".z"
+
+    with _lock:
+        os.makedirs(config.HTTP_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(config.HTTP_CACHE_DIR, file_name), 'wb') as blob_file:
+            blob_file.write(blob)
+
+        index = _load_index()
+        if url in index:
+            _total_size -= index[url]["size"]
+        _total_size += len(blob)
+
+        now = time.time()
+        index[url] = {"file": file_name,
+                      "size": len(blob),
+                      "fetched": now,
+                      "accessed": now,
+                      "etag": response.headers.get("ETag"),
+                      "last_modified": response.headers.get("Last-Modified")}
+        _evict()
+        _mark_dirty()
+
+
+def _evict():
+    """
+    Remove the least recently used pages until the cache is within its size cap (the entries
+    are only sorted when the running total size exceeds it).
+    :return:
+    """
+    global _total_size
+
+    index = _load_index()
+    if _total_size <= config.HTTP_CACHE_MAX_BYTES:
+        return
+
+    for url in sorted(index, key=lambda cached_url: index[cached_url]["accessed"]):
+        entry = index.pop(url)
+        try:
+            os.remove(os.path.join(config.HTTP_CACHE_DIR, entry["file"]))
+        except OSError:
+            pass
+        _total_size -= entry["size"]
+        if _total_size <= config.HTTP_CACHE_MAX_BYTES:
+            break
+
+
+atexit.register(flush)
@@ -0,0 +1,190 @@
+"""
+Shared HTTP client of the project.
+All pages (soccerway.com and the SportsRadar API) are fetched through one pooled
+session, so connections are kept alive and reused instead of opened per page.
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+import config
+import http_cache
+import metrics
+import rate_limiter
+from Soccerway_create_db import define_logger
+
+logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Get the shared session of the project, creating it on first use.
+    :return session: requests.Session with pooled http and https adapters.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=config.HTTP_POOL_CONNECTIONS,
+                                      pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                                      pool_block=True)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+
+    return _session
+
+
+def close_session():
+    """
+    Close the shared session and all of its pooled connections.
+    :return:
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def is_retryable(status_code):
+    """
+    Check whether a response status means the request should be retried later.
+    :param status_code: HTTP status code
+    :return: True for 429 (too many requests) and 5xx (server errors)
+    """
+    return status_code == 429 or status_code >= 500
+
+
+def get_retry_after(response):
+    """
+    Get the delay asked by the server before retrying.
+    :param response: requests.Response
+    :return: Seconds to wait, or None if the server didn't ask for a delay (in seconds)
+    """
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+def get(url, **kwargs):
+    """
+    Send a GET request through the shared session, at the current rate allowed for its host.
+    Requests failing with 429, 5xx or a connection error are retried with exponential backoff,
+    up to config.HTTP_MAX_RETRIES times, after which the error is raised.
+    :param url: URL to fetch.
+    :param kwargs: Additional arguments passed to requests (e.g. headers).
+    :return: requests.Response of the page.
+    """
+    kwargs.setdefault("timeout", (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT))
+    host = urlparse(url).netloc
+
+    for attempt in range(config.HTTP_MAX_RETRIES + 1):
+        rate_limiter.acquire(host)
+        try:
+            with metrics.timer("fetch_seconds", host=host):
+                response = get_session().get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            rate_limiter.report(host, success=False)
+            metrics.increment("fetch_errors", host=host)
+            if attempt == config.HTTP_MAX_RETRIES:
+                raise
+            delay = rate_limiter.backoff_delay(attempt)
+            logger.warning("Fetching %s failed (%s), retrying in %.1fs.", url, error, delay)
+            metrics.increment("fetch_retries", host=host)
+            time.sleep(delay)
+            continue
+
+        metrics.increment("fetch_bytes", len(response.content), host=host)
+        if not is_retryable(response.status_code):
+            rate_limiter.report(host, success=True)
+            return response
+
+        rate_limiter.report(host, success=False)
+        if attempt == config.HTTP_MAX_RETRIES:
+            response.raise_for_status()
+        metrics.increment("fetch_retries", host=host)
+        delay = rate_limiter.backoff_delay(attempt, get_retry_after(response))
+        logger.warning("Fetching %s returned %d, retrying in %.1fs (rate of %s is now %.1f requests/s).",
+                       url, response.status_code, delay, host, rate_limiter.get_rate(host))
+        time.sleep(delay)
+
+
+def get_page_path(url, pages_dir):
+    """
+    Get the path of a saved page. Pages are saved under the path of their URL (without
+    its query), e.g. /players/x/1/ is saved at <pages_dir>/players/x/1/index.html.
+    :param url: URL (or only the path) of the page.
+    :param pages_dir: Directory of saved pages.
+    :return: Path of the page's file.
+    """
+    return os.path.join(pages_dir, urlparse(url).path.strip('/'), "index.html")
+
+
+def get_offline_page(url, pages_dir):
+    """
+    Read a saved page instead of fetching it.
+    :param url: URL of the page.
+    :param pages_dir: Directory of saved pages.
+    :return: The page's text (empty if it wasn't saved).
+    """
+    page_path = get_page_path(url, pages_dir)
+    if not os.path.exists(page_path):
+        return ""
+
+    with open(page_path, encoding='utf-8') as page:
+        return page.read()
+
+
+def get_text(url, revalidate=False):
+    """
+    Get the text (HTML) of a page, using the on-disk cache if it is enabled.
+    Stale cached pages are revalidated with the server before being downloaded again.
+    If config.OFFLINE_PAGES_DIR is set, pages are read from it instead.
+    Pages are counted in the "pages" metric, by where they came from.
+    :param url: URL to fetch.
+    :param revalidate: Whether to revalidate a cached page with the server even if it is still fresh.
+    :return: The page's text.
+    """
+    text, source = get_text_and_source(url, revalidate)
+    metrics.increment("pages", source=source)
+    return text
+
+
+def get_text_and_source(url, revalidate=False):
+    """
+    Get the text of a page (see get_text), and where it came from.
+    :param url: URL to fetch.
+    :param revalidate: Whether to revalidate a cached page with the server even if it is still fresh.
+    :return: Tuple of the page's text and its source (offline, cache, revalidated or network).
+    """
+    if config.OFFLINE_PAGES_DIR:
+        return get_offline_page(url, config.OFFLINE_PAGES_DIR), "offline"
+
+    if not config.HTTP_CACHE_ENABLED:
+        return get(url).text, "network"
+
+    text = None if revalidate else http_cache.get_fresh(url)
+    if text is not None:
+        return text, "cache"
+
+    response = get(url, headers=http_cache.revalidation_headers(url))
+    if response.status_code == 304:
+        text = http_cache.refresh(url)
+        if text is not None:
+            return text, "revalidated"
+        response = get(url)
+
+    if response.ok:
+        http_cache.store(url, response)
+    return response.text, "network"
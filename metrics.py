@@ -0,0 +1,219 @@
+"""
+Metrics of the scraping and loading pipeline.
+Counters (e.g. bytes downloaded, rows inserted) and timings (e.g. fetch latency, parse time of
+every extracting function, insert time of every table) are collected while running, with labels,
+and exported at the end of a run as a JSON summary, and optionally as a Prometheus text file.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import config
+
+METRICS_PREFIX = "soccer_"
+QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger(config.LOGGER)
+
+_counters = {}
+_timings = {}
+_lock = threading.Lock()
+
+
+def get_key(name, labels):
+    """
+    Get the key of a metric in the registry.
+    :param name: Metric's name
+    :param labels: Dictionary of the metric's labels
+    :return: Tuple of the name and the sorted labels
+    """
+    return name, tuple(sorted(labels.items()))
+
+
+def increment(name, value=1, **labels):
+    """
+    Add to a counter.
+    :param name: Counter's name (e.g. fetch_bytes)
+    :param value: Value to add
+    :param labels: Counter's labels (e.g. table="players")
+    :return:
+    """
+    key = get_key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """
+    Record a timing. All timings are counted and summed, and the last config.METRICS_SAMPLE_SIZE
+    of every metric are kept for its quantiles.
+    :param name: Timing's name (e.g. fetch_seconds)
+    :param seconds: Measured duration
+    :param labels: Timing's labels (e.g. function="get_player_injuries")
+    :return:
+    """
+    key = get_key(name, labels)
+    with _lock:
+        timing = _timings.get(key)
+        if timing is None:
+            timing = _timings[key] = {"count": 0, "sum": 0.0, "max": 0.0,
+                                      "samples": deque(maxlen=config.METRICS_SAMPLE_SIZE)}
+        timing["count"] += 1
+        timing["sum"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        timing["samples"].append(seconds)
+
+
+@contextmanager
+def timer(name, **labels):
+    """
+    Time a block of code (see observe).
+    :param name: Timing's name (e.g. stage_seconds)
+    :param labels: Timing's labels (e.g. stage="players")
+    :return:
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def stage(stage_name):
+    """
+    Time a stage of the pipeline, and count the pages it got (see http_client.get_text).
+    :param stage_name: Stage's name (e.g. players)
+    :return:
+    """
+    pages_before = get_total("pages")
+    with timer("stage_seconds", stage=stage_name):
+        yield
+    increment("stage_pages", get_total("pages") - pages_before, stage=stage_name)
+
+
+def get_total(name, metrics_dict=None, **labels):
+    """
+    Sum a counter, or the durations of a timing, over all the labels which include the given ones.
+    :param name: Metric's name
+    :param metrics_dict: Counters or timings registry (counters by default)
+    :param labels: Labels the summed metrics must have
+    :return: Sum of the values
+    """
+    metrics_dict = _counters if metrics_dict is None else metrics_dict
+    total = 0
+    for (metric_name, metric_labels), value in list(metrics_dict.items()):
+        if metric_name == name and set(labels.items()) <= set(metric_labels):
+            total += value["sum"] if isinstance(value, dict) else value
+    return total
+
+
+def get_rates():
+    """
+    Derive the pipeline's throughput from the metrics.
+    :return: Dictionary of pages/s of every scraping stage, and rows/s of every table inserted.
+    """
+    rates = {}
+    for (name, labels), timing in list(_timings.items()):
+        labels = dict(labels)
+        if name == "stage_seconds" and timing["sum"]:
+            rates[f"{labels['stage']} pages/s"] = get_total("stage_pages", stage=labels["stage"]) / timing["sum"]
+        elif name == "db_insert_seconds" and timing["sum"]:
+            rates[f"{labels['table']} rows/s"] = get_total("db_rows", table=labels["table"]) / timing["sum"]
+    return rates
+
+
+def get_summary():
+    """
+    Summarize all metrics.
+    :return: Dictionary of the counters, the timings (count, sum, max and quantiles) and the rates.
+    """
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(_counters.items())]
+        timings = []
+        for (name, labels), timing in sorted(_timings.items()):
+            quantiles = np.quantile(list(timing["samples"]), QUANTILES)
+            timings.append({"name": name, "labels": dict(labels), "count": timing["count"],
+                            "sum": timing["sum"], "max": timing["max"],
+                            "quantiles": {str(q): value for q, value in zip(QUANTILES, quantiles)}})
+        rates = get_rates()
+
+    return {"counters": counters, "timings": timings, "rates": rates}
+
+
+def format_labels(labels, **extra_labels):
+    """
+    Format labels in Prometheus' text format.
+    :param labels: Dictionary of labels
+    :param extra_labels: Additional labels (e.g. quantile)
+    :return: Formatted labels (an empty string if there are none)
+    """
+    labels = dict(labels, **extra_labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+def get_prometheus_text(summary):
+    """
+    Format a summary in Prometheus' text exposition format (counters, and timings as summaries).
+    :param summary: Summary of the metrics (see get_summary)
+    :return: Text of all metrics
+    """
+    lines = []
+    types_written = set()
+    for counter in summary["counters"]:
+        name = f"{METRICS_PREFIX}{counter['name']}_total"
+        if name not in types_written:
+            lines.append(f"# TYPE {name} counter")
+            types_written.add(name)
+        lines.append(f"{name}{format_labels(counter['labels'])} {counter['value']}")
+
+    for timing in summary["timings"]:
+        name = f"{METRICS_PREFIX}{timing['name']}"
+        if name not in types_written:
+            lines.append(f"# TYPE {name} summary")
+            types_written.add(name)
+        for quantile, value in timing["quantiles"].items():
+            lines.append(f"{name}{format_labels(timing['labels'], quantile=quantile)} {value}")
+        lines.append(f"{name}_sum{format_labels(timing['labels'])} {timing['sum']}")
+        lines.append(f"{name}_count{format_labels(timing['labels'])} {timing['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(run_name):
+    """
+    Export the metrics of a run: a JSON summary (config.METRICS_FILE), a Prometheus text
+    file if config.METRICS_PROMETHEUS_FILE is set, and the rates in the log.
+    :param run_name: Name of the run (e.g. scraping), part of the files' names
+    :return: Summary of the metrics (see get_summary)
+    """
+    summary = get_summary()
+    summary["run"] = run_name
+    summary["finished"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    with open(config.METRICS_FILE.format(run=run_name), 'w') as metrics_file:
+        json.dump(summary, metrics_file, indent=2)
+    if config.METRICS_PROMETHEUS_FILE:
+        with open(config.METRICS_PROMETHEUS_FILE.format(run=run_name), 'w') as prometheus_file:
+            prometheus_file.write(get_prometheus_text(summary))
+
+    logger.info(f"Metrics of the {run_name} run: " +
+                ", ".join(f"{rate_name} {rate:.1f}" for rate_name, rate in summary["rates"].items()))
+    return summary
+
+
+def reset():
+    """
+    Clear all metrics.
+    :return:
+    """
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,54 @@
+"""
+HTML parsing backend of the project.
+Pages are parsed by the parser set in config.HTML_PARSER (lxml by default, falling back
+to Python's built-in html.parser if lxml isn't installed). Players' pages can be parsed
+partially, keeping only the blocks the scraping functions read.
+"""
+
+from bs4 import BeautifulSoup, SoupStrainer
+import config
+
+try:
+    import lxml     # noqa: F401 - only checking the parser is available
+    LXML_INSTALLED = True
+except ImportError:
+    LXML_INSTALLED = False
+
+# The only blocks of a player's page read by the scraping functions
+PLAYER_PAGE_BLOCKS = SoupStrainer(class_=["block_player_passport real-content clearfix",
+                                          "sidelined table",
+                                          "playerstats career sortable table",
+                                          "transfers table"])
+
+
+def get_parser(parser=None):
+    """
+    Get the name of the parser to use.
+    :param parser: Requested parser (config.HTML_PARSER if None).
+    :return: The requested parser, or html.parser if it is lxml and lxml isn't installed.
+    """
+    parser = parser or config.HTML_PARSER
+    if parser.startswith("lxml") and not LXML_INSTALLED:
+        return "html.parser"
+    return parser
+
+
+def make_soup(page, parse_only=None, parser=None):
+    """
+    Parse a page.
+    :param page: HTML of the page.
+    :param parse_only: SoupStrainer of the only elements to parse (the whole page if None).
+    :param parser: Parser to use (config.HTML_PARSER if None).
+    :return: BeautifulSoup of the page.
+    """
+    return BeautifulSoup(page, get_parser(parser), parse_only=parse_only)
+
+
+def make_player_soup(page, parser=None):
+    """
+    Parse a player's page, only the blocks which are scraped if config.TARGETED_PARSING is set.
+    :param page: HTML of the player's page.
+    :param parser: Parser to use (config.HTML_PARSER if None).
+    :return: BeautifulSoup of the page.
+    """
+    return make_soup(page, PLAYER_PAGE_BLOCKS if config.TARGETED_PARSING else None, parser)
@@ -0,0 +1,76 @@
+"""
+Opt-in profiling of a run (the --profile option of scraping_functions.py, Soccerway_create_db.py
+and Soccerway_main.py).
+The whole run is profiled by cProfile, and written to config.PROFILE_DIR as a profile file (for
+pstats/ snakeviz) and a report of the top config.PROFILE_TOP_N functions and of the project's hot
+functions (config.PROFILE_HOT_FUNCTIONS), so a slow run can be diagnosed without editing code.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+import config
+
+logger = logging.getLogger(config.LOGGER)
+
+
+def get_profile_paths(run_name):
+    """
+    Get the paths of a run's profile files (the run's name and start time, so runs don't overwrite each other).
+    :param run_name: Name of the run (e.g. scraping)
+    :return: Tuple of the paths of the profile and of its report
+    """
+    base_name = os.path.join(config.PROFILE_DIR, f"{run_name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    return base_name + ".prof", base_name + ".txt"
+
+
+def get_report(profiler, top_n=config.PROFILE_TOP_N):
+    """
+    Format the report of a profile: the top functions by their own time and by their cumulative
+    time, and the hot functions of the project.
+    :param profiler: cProfile.Profile (or pstats.Stats)
+    :param top_n: Number of functions listed in every section
+    :return: Text of the report
+    """
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report).strip_dirs()
+    # Functions are listed as file:line(name), so the patterns are matched from the start of the name
+    hot_functions = "|".join(fr"\({function_name}" for function_name in config.PROFILE_HOT_FUNCTIONS)
+
+    for title, sort_key, restrictions in (("Top functions by own time", "tottime", ()),
+                                          ("Top functions by cumulative time", "cumulative", ()),
+                                          ("Hot functions", "cumulative", (hot_functions,))):
+        report.write(f"{'=' * 20} {title} {'=' * 20}\n")
+        stats.sort_stats(sort_key).print_stats(*restrictions, top_n)
+
+    return report.getvalue()
+
+
+@contextmanager
+def profiled(run_name, enabled=True):
+    """
+    Profile a block of code, and save its profile and report (see get_report) when it ends.
+    :param run_name: Name of the run (e.g. scraping), part of the files' names
+    :param enabled: Whether to profile (otherwise the block just runs)
+    :return:
+    """
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        profile_path, report_path = get_profile_paths(run_name)
+        profiler.dump_stats(profile_path)
+        with open(report_path, 'w') as report_file:
+            report_file.write(get_report(profiler))
+        logger.info(f"Profile of the {run_name} run saved to {profile_path}, report in {report_path}.")
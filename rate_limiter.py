@@ -0,0 +1,87 @@
+"""
+Adaptive per-host rate limiter of the HTTP client.
+Every host has a token bucket whose rate adapts to the answers it gets: it drops sharply
+on every error (429, 5xx, connection errors) and grows back gradually on successes, so
+scraping runs at the highest pace the site tolerates.
+"""
+
+import random
+import threading
+import time
+import config
+
+_buckets = {}
+_lock = threading.Lock()
+
+
+def get_bucket(host):
+    """
+    Get the token bucket of a host, creating it on first use.
+    :param host: Host name (e.g. int.soccerway.com)
+    :return bucket: Dictionary of the bucket's rate (requests/s), maximal rate, tokens and last update time.
+    """
+    if host not in _buckets:
+        max_rate = config.HTTP_HOST_MAX_RATES.get(host, config.HTTP_MAX_RATE)
+        _buckets[host] = {"rate": min(config.HTTP_START_RATE, max_rate), "max_rate": max_rate,
+                          "tokens": 1.0, "updated": time.monotonic()}
+    return _buckets[host]
+
+
+def acquire(host):
+    """
+    Wait until a request may be sent to a host, according to its current rate.
+    :param host: Host name
+    :return:
+    """
+    while True:
+        with _lock:
+            bucket = get_bucket(host)
+            now = time.monotonic()
+            bucket["tokens"] = min(config.HTTP_RATE_BURST,
+                                   bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+            bucket["updated"] = now
+
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                return
+            wait = (1 - bucket["tokens"]) / bucket["rate"]
+
+        time.sleep(wait)
+
+
+def report(host, success):
+    """
+    Adapt the rate of a host to the result of a request.
+    :param host: Host name
+    :param success: Whether the request succeeded (False for 429, 5xx and connection errors)
+    :return:
+    """
+    with _lock:
+        bucket = get_bucket(host)
+        if success:
+            bucket["rate"] = min(bucket["max_rate"], bucket["rate"] * config.HTTP_RATE_INCREASE)
+        else:
+            bucket["rate"] = max(config.HTTP_MIN_RATE, bucket["rate"] * config.HTTP_RATE_DECREASE)
+
+
+def get_rate(host):
+    """
+    Get the current rate of a host.
+    :param host: Host name
+    :return: Requests per second currently allowed
+    """
+    with _lock:
+        return get_bucket(host)["rate"]
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Get the delay before retrying a failed request - exponential backoff with full jitter.
+    :param attempt: Number of the failed attempt (0 for the first request)
+    :param retry_after: Delay asked by the server (Retry-After header, in seconds), if any
+    :return: Seconds to wait
+    """
+    delay = random.uniform(0, min(config.HTTP_BACKOFF_CAP, config.HTTP_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, config.HTTP_BACKOFF_CAP))
+    return delay
@@ -0,0 +1,213 @@
+"""
+Record types of the six scraped datasets.
+Records are kept in slotted objects instead of dictionaries, so a record holds only its values,
+without a hash table of its field names (which was repeated for every record). Fields never set
+are left empty, and fields set out of the type's order (e.g. a passport missing some details)
+keep the order they were set in, so a record converts back to exactly the dictionary it was
+built from, with the same keys' order.
+Records support the dictionary access used by the scraping functions (record['url'], ...), and
+are converted to dictionaries (see to_dicts) when saved to JSON or read into data frames.
+"""
+
+import re
+import pandas as pd
+
+
+def get_slots(fields):
+    """
+    Get the attribute names of a record type's fields.
+    :param fields: Tuple of the fields' names, as scraped (e.g. "Minutes played")
+    :return: Tuple of valid attribute names (e.g. minutes_played), and of the "extra" and "key_order" attributes
+    """
+    return tuple(re.sub(r"\W+", "_", field).strip("_").lower() for field in fields) + ("extra", "key_order")
+
+
+class Record:
+    """
+    Base class of the records. Fields which aren't one of the type's fields (e.g. an unexpected
+    detail in a player's passport) are kept in the record's "extra" dictionary. The fields' order
+    is kept in "key_order" only if they weren't set in the type's order.
+    """
+    __slots__ = ()
+    FIELDS = ()
+    ATTRIBUTES = {}
+    LATER_ATTRIBUTES = {}
+
+    def __init__(self, **fields):
+        for field, value in fields.items():
+            self[field] = value
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.ATTRIBUTES = dict(zip(cls.FIELDS, cls.__slots__))
+        cls.LATER_ATTRIBUTES = {field: cls.__slots__[n + 1:len(cls.FIELDS)] for n, field in enumerate(cls.FIELDS)}
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        """
+        Build a record from a dictionary of its fields.
+        :param dictionary: Dictionary of the record's fields (or None)
+        :return: Record (None if there is no dictionary)
+        """
+        if dictionary is None:
+            return None
+        record = cls()
+        for field, value in dictionary.items():
+            record[field] = value
+        return record
+
+    def __setitem__(self, field, value):
+        attribute = self.ATTRIBUTES.get(field)
+        if attribute is not None:
+            if not hasattr(self, attribute):
+                self.keep_order(field)
+            setattr(self, attribute, value)
+        else:
+            if getattr(self, "extra", None) is None:
+                self.extra = {}
+            if field not in self.extra and getattr(self, "key_order", None) is not None:
+                self.key_order += (field,)
+            self.extra[field] = value
+
+    def keep_order(self, field):
+        """
+        Keep the order of the record's fields before a new field of the type is set, if it is set
+        out of the type's order (after a later field of the type, or after an extra field).
+        :param field: Name of the field which is set
+        :return:
+        """
+        key_order = getattr(self, "key_order", None)
+        if key_order is not None:
+            self.key_order = key_order + (field,)
+        elif getattr(self, "extra", None) or \
+                any(hasattr(self, attribute) for attribute in self.LATER_ATTRIBUTES[field]):
+            self.key_order = tuple(self.keys()) + (field,)
+
+    def __getitem__(self, field):
+        attribute = self.ATTRIBUTES.get(field)
+        try:
+            if attribute is not None:
+                return getattr(self, attribute)
+            return self.extra[field]
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def __contains__(self, field):
+        try:
+            self[field]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def keys(self):
+        if getattr(self, "key_order", None) is not None:
+            return list(self.key_order)
+        keys = [field for field, attribute in self.ATTRIBUTES.items() if hasattr(self, attribute)]
+        return keys + list(getattr(self, "extra", None) or ())
+
+    def items(self):
+        return [(field, self[field]) for field in self.keys()]
+
+    def to_dict(self):
+        """
+        Convert the record into a dictionary of its fields (only the fields which were set).
+        :return: Dictionary of the record's fields
+        """
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class LeagueRecord(Record):
+    FIELDS = ("name", "country", "url")
+    __slots__ = get_slots(FIELDS)
+
+
+class TeamRecord(Record):
+    FIELDS = ("league_id", "name", "url")
+    __slots__ = get_slots(FIELDS)
+
+
+class PlayerRecord(Record):
+    FIELDS = ("First name", "Last name", "Nationality", "Date of birth", "Age", "Country of birth",
+              "Place of birth", "Position", "Height", "Weight", "Foot", "url")
+    __slots__ = get_slots(FIELDS)
+
+
+class InjuryRecord(Record):
+    FIELDS = ("player_id", "description", "start_date", "end_date")
+    __slots__ = get_slots(FIELDS)
+
+
+class PlayerSeasonRecord(Record):
+    FIELDS = ("player_id", "Season", "Team", "Team_url", "Team_id", "Comp", "Comp_url", "Comp_id",
+              "Minutes played", "Appearances", "Lineups", "Substitute in", "Substitute out",
+              "Substitutes on bench", "Goal", "Yellow card", "Yellow 2nd/RC", "Red card")
+    __slots__ = get_slots(FIELDS)
+
+
+class PlayerTeamRecord(Record):
+    FIELDS = ("player_id", "team", "team_url", "team_id", "start", "end")
+    __slots__ = get_slots(FIELDS)
+
+
+# Record type of every dataset (named as in dataset_functions.DATASET_FILES)
+DATASET_RECORDS = {"leagues": LeagueRecord,
+                   "teams": TeamRecord,
+                   "players": PlayerRecord,
+                   "injuries": InjuryRecord,
+                   "players_seasons": PlayerSeasonRecord,
+                   "players_teams": PlayerTeamRecord}
+
+
+def to_records(dataset, dictionaries):
+    """
+    Convert the records of a dataset from dictionaries into its record type.
+    :param dataset: Name of the dataset (e.g. players)
+    :param dictionaries: Dictionary of records' dictionaries, keyed by their counter
+    :return: Dictionary of records, keyed by the same counters
+    """
+    record_type = DATASET_RECORDS[dataset]
+    return {n: record_type.from_dict(record) for n, record in dictionaries.items()}
+
+
+def to_dicts(records):
+    """
+    Convert records into dictionaries (records which are already dictionaries are kept as they are).
+    :param records: Dictionary of records, keyed by their counter
+    :return: Dictionary of the records' dictionaries, keyed by the same counters
+    """
+    return {n: record.to_dict() if isinstance(record, Record) else record for n, record in records.items()}
+
+
+def to_dataframe(records):
+    """
+    Convert records into a data frame whose index is the records' counter (as the data frame
+    of their dictionaries is built, so values and dtypes are the same).
+    :param records: Dictionary of records, keyed by their counter
+    :return: Data frame of the records
+    """
+    return pd.DataFrame(to_dicts(records)).T
+
+
+def json_default(value):
+    """
+    Serialize records in json.dump/ json.dumps (their default= argument).
+    :param value: Value which json can't serialize
+    :return: The record's dictionary
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,254 @@
+"""
+Incremental refresh of the DB.
+Players' pages are fetched again (revalidated with the server, even when they are fresh in the
+cache), and the sidelined, career and transfers blocks of each one are hashed and compared with
+the hashes of the last refresh. Only players whose blocks changed are updated: their rows of the
+changed blocks' tables are replaced, in one transaction, by the rows scraped now (so rows which
+disappeared from the page are deleted too), unless they are the same as the rows in the DB.
+Pages which couldn't be fetched or have no passport are skipped, and missing blocks are left as
+they are, so a failed fetch never deletes rows. A player without hashes (e.g. on the first
+refresh) is compared with its rows in the DB, so the rows are only rewritten if they changed.
+"""
+
+import hashlib
+import json
+import os
+import click
+import pandas as pd
+import requests
+import config
+import http_client
+from scraping_functions import fetch_pages, get_player_injuries, get_player_seasons, get_player_teams
+from parsing_functions import make_player_soup
+from Soccerway_create_db import define_logger, adjust_injuries, adjust_seasons, adjust_teams, \
+    INJURIES_COLUMNS, PLAYER_TEAM_COLUMNS, PLAYER_SEASON_COLUMNS
+from db_functions import pooled_connection, transaction, insert_statement
+
+logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+# Blocks of a player's page which are refreshed, and the table each one is saved in
+BLOCKS = {"sidelined": "sidelined table",
+          "career": "playerstats career sortable table",
+          "transfers": "transfers table"}
+
+
+def get_blocks_hashes(player_soup):
+    """
+    Hash the refreshed blocks of a player's page.
+    :param player_soup: Specific player's soup (parsed HTML)
+    :return: Dictionary of the blocks' hashes (missing blocks are left out).
+    """
+    hashes = {}
+    for block, table_class in BLOCKS.items():
+        table = player_soup.find('table', class_=table_class)
+        if table is not None:
+            hashes[block] = hashlib.sha1(str(table).encode('utf-8')).hexdigest()
+    return hashes
+
+
+def get_changed_blocks(hashes, old_hashes):
+    """
+    Find the blocks of a player's page which can be refreshed and changed since the last refresh.
+    :param hashes: Dictionary of the page's blocks' hashes (see get_blocks_hashes)
+    :param old_hashes: Dictionary of the blocks' hashes of the last refresh (empty if there was none)
+    :return: List of the changed blocks' names.
+    """
+    changed_blocks = [block for block in hashes if hashes[block] != old_hashes.get(block)]
+    # Players' teams are scraped from their transfers and their career, so they need both
+    if "transfers" in changed_blocks and "career" not in hashes:
+        changed_blocks.remove("transfers")
+    return changed_blocks
+
+
+def fetch_player_page(player_url):
+    """
+    Fetch a player's page, revalidating it with the server even if it is fresh in the cache
+    (the cache's time to live would hide changes from the refresh).
+    :param player_url: Player's URL
+    :return: The page's text (empty if it couldn't be fetched).
+    """
+    try:
+        return http_client.get_text(player_url, revalidate=True)
+    except requests.RequestException as error:
+        logger.warning("Fetching %s failed (%s), the player is skipped.", player_url, error)
+        return ""
+
+
+def load_refresh_state(state_file=None):
+    """
+    Load the blocks' hashes of the last refresh.
+    :param state_file: Path of the state file (config.REFRESH_STATE_FILE by default)
+    :return: Dictionary of players' URLs and their blocks' hashes.
+    """
+    state_file = state_file or config.REFRESH_STATE_FILE
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file) as state:
+        return json.load(state)
+
+
+def save_refresh_state(refresh_state, state_file=None):
+    """
+    Save the blocks' hashes of the current refresh.
+    :param refresh_state: Dictionary of players' URLs and their blocks' hashes
+    :param state_file: Path of the state file (config.REFRESH_STATE_FILE by default)
+    :return:
+    """
+    state_file = state_file or config.REFRESH_STATE_FILE
+    with open(state_file + ".tmp", 'w') as state:
+        json.dump(refresh_state, state)
+    os.replace(state_file + ".tmp", state_file)
+
+
+def normalize_row(row):
+    """
+    Convert the values of a row to strings (dates to YYYY-MM-DD), so rows scraped now can be compared
+    with rows read from the DB, whichever types the backend returns.
+    :param row: Tuple of the row's values
+    :return: Tuple of the normalized values.
+    """
+    return tuple(None if value is None else value.strftime('%Y-%m-%d') if hasattr(value, 'strftime')
+                 else str(value) for value in row)
+
+
+def get_player_rows(con, table, columns, player_id):
+    """
+    Read the rows of a player in a table.
+    :param con: DB connection
+    :param table: Name of the table
+    :param columns: Columns to read
+    :param player_id: Player's id in the DB
+    :return: List of the rows, normalized (see normalize_row), in the order they were inserted.
+    """
+    with con.cursor() as cur:
+        cur.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE player_id = %s ORDER BY id", [player_id])
+        return [normalize_row(row) for row in cur.fetchall()]
+
+
+def replace_player_rows(con, table, columns, player_id, df=None):
+    """
+    Replace the rows of a player in a table by the rows scraped now: its old rows are deleted, and
+    the new ones are inserted by batched multi-row INSERTs (executemany). Nothing is changed if the
+    rows are the same as the ones in the DB. Nothing is committed, so this runs inside the player's
+    transaction.
+    :param con: DB connection
+    :param table: Name of the table
+    :param columns: Table's columns, in the order of the data frame's columns
+    :param player_id: Player's id in the DB
+    :param df: Data frame of the player's rows (None if it has none)
+    :return: Tuple of the number of deleted and inserted rows.
+    """
+    rows = [] if df is None else \
+        list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+    if [normalize_row(row) for row in rows] == get_player_rows(con, table, columns, player_id):
+        return 0, 0
+
+    with con.cursor() as cur:
+        deleted = cur.execute(f"DELETE FROM {table} WHERE player_id = %s", [player_id])
+        for batch_start in range(0, len(rows), config.DB_INSERT_BATCH_SIZE):
+            cur.executemany(insert_statement(table, tuple(columns)),
+                            rows[batch_start:batch_start + config.DB_INSERT_BATCH_SIZE])
+
+    return deleted, len(rows)
+
+
+def refresh_player(con, player_soup, player_id, changed_blocks, teams_index):
+    """
+    Replace the rows of a player's changed blocks (blocks missing from the page are never changed,
+    see get_changed_blocks).
+    :param con: DB connection
+    :param player_soup: Specific player's soup (parsed HTML)
+    :param player_id: Player's id in the DB
+    :param changed_blocks: Names of the blocks which changed since the last refresh
+    :param teams_index: Dictionary of teams' URLs and their ids in the DB minus 1 (as scraped ids)
+    :return: Whether any of the player's rows were replaced.
+    """
+    # Scraped ids are one less than DB ids, as they are adjusted by the adjust_* functions
+    player_num = player_id - 1
+    changes = []
+
+    if "sidelined" in changed_blocks:
+        injuries, _ = get_player_injuries(player_soup, {}, player_num, 0)
+        changes.append(replace_player_rows(con, "injuries", INJURIES_COLUMNS, player_id,
+                                           adjust_injuries(pd.DataFrame(injuries).T) if injuries else None))
+
+    seasons, _, first_date, current_team, current_team_url = \
+        get_player_seasons(player_soup, {}, player_num, 0, teams_index)
+    if "career" in changed_blocks:
+        # A player has a row for every competition of a team in a season, so its rows are replaced as a whole
+        changes.append(replace_player_rows(con, "player_season", PLAYER_SEASON_COLUMNS, player_id,
+                                           adjust_seasons(pd.DataFrame(seasons).T) if seasons else None))
+
+    if "transfers" in changed_blocks or "career" in changed_blocks:
+        players_teams, _ = get_player_teams(player_soup, {}, player_num, 0, teams_index,
+                                            first_date, current_team, current_team_url)
+        changes.append(replace_player_rows(con, "player_team", PLAYER_TEAM_COLUMNS, player_id,
+                                           adjust_teams(pd.DataFrame(players_teams).T) if players_teams else None))
+
+    return changes != [(0, 0)] * len(changes)
+
+
+def refresh_players(host, root, password):
+    """
+    Refresh the injuries, seasons and teams of all players in the DB whose pages changed
+    since the last refresh.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :return: Number of refreshed players.
+    """
+    refresh_state = load_refresh_state()
+    refreshed = 0
+
+    with pooled_connection(host, root, password) as con:
+        players = pd.read_sql("SELECT id, url FROM players WHERE url IS NOT NULL", con)
+        teams = pd.read_sql("SELECT id, url FROM teams WHERE url IS NOT NULL", con)
+        teams_index = {url: int(team_id) - 1 for team_id, url in zip(teams["id"], teams["url"])}
+
+        for batch_start in range(0, players.shape[0], config.REFRESH_BATCH_SIZE):
+            batch = players.iloc[batch_start:batch_start + config.REFRESH_BATCH_SIZE]
+
+            pages = fetch_pages(list(batch["url"]), get_text=fetch_player_page)
+            for player_id, player_url, page in zip(batch["id"], batch["url"], pages):
+                player_soup = make_player_soup(page)
+                # Error pages (and pages which couldn't be fetched) have no passport
+                if player_soup.find('div', class_="block_player_passport") is None:
+                    logger.warning("The page of %s has no passport, the player is skipped.", player_url)
+                    continue
+
+                hashes = get_blocks_hashes(player_soup)
+                old_hashes = refresh_state.get(player_url, {})
+                changed_blocks = get_changed_blocks(hashes, old_hashes)
+                if not changed_blocks:
+                    continue
+
+                # All rows of a player are updated together, or not at all
+                with transaction(con):
+                    if refresh_player(con, player_soup, int(player_id), changed_blocks, teams_index):
+                        refreshed += 1
+                refresh_state[player_url] = dict(old_hashes, **{block: hashes[block] for block in changed_blocks})
+
+            save_refresh_state(refresh_state)
+            logger.info("Checked %d of %d players, %d were refreshed.",
+                        batch_start + batch.shape[0], players.shape[0], refreshed)
+
+    return refreshed
+
+
+@click.command()
+@click.option('--host', '-h', default='localhost', prompt='Please insert the MySQL host name:', help='MySQL host name')
+@click.option('--root', '-r', default='root', prompt='Please insert the MySQL root:', help='MySQL root')
+@click.option('--password', '-ps', default='', prompt='Please insert the MySQL password:', help='MySQL password')
+def main(host, root, password):
+    """
+    Refresh the players whose pages changed since the last refresh.
+    :param host: MySQL host name
+    :param root: MySQL root name
+    :param password: MySQL password
+    :return:
+    """
+    refresh_players(host, root, password)
+
+
+if __name__ == '__main__':
+    main()
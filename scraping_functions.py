@@ -5,15 +5,118 @@ that are later used to create the initial DB which will be used in throughout
 this project.
 """
 
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
+import atexit
 import json
+import time
+import click
 import config
-from Soccerway_create_db import define_logger
+import http_client
+import metrics
+import profiling
+from parsing_functions import make_soup, make_player_soup
+from competitions_index import get_competitions
+from checkpoint_functions import load_checkpoint, record_checkpoint, clear_checkpoint, DATASETS
+from dataset_functions import open_ndjson_writers, write_ndjson_records, close_ndjson_writers, \
+    truncate_ndjson_datasets, save_columnar_datasets, check_pyarrow, COLUMNAR_FORMATS
+from records import LeagueRecord, TeamRecord, PlayerRecord, InjuryRecord, PlayerSeasonRecord, \
+    PlayerTeamRecord, json_default
+from Soccerway_create_db import define_logger, start_progress, update_progress, log_progress
 
 SOCCER_URL = config.SOCCER_URL
 logger = define_logger(config.LOGGER, config.LOG_FILE)
 
+_parser_pool = None
+# Teams' index of the parsing processes (and, in the scraping process, the index the pool was started with)
+_parser_teams_index = None
+
+
+def iter_pages(urls, max_workers=config.MAX_WORKERS, get_text=None):
+    """
+    Fetch several pages concurrently, using a bounded pool of threads, yielding each page
+    as soon as it (and all pages before it) were fetched.
+    :param urls: List of URLs to fetch.
+    :param max_workers: Maximal number of requests running at the same time.
+    :param get_text: Function fetching a page's text (http_client.get_text if None).
+    :return: Generator of the pages' HTML texts, in the same order as urls.
+    """
+    get_text = get_text or http_client.get_text
+    if max_workers <= 1 or len(urls) <= 1:
+        for url in urls:
+            yield get_text(url)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        yield from executor.map(get_text, urls)
+
+
+def fetch_pages(urls, max_workers=config.MAX_WORKERS, get_text=None):
+    """
+    Fetch several pages concurrently, using a bounded pool of threads.
+    :param urls: List of URLs to fetch.
+    :param max_workers: Maximal number of requests running at the same time.
+    :param get_text: Function fetching a page's text (http_client.get_text if None).
+    :return: List of the pages' HTML texts, in the same order as urls.
+    """
+    return list(iter_pages(urls, max_workers, get_text))
+
+
+def get_parser_pool(teams_index):
+    """
+    Get the shared pool of processes parsing players' pages, creating it on first use. The teams' index
+    is sent once to every process when it starts (see init_parser_process), instead of with every page,
+    so the pool is started again only if it was started with another index.
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids (see get_teams_index)
+    :return: ProcessPoolExecutor, or None if pages are parsed in the scraping process (PARSE_WORKERS <= 1).
+    """
+    global _parser_pool, _parser_teams_index
+
+    if config.PARSE_WORKERS <= 1:
+        return None
+    if _parser_pool is not None and _parser_teams_index != teams_index:
+        close_parser_pool()
+    if _parser_pool is None:
+        _parser_pool = ProcessPoolExecutor(max_workers=config.PARSE_WORKERS, initializer=init_parser_process,
+                                           initargs=(teams_index,))
+        _parser_teams_index = teams_index
+        atexit.register(close_parser_pool)
+
+    return _parser_pool
+
+
+def init_parser_process(teams_index):
+    """
+    Keep the teams' index in a parsing process (runs once, when the process starts).
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids (see get_teams_index)
+    :return:
+    """
+    global _parser_teams_index
+    _parser_teams_index = teams_index
+
+
+def parse_pooled_player_page(player_url, player_page):
+    """
+    Parse a player's page in a parsing process, with the process' teams' index (see parse_player_page).
+    :param player_url: Player's URL
+    :param player_page: Player's page HTML
+    :return: The player's parsed records (see parse_player_page)
+    """
+    return parse_player_page(player_url, player_page, _parser_teams_index)
+
+
+def close_parser_pool():
+    """
+    Shut down the shared pool of parsing processes.
+    :return:
+    """
+    global _parser_pool
+
+    if _parser_pool is not None:
+        _parser_pool.shutdown()
+        _parser_pool = None
+
+
 def scrape_leagues(top_leagues_num=config.TOP_LEAGUES_NUM):
     """
     create the leagues table.
@@ -21,26 +124,13 @@ def scrape_leagues(top_leagues_num=config.TOP_LEAGUES_NUM):
     :param top_leagues_num: Number of top leagues to be extracted.
     :return leagues: A dictionary of leagues scraped (also saved as a json file).
     """
-    comp_url = SOCCER_URL + "/competitions/"
-
-    competitions_soup = BeautifulSoup(requests.get(comp_url).text, 'html.parser')
-
     leagues = {}
-    counter = 0
-
-    # Run over competitions
-    for competition in competitions_soup.find_all('li', class_=["odd", "even"]):
-        leagues[counter] = {}
-        leagues[counter]['name'] = str(competition.text)
-        leagues[counter]['country'] = competition.contents[0].attrs['href'].rsplit('national/')[1].split('/')[0].title()
-        leagues[counter]['url'] = SOCCER_URL + competition.contents[0].attrs['href']
 
-        logger.info("\nleague name-" + leagues[counter]['name'] + "\nleague url-" + leagues[counter]['url'])
+    # Run over competitions (indexed once from the competitions page, see competitions_index)
+    for counter, competition in enumerate(get_competitions()[:top_leagues_num]):
+        leagues[counter] = LeagueRecord.from_dict(competition)
 
-        counter += 1
-
-        if counter == top_leagues_num:
-            break
+        logger.info("\nleague name-%s\nleague url-%s", leagues[counter]['name'], leagues[counter]['url'])
 
     return leagues
 
@@ -57,23 +147,26 @@ def scrape_teams(leagues_dict, counter=0):
 
     teams = {}
 
-    for i in leagues_dict.keys():
+    leagues_ids = list(leagues_dict.keys())
+    leagues_pages = fetch_pages([leagues_dict[i]['url'] for i in leagues_ids])
+
+    for i, league_page in zip(leagues_ids, leagues_pages):
 
-        league_soup = BeautifulSoup(requests.get(leagues_dict[i]['url']).text, 'html.parser')
+        league_soup = make_soup(league_page)
 
         league_table = league_soup.find('table', class_="leaguetable sortable table detailed-table")
         teams_to_scrape = league_table.find_all('td', class_="text team large-link")
 
-        logger.info(f"Links for teams of {leagues_dict[i]['name']}:")
+        logger.info("Scraping %d teams of %s.", len(teams_to_scrape), leagues_dict[i]['name'])
 
         # Run over teams in a competition
         for team in teams_to_scrape:
-            teams[counter] = {}
+            teams[counter] = TeamRecord()
             teams[counter]['league_id'] = i
             teams[counter]['name'] = team.a["title"]
             teams[counter]['url'] = SOCCER_URL + team.a["href"]
 
-            logger.info(teams[counter]['name'] + ': ' + teams[counter]['url'])
+            logger.debug("%s: %s", teams[counter]['name'], teams[counter]['url'])
 
             counter += 1
 
@@ -81,7 +174,8 @@ def scrape_teams(leagues_dict, counter=0):
 
 
 def scrape_players(teams_dict, player_counter=0, injury_counter=0,
-                   player_season_counter=0, player_team_counter=0):
+                   player_season_counter=0, player_team_counter=0, checkpoint=None, writers=None,
+                   seen_players=None):
     """
     Scrape data regarding players, while calling functions that creates tables
     of their personal info, injuries info and career info (teams they played for
@@ -91,6 +185,12 @@ def scrape_players(teams_dict, player_counter=0, injury_counter=0,
     :param injury_counter: Counter of injuries in DB (default is 0 for initial creation of JSON files)
     :param player_season_counter: Counter of players' seasons in DB (default is 0 for initial creation of JSON files)
     :param player_team_counter: Counter of players' teams in DB (default is 0 for initial creation of JSON files)
+    :param checkpoint: Checkpoint state of a previous run (see checkpoint_functions). If given, finished squads
+    and players are skipped, their data and counters are restored and every new player is journaled.
+    :param writers: Open NDJSON files (see dataset_functions). If given, the records of every player are streamed
+    into them as soon as it is scraped and aren't kept in the returned dictionaries.
+    :param seen_players: Dictionary of players' URLs already scraped (or already in the DB) and their ids.
+    Players in it are neither fetched nor added again, and new players are added to it as they are scraped.
     :return players: A dictionary of players' personal info scraped (also saved as a json file).
     :return injuries: A dictionary of players' injuries info scraped (also saved as a json file).
     :return players_seasons: A dictionary of players' seasons participated in scraped (also saved as a json file).
@@ -102,40 +202,224 @@ def scrape_players(teams_dict, player_counter=0, injury_counter=0,
     injuries = {}
     players_seasons = {}
     players_teams = {}
+    done = set()
+    if seen_players is None:
+        seen_players = {}
+
+    # Restore the work which was already done by a previous (crashed) run
+    if checkpoint and checkpoint["counters"]:
+        players, injuries = checkpoint["players"], checkpoint["injuries"]
+        players_seasons, players_teams = checkpoint["players_seasons"], checkpoint["players_teams"]
+        done = checkpoint["done"]
+        seen_players.update(checkpoint["seen_players"])
+        player_counter, injury_counter, player_season_counter, player_team_counter = \
+            checkpoint["counters"]
+        logger.info("Resuming scraping from player %d (%d finished steps).", player_counter, len(done))
+
+    # Built once, so finding the id of a team in players' career costs the same for any number of teams
+    teams_index = get_teams_index(teams_dict)
+
+    datasets = {"players": players, "injuries": injuries,
+                "players_seasons": players_seasons, "players_teams": players_teams}
+    if writers:
+        # Records restored from the journal (of a run which didn't stream them) are written to the files
+        for dataset, records in datasets.items():
+            write_ndjson_records(writers, dataset, records)
+            records.clear()
+
+    # Squads' and players' pages are fetched concurrently, and players' pages are parsed in parallel
+    # (see parse_players_pages), but their records get ids one by one in their original order,
+    # so ids are assigned exactly as in a sequential run.
+    teams_ids = [i for i in teams_dict.keys() if teams_dict[i]['url'] not in done]
+    squads_pages = fetch_pages([teams_dict[i]['url'] + 'squad/' for i in teams_ids])
+    # Players are logged one by one only at DEBUG level, otherwise in periodic progress lines
+    progress = start_progress(logger, "players")
+
+    for i, squad_page in zip(teams_ids, squads_pages):
+
+        logger.debug("Scraping data of players in %s.", teams_dict[i]['name'])
+
+        squad_soup = make_soup(squad_page)
+        squad_table = squad_soup.find('table', class_="table squad sortable")
+
+        if squad_table:
+            players_to_scrape = []
+            for player in squad_table.find_all('td', class_="name large-link"):
+                player_url = SOCCER_URL + player.a["href"]
+                if teams_dict[i]['url'] + ' ' + player.a["href"] in done:
+                    continue
+                if player_url in seen_players:
+                    # Loaned and transferred players are listed in more than one squad
+                    logger.debug("skipped player: %s, already scraped.", player.a.text)
+                    continue
+                # Players are scraped in this order, so this is the id the player is going to get
+                seen_players[player_url] = player_counter + len(players_to_scrape)
+                players_to_scrape.append(player)
+
+            parsed_players = parse_players_pages([SOCCER_URL + player.a["href"] for player in players_to_scrape],
+                                                 teams_index)
+
+            for player_in_squad, parsed_player in zip(players_to_scrape, parsed_players):
+                old_counters = (player_counter, injury_counter, player_season_counter, player_team_counter)
+
+                player_counter, injury_counter, player_season_counter, player_team_counter = \
+                    add_player_records(parsed_player, old_counters, players, injuries,
+                                       players_seasons, players_teams)
+                logger.debug("scraped data on player: %s", player_in_squad.a.text)
+                update_progress(progress)
+
+                if checkpoint or writers:
+                    new_counters = (player_counter, injury_counter, player_season_counter, player_team_counter)
+                    new_records = get_new_records(old_counters, new_counters, players, injuries,
+                                                  players_seasons, players_teams)
+                if writers:
+                    for dataset, records in new_records.items():
+                        write_ndjson_records(writers, dataset, records)
+                        for n in records:
+                            del datasets[dataset][n]
+                if checkpoint:
+                    # Streamed records are already in the NDJSON files, so only the counters are journaled
+                    record_checkpoint(checkpoint, "player",
+                                      key=teams_dict[i]['url'] + ' ' + player_in_squad.a["href"],
+                                      counters=new_counters, records=None if writers else new_records,
+                                      writers=writers)
+
+        if checkpoint:
+            record_checkpoint(checkpoint, "squad", key=teams_dict[i]['url'],
+                              counters=(player_counter, injury_counter, player_season_counter,
+                                        player_team_counter), writers=writers)
+
+    log_progress(progress)
+    return players, injuries, players_seasons, players_teams
 
-    for i in teams_dict.keys():
 
-        logger.info(f"\nScraping data of players in {teams_dict[i]['name']}.")
+def get_teams_index(teams_dict):
+    """
+    Create an index of the scraped teams' URLs.
+    :param teams_dict: Dictionary of teams scraped
+    :return: Dictionary of teams' URLs and their ids (keys in the teams dictionary)
+    """
+    return {team['url']: team_id for team_id, team in teams_dict.items()}
 
-        squad_url = teams_dict[i]['url'] + 'squad/'
-        squad_soup = BeautifulSoup(requests.get(squad_url).text, 'html.parser')
-        squad_table = squad_soup.find('table', class_="table squad sortable")
 
-        if squad_table:
-            players_to_scrape = squad_table.find_all('td', class_="name large-link")
+def get_new_records(old_counters, new_counters, players, injuries, players_seasons, players_teams):
+    """
+    Get the records added to the players' datasets between two states of the counters (for journaling).
+    :param old_counters: Tuple of the player, injury, player season and player team counters before the addition.
+    :param new_counters: Tuple of the same counters after the addition.
+    :param players: Dictionary of players' info
+    :param injuries: Dictionary of injuries
+    :param players_seasons: Dictionary of players' seasons
+    :param players_teams: Dictionary of players' teams
+    :return: Dictionary of the new records of every dataset.
+    """
+    datasets = (players, injuries, players_seasons, players_teams)
+    names = ("players", "injuries", "players_seasons", "players_teams")
 
-            for player_in_squad in players_to_scrape:
+    return {name: {n: dataset[n] for n in range(old, new) if n in dataset}
+            for name, dataset, old, new in zip(names, datasets, old_counters, new_counters)}
 
-                injuries, injury_counter, players_seasons, player_season_counter, \
-                players_teams, player_team_counter, players = \
-                scrape_specific_player(player_in_squad,
-                                       injuries, injury_counter,
-                                       players_seasons, player_season_counter,
-                                       players_teams, player_team_counter,
-                                       players, player_counter, teams_dict)
-                logger.info(f"scraped data on player: {player_in_squad.a.text}")
-                player_counter += 1
 
-    return players, injuries, players_seasons, players_teams
+def parse_players_pages(players_urls, teams_index):
+    """
+    Fetch and parse players' pages. Pages are parsed by the pool of parsing processes (see get_parser_pool)
+    while the next pages are still fetched, so parsing uses all cores and doesn't hold back the fetching.
+    :param players_urls: List of players' URLs
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids (see get_teams_index)
+    :return: Iterator of the players' parsed records (see parse_player_page), in the same order as players_urls.
+    """
+    parser_pool = get_parser_pool(teams_index)
+    pages = iter_pages(players_urls)
+
+    if parser_pool is None or len(players_urls) <= 1:
+        return map(parse_player_page, players_urls, pages, repeat(teams_index))
+
+    return parser_pool.map(parse_pooled_player_page, players_urls, pages)
+
+
+def add_player_records(parsed_player, counters, players_d, injuries_d, players_seasons_d, players_teams_d):
+    """
+    Add the parsed records of a player to the datasets as record objects (see records.py), giving
+    them their ids, and record the time its parsing functions took (in the parse_seconds metric).
+    :param parsed_player: Player's parsed records (see parse_player_page)
+    :param counters: Tuple of the current player, injury, player season and player team counters
+    :param players_d: Current dictionary of players' info
+    :param injuries_d: Current dictionary of injuries
+    :param players_seasons_d: Current dictionary of players' seasons
+    :param players_teams_d: Current dictionary of players' teams
+    :return: Tuple of the counters after the addition.
+    """
+    player_info, player_injuries, player_seasons, player_teams, parse_timings = parsed_player
+    player_count, injury_count, player_season_count, player_team_count = counters
+
+    for function_name, seconds in parse_timings.items():
+        metrics.observe("parse_seconds", seconds, function=function_name)
+
+    if player_info is not None:
+        players_d[player_count] = PlayerRecord.from_dict(player_info)
+
+    for records, dataset, first_id, record_type in \
+            ((player_injuries, injuries_d, injury_count, InjuryRecord),
+             (player_seasons, players_seasons_d, player_season_count, PlayerSeasonRecord),
+             (player_teams, players_teams_d, player_team_count, PlayerTeamRecord)):
+        for record_id, record in enumerate(records, first_id):
+            record['player_id'] = player_count
+            dataset[record_id] = record_type.from_dict(record)
+
+    return (player_count + 1, injury_count + len(player_injuries),
+            player_season_count + len(player_seasons), player_team_count + len(player_teams))
 
 
 ####################################################
 
 
+def parse_player_page(player_url, player_page, teams_index):
+    """
+    Parse a player's page into its records, without ids (runs in the parsing processes).
+    :param player_url: Player's URL
+    :param player_page: Player's page HTML
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids (see get_teams_index)
+    :return: Tuple of the player's info (None if the page has no passport), lists of its injuries,
+    seasons and teams, and a dictionary of the seconds every parsing function took (the parsing
+    processes don't share the metrics, so their timings are sent back with the records).
+    """
+    timings = {}
+    start = time.perf_counter()
+    player_soup = make_player_soup(player_page)
+    timings["make_player_soup"], start = time.perf_counter() - start, time.perf_counter()
+
+    injuries, _ = get_player_injuries(player_soup, {}, 0, 0)
+    timings["get_player_injuries"], start = time.perf_counter() - start, time.perf_counter()
+    players_seasons, _, first_date, cur_team, cur_team_url = \
+        get_player_seasons(player_soup, {}, 0, 0, teams_index)
+    timings["get_player_seasons"], start = time.perf_counter() - start, time.perf_counter()
+    players_teams, _ = get_player_teams(player_soup, {}, 0, 0, teams_index, first_date, cur_team, cur_team_url)
+    timings["get_player_teams"], start = time.perf_counter() - start, time.perf_counter()
+    player_info = get_player_info(player_soup, {}, 0, player_url).get(0)
+    timings["get_player_info"] = time.perf_counter() - start
+
+    return compact_record(player_info), [compact_record(record) for record in injuries.values()], \
+        [compact_record(record) for record in players_seasons.values()], \
+        [compact_record(record) for record in players_teams.values()], timings
+
+
+def compact_record(record):
+    """
+    Replace the strings of a record which are parts of the parsed page (bs4 NavigableString, which
+    reference the whole page's tree) with plain strings, so records are small to keep and to send
+    between processes.
+    :param record: Dictionary of a record's fields (or None)
+    :return: The same record, with plain strings.
+    """
+    if record is None:
+        return None
+    return {key: str(value) if isinstance(value, str) else value for key, value in record.items()}
+
+
 def scrape_specific_player(player, injuries_d, injury_count,
                            players_seasons_d, player_season_count,
                            players_teams_d, player_team_count,
-                           players_d, player_count, teams_dictionary):
+                           players_d, player_count, teams_index, player_page=None):
     """
     :param player: Specific player's soup (parsed HTML)
     :param injuries_d: Current dictionary of injuries
@@ -146,25 +430,18 @@ def scrape_specific_player(player, injuries_d, injury_count,
     :param player_team_count: Current index (main key) in dictionary of players' teams
     :param players_d: Current dictionary of players' info
     :param player_count: Current player index, and the main key in dictionary of players' info
-    :param teams_dictionary: dictionary of all teams scraped
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids (see get_teams_index)
+    :param player_page: Player's page HTML if it was already fetched (otherwise it is fetched here)
     :return: All input parameters updated (besides 'player_count').
     """
     player_url = SOCCER_URL + player.a["href"]
-    player_soup = BeautifulSoup(requests.get(player_url).text, 'html.parser')
+    if player_page is None:
+        player_page = http_client.get_text(player_url)
 
-    injuries_d, injury_count = \
-        get_player_injuries(player_soup, injuries_d, player_count, injury_count)
-
-    teams_url = [val["url"] for val in teams_dictionary.values()]
-
-    players_seasons_d, player_season_count, first_date, cur_team, cur_team_url = \
-        get_player_seasons(player_soup, players_seasons_d, player_count, player_season_count, teams_url)
-
-    players_teams_d, player_team_count = \
-        get_player_teams(player_soup, players_teams_d, player_count, player_team_count,
-                         teams_url, first_date, cur_team, cur_team_url)
-
-    players_d = get_player_info(player_soup, players_d, player_count, player_url)
+    _, injury_count, player_season_count, player_team_count = \
+        add_player_records(parse_player_page(player_url, player_page, teams_index),
+                           (player_count, injury_count, player_season_count, player_team_count),
+                           players_d, injuries_d, players_seasons_d, players_teams_d)
 
     return injuries_d, injury_count, players_seasons_d, player_season_count, \
            players_teams_d, player_team_count, players_d
@@ -239,14 +516,14 @@ def get_player_info(player_html, players_dict, player_num, player_site):
     return players_dict
 
 
-def get_player_seasons(player_html, player_seasons_dict, player_num, player_season_num, teams_urls):
+def get_player_seasons(player_html, player_seasons_dict, player_num, player_season_num, teams_index):
     """
     Gets the player's seasons data from the player html.
     :param player_html: Specific player's soup (parsed HTML)
     :param player_seasons_dict: Current dictionary of players' seasons info
     :param player_num: Current player index (and the main key in dictionary of players' info)
     :param player_season_num: Current index (main key) in dictionary of players' seasons
-    :param teams_urls: List of URLs of all scraped teams
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids
     :return player_first_date: First date a player have played for a team
     :return current_team: Player's current team
     :return current_team_url: URL of the player's current team
@@ -271,9 +548,9 @@ def get_player_seasons(player_html, player_seasons_dict, player_num, player_seas
                     player_seasons_dict[player_season_num][details[i]+'_url'] = SOCCER_URL + results[i].a["href"]
 
                     # For teams only - save their team_id too, if exist in "teams" dictionary
-                    if player_seasons_dict[player_season_num][details[i]+'_url'] in teams_urls:
-                        player_seasons_dict[player_season_num][details[i]+'_id'] = teams_urls.index(
-                            player_seasons_dict[player_season_num][details[i]+'_url'])
+                    if player_seasons_dict[player_season_num][details[i]+'_url'] in teams_index:
+                        player_seasons_dict[player_season_num][details[i]+'_id'] = teams_index[
+                            player_seasons_dict[player_season_num][details[i]+'_url']]
                     elif details[i] == 'Team':
                         player_seasons_dict[player_season_num][details[i] + '_id'] = None
                     continue
@@ -296,7 +573,7 @@ def get_player_seasons(player_html, player_seasons_dict, player_num, player_seas
     return player_seasons_dict, player_season_num, player_first_date, current_team, current_team_url
 
 
-def get_player_teams(player_html, player_teams_dict, player_num, player_team_num, teams_urls,
+def get_player_teams(player_html, player_teams_dict, player_num, player_team_num, teams_index,
                      initial_date, team_now, team_now_url):
     """
     Gets the player's seasons data from the player html
@@ -304,7 +581,7 @@ def get_player_teams(player_html, player_teams_dict, player_num, player_team_num
     :param player_teams_dict: Current dictionary of players' teams info
     :param player_num: Current player index (and the main key in dictionary of players' info)
     :param player_team_num: Current index (main key) in dictionary of players' teams
-    :param teams_urls: List of URLs of all scraped teams
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids
     :param initial_date: First date a player have played for a team
     :param team_now: Player's current team
     :param team_now_url: URL of the player's current team
@@ -325,14 +602,14 @@ def get_player_teams(player_html, player_teams_dict, player_num, player_team_num
                                                  player_team_num, player_num,
                                                  results[TO_IND].a["title"],
                                                  SOCCER_URL + results[TO_IND].a["href"],
-                                                 teams_urls, results[DATE_IND].text, end)
+                                                 teams_index, results[DATE_IND].text, end)
 
         # Add First team data:
         player_teams_dict, player_team_num = create_player_team_row(player_teams_dict,
                                                    player_team_num, player_num,
                                                    results[FROM_IND].a["title"],
                                                    SOCCER_URL + results[FROM_IND].a["href"],
-                                                   teams_urls, initial_date,
+                                                   teams_index, initial_date,
                                                    player_teams_dict[player_team_num - 1]["start"])
 
     # If player wasn't transferred at all (one team only)
@@ -340,7 +617,7 @@ def get_player_teams(player_html, player_teams_dict, player_num, player_team_num
         player_teams_dict, player_team_num = create_player_team_row(player_teams_dict,
                                                    player_team_num, player_num,
                                                    team_now, team_now_url,
-                                                   teams_urls, initial_date, None)
+                                                   teams_index, initial_date, None)
 
     return player_teams_dict, player_team_num
 
@@ -368,7 +645,7 @@ def get_career_table_headers(career_table):
 
 
 def create_player_team_row(player_teams_d, player_team_n, player_n, team_name,
-                           team_url, teams_url_list, start, end):
+                           team_url, teams_index, start, end):
     """
     Add a row of the player's team table into the player_teams dictionary
     :param player_teams_d: Current dictionary of players' teams info
@@ -376,7 +653,7 @@ def create_player_team_row(player_teams_d, player_team_n, player_n, team_name,
     :param player_n: Current player index (and the main key in dictionary of players' info)
     :param team_name: Name of team to be added
     :param team_url: URL of team to be added
-    :param teams_url_list: List of URLs of all scraped teams
+    :param teams_index: Dictionary of all scraped teams' URLs and their ids
     :param start: Starting date in the team
     :param end: Last date in the team
     :return: Updated player_teams_d and player_team_n
@@ -386,11 +663,7 @@ def create_player_team_row(player_teams_d, player_team_n, player_n, team_name,
 
     player_teams_d[player_team_n]["team"] = team_name
     player_teams_d[player_team_n]["team_url"] = team_url
-    if player_teams_d[player_team_n]["team_url"] in teams_url_list:
-        player_teams_d[player_team_n]["team_id"] = teams_url_list.index(
-            player_teams_d[player_team_n]["team_url"])
-    else:
-        player_teams_d[player_team_n]["team_id"] = None
+    player_teams_d[player_team_n]["team_id"] = teams_index.get(player_teams_d[player_team_n]["team_url"])
 
     player_teams_d[player_team_n]["start"] = start
     player_teams_d[player_team_n]["end"] = end
@@ -405,54 +678,125 @@ def create_player_team_row(player_teams_d, player_team_n, player_n, team_name,
 
 def save_json_leagues(leagues):
     with open("league.json", 'w') as json_file:
-        json_file.write(json.dumps(leagues))
+        json_file.write(json.dumps(leagues, default=json_default))
 
 
 def save_json_teams(teams):
     with open("team.json", 'w') as json_file:
-        json_file.write(json.dumps(teams))
+        json_file.write(json.dumps(teams, default=json_default))
 
 
 def save_json_players(players):
     with open("player.json", 'w') as json_file:
-        json_file.write(json.dumps(players))
+        json_file.write(json.dumps(players, default=json_default))
 
 
 def save_json_injuries(injuries):
     with open("injury.json", 'w') as json_file:
-        json_file.write(json.dumps(injuries))
+        json_file.write(json.dumps(injuries, default=json_default))
 
 
 def save_json_players_seasons(players_seasons):
     with open("player_season.json", 'w') as json_file:
-        json_file.write(json.dumps(players_seasons))
+        json_file.write(json.dumps(players_seasons, default=json_default))
 
 
 def save_json_players_teams(players_teams):
     with open("player_team.json", 'w') as json_file:
-        json_file.write(json.dumps(players_teams))
+        json_file.write(json.dumps(players_teams, default=json_default))
 
 
 ####################################################
 
 
-def main():
+@click.command()
+@click.option('--profile', is_flag=True, help='Profile the run (see profiling.py)')
+def main(profile):
     """
     Activate the functions scraping the info of N top leagues from soccerway.com
+    If a previous run crashed, it is resumed from its checkpoint journal.
+    :param profile: Whether to profile the run
     :return: -
     """
-    leagues = scrape_leagues()
-    save_json_leagues(leagues)
+    if profile:
+        # The profiler only sees the scraping process, so players' pages are parsed in it
+        config.PARSE_WORKERS = 1
+    with profiling.profiled("scraping", profile):
+        scrape_all()
+    metrics.export_metrics("scraping")
 
-    teams = scrape_teams(leagues)
-    save_json_teams(teams)
 
-    players, injuries, players_seasons, players_teams = scrape_players(teams)
-    if players:
-        save_json_players(players)
-        save_json_injuries(injuries)
-        save_json_players_seasons(players_seasons)
-        save_json_players_teams(players_teams)
+def scrape_all():
+    """
+    Scrape the leagues, teams and players, and save them (as JSON, NDJSON, Parquet or Feather files, see config.OUTPUT_FORMAT).
+    :return: -
+    """
+    checkpoint = load_checkpoint()
+    # Players are only skipped when scraped by this run (or by the crashed run it resumes, whose
+    # counters are restored with them), so the datasets hold all players, with consecutive ids
+    seen_players = {}
+
+    leagues = checkpoint["leagues"]
+    if leagues is None:
+        with metrics.stage("leagues"):
+            leagues = scrape_leagues()
+        record_checkpoint(checkpoint, "leagues", data=leagues)
+
+    teams = checkpoint["teams"]
+    if teams is None:
+        with metrics.stage("teams"):
+            teams = scrape_teams(leagues)
+        record_checkpoint(checkpoint, "teams", data=teams)
+
+    if checkpoint["streamed"] and config.OUTPUT_FORMAT != "ndjson":
+        logger.warning("The checkpoint's records were streamed to NDJSON files, so it can't be resumed with "
+                       "%s output. Starting over.", config.OUTPUT_FORMAT)
+        clear_checkpoint(checkpoint)
+        checkpoint = load_checkpoint()
+
+    if config.OUTPUT_FORMAT == "ndjson" and checkpoint["streamed"]:
+        # The files hold the records of the finished players, and whatever was streamed after them is dropped
+        truncate_ndjson_datasets(dict(zip(DATASETS, checkpoint["counters"])))
+        writers = open_ndjson_writers('a')
+        try:
+            with metrics.stage("players"):
+                scrape_players(teams, checkpoint=checkpoint, writers=writers, seen_players=seen_players)
+        finally:
+            close_ndjson_writers(writers)
+
+    elif config.OUTPUT_FORMAT == "ndjson":
+        writers = open_ndjson_writers()
+        try:
+            write_ndjson_records(writers, "leagues", leagues)
+            write_ndjson_records(writers, "teams", teams)
+            with metrics.stage("players"):
+                scrape_players(teams, checkpoint=checkpoint, writers=writers, seen_players=seen_players)
+        finally:
+            close_ndjson_writers(writers)
+
+    elif config.OUTPUT_FORMAT in COLUMNAR_FORMATS:
+        check_pyarrow()     # Before scraping, rather than failing when saving
+        with metrics.stage("players"):
+            players, injuries, players_seasons, players_teams = \
+                scrape_players(teams, checkpoint=checkpoint, seen_players=seen_players)
+        save_columnar_datasets({"leagues": leagues, "teams": teams, "players": players, "injuries": injuries,
+                                "players_seasons": players_seasons, "players_teams": players_teams},
+                               config.OUTPUT_FORMAT)
+
+    else:
+        save_json_leagues(leagues)
+        save_json_teams(teams)
+
+        with metrics.stage("players"):
+            players, injuries, players_seasons, players_teams = \
+                scrape_players(teams, checkpoint=checkpoint, seen_players=seen_players)
+        if players:
+            save_json_players(players)
+            save_json_injuries(injuries)
+            save_json_players_seasons(players_seasons)
+            save_json_players_teams(players_teams)
+
+    clear_checkpoint(checkpoint)
 
 
 if __name__ == '__main__':
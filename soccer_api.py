@@ -1,10 +1,10 @@
 
 import pandas as pd
-import requests
 import datetime
-import pymysql
 import config
-from Soccerway_create_db import define_logger
+import http_client
+from db_functions import pooled_connection, transaction, insert_statement
+from Soccerway_create_db import define_logger, PLAYERS_COLUMNS
 import sys
 
 logger = define_logger(config.LOGGER, config.LOG_FILE)
@@ -23,12 +23,11 @@ api_key = 'bb3jjg4dem9u5hzjhajszbuw'
 
 
 def check_player_not_in_db(first_name='Lionel', last_name='Messi', password=''):
-    con = pymysql.connect(config.HOST, config.ROOT, password, config.DB_NAME)
-    res = pd.read_sql(f"""SELECT first_name, last_name 
-                    FROM players 
-                    WHERE first_name LIKE '%{first_name}%' AND last_name LIKE '%{last_name}%';
-                    """, con)
-    con.close()
+    with pooled_connection(config.HOST, config.ROOT, password) as con:
+        res = pd.read_sql(f"""SELECT first_name, last_name 
+                        FROM players 
+                        WHERE first_name LIKE '%{first_name}%' AND last_name LIKE '%{last_name}%';
+                        """, con)
     if res.shape[0] == 1:
         logger.info(f"Player {first_name} {last_name} already exist in the database.")
         return False
@@ -44,9 +43,8 @@ def check_player_not_in_db(first_name='Lionel', last_name='Messi', password=''):
 
 
 def api_players(players_in_team, password):
-    con = pymysql.connect(config.HOST, config.ROOT, password, config.DB_NAME)
-    p_counter = pd.read_sql("""SELECT COUNT(*) FROM players;""", con).iloc[0,0] + 1
-    con.close()
+    with pooled_connection(config.HOST, config.ROOT, password) as con:
+        p_counter = pd.read_sql("""SELECT COUNT(*) FROM players;""", con).iloc[0,0] + 1
     players = {}
 
     for player in players_in_team:
@@ -88,24 +86,9 @@ def api_players(players_in_team, password):
             else:
                 players[p_counter]["Foot"] = None
             players[p_counter]["url"] = None    # This API doesn't work with our soccerway url "system"
-            con = pymysql.connect(config.HOST, config.ROOT, password, config.DB_NAME)
-            pd.read_sql("SELECT COUNT(*) FROM players", con)
-            with con.cursor() as cur:
-                cur.execute(f"""INSERT INTO players (first_name, 
-                                                last_name,
-                                                nationality,
-                                                birthdate,
-                                                birthplace,
-                                                position,
-                                                height,
-                                                weight,
-                                                foot_right,
-                                                url)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                        list(players[p_counter].values()))
-                con.commit()
-                con.close()
-                logger.info(f"The player {players[p_counter]['First name']} \
+            with pooled_connection(config.HOST, config.ROOT, password) as con, transaction(con) as cur:
+                cur.execute(insert_statement("players", tuple(PLAYERS_COLUMNS)), list(players[p_counter].values()))
+            logger.info(f"The player {players[p_counter]['First name']} \
 {players[p_counter]['Last name']} was added to the database.")
             p_counter += 1
 
@@ -114,9 +97,8 @@ def api_players(players_in_team, password):
 
 
 def api_teams(teams_in_league, league_id, password):
-    con = pymysql.connect(config.HOST, config.ROOT, password, config.DB_NAME)
-    t_counter = pd.read_sql("""SELECT COUNT(*) FROM teams;""", con).iloc[0, 0] + 1
-    con.close
+    with pooled_connection(config.HOST, config.ROOT, password) as con:
+        t_counter = pd.read_sql("""SELECT COUNT(*) FROM teams;""", con).iloc[0, 0] + 1
     teams = {}
 
     for team in teams_in_league:
@@ -126,7 +108,7 @@ def api_teams(teams_in_league, league_id, password):
         teams[t_counter]["url"] = None   # This API doesn't work with our soccerway url "system"
         team_url = \
             f"https://api.sportradar.us/soccer-t3/{CONTINENT}/en/teams/{team['id']}/profile.json?api_key={api_key}"
-        team_data = requests.get(team_url).json()
+        team_data = http_client.get(team_url).json()
 
         logger.info(f"getting players for team {team_data['team']['name']}.")
         api_players(team_data["players"], password)
@@ -141,10 +123,9 @@ def api_league(password, league_code):
     league_url = f"https://api.sportradar.us/soccer-t3/{CONTINENT}/en/tournaments/sr:tournament:\
 {league_code}/info.json?api_key={api_key}"
     
-    con = pymysql.connect(config.HOST, config.ROOT, password, config.DB_NAME)
-    l_counter = pd.read_sql("""SELECT COUNT(*) FROM leagues;""", con).iloc[0, 0] + 1
-    con.close()
-    league_data = requests.get(league_url).json()
+    with pooled_connection(config.HOST, config.ROOT, password) as con:
+        l_counter = pd.read_sql("""SELECT COUNT(*) FROM leagues;""", con).iloc[0, 0] + 1
+    league_data = http_client.get(league_url).json()
 
     logger.info(f"getting the league information.")
     leagues = {}
@@ -0,0 +1,144 @@
+"""
+Local stand-in of soccerway.com, serving the saved pages (fixtures/pages) under the same
+paths as the site, with configurable latency, jitter and error rate.
+Pointing the project at it (SOCCER_URL environment variable) allows load testing and
+profiling the whole pipeline end to end without network access, e.g.:
+    python soccerway_server.py --port 8000 --latency 50 --jitter 20 --error-rate 0.01
+    SOCCER_URL=http://localhost:8000 python scraping_functions.py
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import click
+import config
+from http_client import get_page_path
+from Soccerway_create_db import define_logger
+
+logger = define_logger(config.LOGGER, config.LOG_FILE)
+
+ERROR_STATUSES = [429, 500, 502, 503]
+
+
+def make_handler(pages_dir, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """
+    Create a request handler class serving saved pages.
+    :param pages_dir: Directory of saved pages (see http_client.get_page_path)
+    :param latency: Mean delay of every response (in seconds)
+    :param jitter: Maximal random deviation from the mean delay (in seconds)
+    :param error_rate: Probability of answering a request with an error status
+    :param seed: Seed of the random delays and errors
+    :return: Subclass of BaseHTTPRequestHandler
+    """
+    rnd = random.Random(seed)
+    rnd_lock = threading.Lock()
+
+    class SoccerwayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # Keep connections alive, as the real site does
+
+        def do_GET(self):
+            with rnd_lock:
+                delay = max(0.0, latency + rnd.uniform(-jitter, jitter))
+                error = rnd.random() < error_rate
+                error_status = rnd.choice(ERROR_STATUSES)
+            time.sleep(delay)
+
+            if error:
+                self.send_error(error_status)
+                return
+
+            page_path = get_page_path(self.path, pages_dir)
+            if not os.path.exists(page_path):
+                self.send_error(404)
+                return
+
+            stat = os.stat(page_path)
+            etag = f'"{int(stat.st_mtime)}-{stat.st_size}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            with open(page_path, 'rb') as page:
+                body = page.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, message_format, *args):
+            logger.debug("%s - " + message_format, self.address_string(), *args)
+
+    return SoccerwayHandler
+
+
+def make_server(pages_dir, port=8000, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """
+    Create the server (handling every request in its own thread), without starting it.
+    :param pages_dir: Directory of saved pages
+    :param port: Port to listen on (0 for any free port)
+    :param latency: Mean delay of every response (in seconds)
+    :param jitter: Maximal random deviation from the mean delay (in seconds)
+    :param error_rate: Probability of answering a request with an error status
+    :param seed: Seed of the random delays and errors
+    :return server: The server, its URL is f"http://localhost:{server.server_port}".
+    """
+    server = ThreadingHTTPServer(("localhost", port),
+                                 make_handler(pages_dir, latency, jitter, error_rate, seed))
+    server.daemon_threads = True
+    return server
+
+
+def start_server(pages_dir, port=8000, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """
+    Start the server in a background thread.
+    :param pages_dir: Directory of saved pages
+    :param port: Port to listen on (0 for any free port)
+    :param latency: Mean delay of every response (in seconds)
+    :param jitter: Maximal random deviation from the mean delay (in seconds)
+    :param error_rate: Probability of answering a request with an error status
+    :param seed: Seed of the random delays and errors
+    :return server: The running server (stop it with server.shutdown()), its URL is
+    f"http://localhost:{server.server_port}".
+    """
+    server = make_server(pages_dir, port, latency, jitter, error_rate, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@click.command()
+@click.option('--port', '-p', default=8000, help='Port to listen on.')
+@click.option('--pages-dir', default=os.path.join("fixtures", "pages"), help='Directory of saved pages.')
+@click.option('--latency', '-l', default=0.0, help='Mean delay of every response, in milliseconds.')
+@click.option('--jitter', '-j', default=0.0, help='Maximal random deviation from the mean delay, in milliseconds.')
+@click.option('--error-rate', '-e', default=0.0, help='Probability of answering a request with an error status.')
+@click.option('--seed', default=None, type=int, help='Seed of the random delays and errors.')
+def main(port, pages_dir, latency, jitter, error_rate, seed):
+    """
+    Serve the saved pages until interrupted.
+    :param port: Port to listen on.
+    :param pages_dir: Directory of saved pages.
+    :param latency: Mean delay of every response, in milliseconds.
+    :param jitter: Maximal random deviation from the mean delay, in milliseconds.
+    :param error_rate: Probability of answering a request with an error status.
+    :param seed: Seed of the random delays and errors.
+    :return:
+    """
+    server = make_server(pages_dir, port, latency / 1000, jitter / 1000, error_rate, seed)
+    logger.info("Serving %s at http://localhost:%d (set SOCCER_URL to use it).", pages_dir, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
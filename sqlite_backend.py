@@ -0,0 +1,176 @@
+"""
+Embedded SQLite backend of the DB layer (config.DB_BACKEND = "sqlite").
+Its connections and cursors behave as PyMySQL's do for the project's statements: the MySQL
+dialect of the schema and queries is translated to SQLite's, so the create_*, find_*, refresh
+and benchmark functions run in-process against a local file, without a MySQL server.
+"""
+
+import datetime
+import re
+import sqlite3
+
+# MySQL syntax and its SQLite equivalent (applied in order, case insensitively)
+TRANSLATIONS = [(r"\bINT PRIMARY KEY AUTO_INCREMENT\b", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+                (r"\s*\bCHARACTER SET \w+", ""),
+                (r"\b(VARCHAR\(\d+\))", r"\1 COLLATE NOCASE"),     # MySQL compares strings case insensitively
+                (r"\bRAND\(\)", "RANDOM()"),
+                (r"\bCHAR_LENGTH\(", "LENGTH(")]
+
+# Statements which have no meaning for a single file database
+IGNORED_STATEMENTS = re.compile(r"^\s*(USE\s|CREATE DATABASE\s)", re.IGNORECASE)
+
+
+def translate_sql(query, has_params):
+    """
+    Translate a MySQL statement of the project into SQLite's dialect.
+    :param query: MySQL statement
+    :param has_params: Whether the statement is executed with parameters (and so has %s placeholders)
+    :return: SQLite statement
+    """
+    for mysql_syntax, sqlite_syntax in TRANSLATIONS:
+        query = re.sub(mysql_syntax, sqlite_syntax, query, flags=re.IGNORECASE)
+
+    # As in PyMySQL, placeholders are only formatted when there are parameters
+    if has_params:
+        query = query.replace("%s", "?").replace("%%", "%")
+
+    return query
+
+
+def adapt_value(value):
+    """
+    Convert a parameter into a type SQLite stores (dates are stored as ISO strings, as MySQL formats them).
+    :param value: Statement's parameter
+    :return: The parameter, with dates and times (including pandas' Timestamp) as strings
+    """
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time():
+            return value.strftime("%Y-%m-%d")
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def adapt_params(args):
+    """
+    Convert the parameters of a statement (see adapt_value).
+    :param args: Sequence of the statement's parameters (or None)
+    :return: Tuple of the converted parameters
+    """
+    return tuple(adapt_value(value) for value in args) if args is not None else ()
+
+
+class SQLiteCursor:
+    """
+    Cursor running the project's MySQL statements on SQLite.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, args=None):
+        """
+        Execute a statement.
+        :param query: MySQL statement
+        :param args: Sequence of the statement's parameters
+        :return: Number of affected rows
+        """
+        if IGNORED_STATEMENTS.match(query):
+            return 0
+        self._cursor.execute(translate_sql(query, args is not None), adapt_params(args))
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        """
+        Execute a statement for every sequence of parameters.
+        :param query: MySQL statement
+        :param args: Sequences of the statement's parameters
+        :return: Number of affected rows
+        """
+        self._cursor.executemany(translate_sql(query, True), (adapt_params(row) for row in args))
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return tuple(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Connection to a SQLite database file, with PyMySQL's connection interface.
+    """
+
+    def __init__(self, database):
+        # Connections are shared by the pool of db_functions, so they aren't bound to a single thread
+        self._connection = sqlite3.connect(database, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self.open = True
+
+    def cursor(self):
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=True):
+        pass
+
+    def close(self):
+        self._connection.close()
+        self.open = False
+
+
+def connect(database):
+    """
+    Open a connection to a SQLite database file (created if it doesn't exist).
+    :param database: Path of the database file
+    :return: DB connection
+    """
+    return SQLiteConnection(database)
+
+
+def get_indexes(cur):
+    """
+    Get the indexes of the database.
+    :param cur: DB cursor
+    :return: Set of tuples of the indexes' table and name
+    """
+    cur.execute("SELECT tbl_name, name FROM sqlite_master WHERE type = 'index'")
+    return {(table.lower(), index_name) for table, index_name in cur.fetchall()}
+
+
+def explain(cur, query, args):
+    """
+    Get the index a query uses.
+    :param cur: DB cursor
+    :param query: MySQL statement
+    :param args: Sequence of the statement's parameters
+    :return: Tuple of the index's name (None if the table is scanned) and the plan's details
+    """
+    cur.execute(f"EXPLAIN QUERY PLAN {query}", args)
+    details = "; ".join(str(row[-1]) for row in cur.fetchall())
+    index = re.search(r"USING (?:COVERING )?INDEX (\w+)|USING (INTEGER PRIMARY KEY)", details)
+    return (index.group(1) or index.group(2) if index else None), details
@@ -0,0 +1,78 @@
+"""
+Shared fixtures of the tests. Everything runs offline, on the saved pages of fixtures/pages,
+in a temporary directory (so the scraped files, the DB and the log aren't written to the project).
+"""
+
+import os
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(PROJECT_DIR, "fixtures", "pages")
+sys.path.insert(0, PROJECT_DIR)
+
+import config  # noqa: E402
+
+# Set before the project's modules are imported, as they define their logger when imported
+config.LOG_FILE = os.path.join(os.environ.get("TMPDIR", "/tmp"), "soccer_injuries_tests.log")
+
+
+@pytest.fixture
+def offline_pages(tmp_path, monkeypatch):
+    """
+    Scrape the saved pages (without the cache, parsing in the scraping process), in a temporary
+    working directory.
+    :param tmp_path: pytest's temporary directory
+    :param monkeypatch: pytest's monkeypatch
+    :return: Path of the working directory
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "OFFLINE_PAGES_DIR", PAGES_DIR)
+    monkeypatch.setattr(config, "HTTP_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "PARSE_WORKERS", 1)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def offline_run(tmp_path_factory):
+    """
+    Scrape the saved pages into JSON files, in a temporary directory which is the working
+    directory of the session's tests.
+    :param tmp_path_factory: pytest's factory of temporary directories
+    :return: Path of the directory
+    """
+    import scraping_functions
+
+    run_dir = tmp_path_factory.mktemp("offline_run")
+    old_dir = os.getcwd()
+    old_config = {name: getattr(config, name) for name in ("OFFLINE_PAGES_DIR", "HTTP_CACHE_ENABLED",
+                                                            "PARSE_WORKERS", "OUTPUT_FORMAT", "DB_BACKEND")}
+    os.chdir(run_dir)
+    config.OFFLINE_PAGES_DIR = PAGES_DIR
+    config.HTTP_CACHE_ENABLED = False
+    config.PARSE_WORKERS = 1
+    config.OUTPUT_FORMAT = "json"
+    config.DB_BACKEND = "sqlite"
+
+    scraping_functions.scrape_all()
+    yield run_dir
+
+    os.chdir(old_dir)
+    for name, value in old_config.items():
+        setattr(config, name, value)
+
+
+@pytest.fixture(scope="session")
+def offline_db(offline_run):
+    """
+    Build the SQLite DB (with its indexes) from the scraped JSON files, once for the session
+    (the tables are created only if they don't exist, so a second build would duplicate the rows).
+    :param offline_run: Directory of the scraped files
+    :return:
+    """
+    import Soccerway_create_db
+    from db_functions import close_pools
+
+    Soccerway_create_db.main.callback("localhost", "root", "", False)
+    yield
+    close_pools()
@@ -0,0 +1,91 @@
+"""
+Resuming a crashed scraping run from its checkpoint journal gives the same files as a run which
+didn't crash, for JSON and NDJSON output.
+"""
+
+import hashlib
+import os
+import pytest
+import config
+import scraping_functions
+from checkpoint_functions import load_checkpoint
+
+CRASHED_PLAYER = 7
+
+
+def scrape_files():
+    """
+    Scrape the saved pages into the working directory.
+    :return: Dictionary of the scraped files' names and their MD5 hashes.
+    """
+    scraping_functions.scrape_all()
+    return {file_name: hashlib.md5(open(file_name, 'rb').read()).hexdigest()
+            for file_name in sorted(os.listdir('.'))
+            if file_name.endswith(('.json', '.jsonl')) and file_name != config.COMPETITIONS_INDEX_FILE}
+
+
+def crash_scraping(monkeypatch):
+    """
+    Scrape the saved pages, crashing while adding the records of the CRASHED_PLAYER'th player.
+    :param monkeypatch: pytest's monkeypatch
+    :return:
+    """
+    add_player_records = scraping_functions.add_player_records
+    added = []
+
+    def crashing_add_player_records(*args):
+        added.append(args)
+        if len(added) == CRASHED_PLAYER:
+            raise RuntimeError("Crashed")
+        return add_player_records(*args)
+
+    monkeypatch.setattr(scraping_functions, "add_player_records", crashing_add_player_records)
+    with pytest.raises(RuntimeError):
+        scraping_functions.scrape_all()
+    monkeypatch.setattr(scraping_functions, "add_player_records", add_player_records)
+
+
+@pytest.fixture(params=["json", "ndjson"])
+def clean_files(request, offline_pages, tmp_path, monkeypatch):
+    """
+    Scrape the saved pages without crashing (syncing the journal every 3 players), and move to an
+    empty working directory for the crashed run.
+    :param request: pytest's request (of the output format)
+    :param offline_pages: Working directory of the offline scraping (see conftest)
+    :param tmp_path: pytest's temporary directory
+    :param monkeypatch: pytest's monkeypatch
+    :return: Dictionary of the scraped files' names and their MD5 hashes
+    """
+    monkeypatch.setattr(config, "OUTPUT_FORMAT", request.param)
+    monkeypatch.setattr(config, "CHECKPOINT_SYNC_EVERY", 3)
+    clean_dir = tmp_path / "clean"
+    clean_dir.mkdir()
+    monkeypatch.chdir(clean_dir)
+    files = scrape_files()
+    assert files
+
+    crashed_dir = tmp_path / "crashed"
+    crashed_dir.mkdir()
+    monkeypatch.chdir(crashed_dir)
+    return files
+
+
+def test_resumed_run_gives_the_same_files(clean_files, monkeypatch):
+    crash_scraping(monkeypatch)
+    checkpoint = load_checkpoint()
+    # Players scraped after the last sync of the journal are lost, and scraped again
+    assert 0 < checkpoint["counters"][0] < CRASHED_PLAYER - 1
+
+    assert scrape_files() == clean_files
+    assert not os.path.exists(config.CHECKPOINT_FILE)
+
+
+def test_truncated_journal_line_is_ignored(clean_files, monkeypatch):
+    crash_scraping(monkeypatch)
+    counters = load_checkpoint()["counters"]
+    with open(config.CHECKPOINT_FILE, 'a') as journal:
+        journal.write('{"stage": "player", "key": "/teams/')
+
+    assert load_checkpoint()["counters"] == counters
+    assert scrape_files() == clean_files
+    assert not os.path.exists(config.CHECKPOINT_FILE)
@@ -0,0 +1,42 @@
+"""
+Index of the competitions page, kept on disk between runs.
+"""
+
+import json
+import pytest
+import config
+import competitions_index
+
+
+@pytest.fixture
+def index_file(offline_pages, monkeypatch):
+    """
+    Start without the index in memory, and save it in the working directory.
+    :param offline_pages: Working directory of the offline scraping (see conftest)
+    :param monkeypatch: pytest's monkeypatch
+    :return: Path of the index file
+    """
+    monkeypatch.setattr(competitions_index, "_competitions_index", None)
+    index_file = str(offline_pages / "index.json")
+    monkeypatch.setattr(config, "COMPETITIONS_INDEX_FILE", index_file)
+    return index_file
+
+
+def test_index_is_saved_in_the_configured_file(index_file):
+    competitions = competitions_index.get_competitions()
+
+    assert competitions
+    assert competitions_index.load_competitions_index()["competitions"] == competitions
+    with open(index_file) as index:
+        assert json.load(index)["competitions"] == competitions
+
+
+@pytest.mark.parametrize("content", ["", '{"countries": {"England": "https://int.soccerway.com/nat'])
+def test_corrupt_index_is_built_again(index_file, content):
+    with open(index_file, 'w') as index:
+        index.write(content)
+
+    assert competitions_index.load_competitions_index() is None
+    competitions = competitions_index.get_competitions()
+    assert competitions
+    assert competitions_index.load_competitions_index()["competitions"] == competitions
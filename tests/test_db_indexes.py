@@ -0,0 +1,14 @@
+"""
+Query plans of the find_* lookups, on a SQLite DB built from the saved pages.
+"""
+
+from benchmark_functions import check_query_plans, LOOKUP_QUERIES
+from db_functions import has_fulltext
+
+
+def test_lookups_use_an_index(offline_db):
+    plans = check_query_plans("localhost", "root", "")
+
+    assert set(plans) == {name for name, (query, _) in LOOKUP_QUERIES.items()
+                          if "MATCH" not in query or has_fulltext()}
+    assert {name: index for name, index in plans.items() if index is None} == {}
@@ -0,0 +1,120 @@
+"""
+On-disk cache of fetched pages: time to live, ETag revalidation and LRU eviction, against
+soccerway_server.py serving the saved pages.
+"""
+
+import os
+import shutil
+import zlib
+import pytest
+from conftest import PAGES_DIR
+import config
+import http_cache
+import http_client
+from soccerway_server import start_server
+
+PLAYER_PATHS = ["/players/vitezslav-jaros/499173/", "/players/caoimhin-kelleher/375147/",
+                "/players/carles-perez-sayol/372753/"]
+
+
+@pytest.fixture
+def pages_dir(tmp_path):
+    """
+    Copy the saved players' pages, so a test can change them.
+    :param tmp_path: pytest's temporary directory
+    :return: Path of the pages' directory
+    """
+    pages = tmp_path / "pages"
+    for path in PLAYER_PATHS:
+        shutil.copytree(os.path.join(PAGES_DIR, path.strip('/')), str(pages / path.strip('/')))
+    return pages
+
+
+@pytest.fixture
+def server_url(pages_dir, tmp_path, monkeypatch):
+    """
+    Serve the pages, with an empty cache.
+    :param pages_dir: Directory of the pages
+    :param tmp_path: pytest's temporary directory
+    :param monkeypatch: pytest's monkeypatch
+    :return: URL of the server
+    """
+    monkeypatch.setattr(config, "OFFLINE_PAGES_DIR", None)
+    monkeypatch.setattr(config, "HTTP_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "HTTP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "HTTP_START_RATE", config.HTTP_MAX_RATE)
+    monkeypatch.setattr(http_cache, "_index", None)
+    monkeypatch.setattr(http_cache, "_total_size", 0)
+
+    server = start_server(str(pages_dir), port=0)
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def blob_size(pages_dir, path):
+    """
+    Get the size of a page's blob in the cache.
+    :param pages_dir: Directory of the pages
+    :param path: Path of the page
+    :return: Size of the compressed page
+    """
+    with open(os.path.join(str(pages_dir), path.strip('/'), "index.html"), encoding='utf-8') as page:
+        return len(zlib.compress(page.read().encode('utf-8')))
+
+
+def test_url_class_matches_the_path_prefix():
+    assert http_cache.url_class(config.SOCCER_URL + PLAYER_PATHS[0]) == "player"
+    assert http_cache.url_class(config.SOCCER_URL + "/search/players/?q=messi") == "default"
+    assert http_cache.url_class(config.SOCCER_URL + "/teams/spain/x/1/squad/") == "squad"
+    assert http_cache.url_class(config.SOCCER_URL + "/national/spain/primera-division/c7/") == "competition"
+
+
+def test_fresh_pages_are_read_from_the_cache(server_url):
+    url = server_url + PLAYER_PATHS[0]
+    text, source = http_client.get_text_and_source(url)
+    assert source == "network"
+    assert http_client.get_text_and_source(url) == (text, "cache")
+
+
+def test_stale_pages_are_revalidated_with_their_etag(server_url, monkeypatch):
+    url = server_url + PLAYER_PATHS[0]
+    text, _ = http_client.get_text_and_source(url)
+
+    monkeypatch.setattr(config, "HTTP_CACHE_TTL", {url_class: -1 for url_class in config.HTTP_CACHE_TTL})
+    assert http_client.get_text_and_source(url) == (text, "revalidated")
+
+
+def test_changed_stale_pages_are_downloaded_again(server_url, pages_dir, monkeypatch):
+    url = server_url + PLAYER_PATHS[0]
+    http_client.get_text_and_source(url)
+    with open(os.path.join(str(pages_dir), PLAYER_PATHS[0].strip('/'), "index.html"), 'a') as page:
+        page.write("<!-- changed -->")
+
+    monkeypatch.setattr(config, "HTTP_CACHE_TTL", {url_class: -1 for url_class in config.HTTP_CACHE_TTL})
+    text, source = http_client.get_text_and_source(url)
+    assert source == "network"
+    assert text.endswith("<!-- changed -->")
+
+
+def test_least_recently_used_pages_are_evicted(server_url, pages_dir, monkeypatch):
+    first, second, third = (server_url + path for path in PLAYER_PATHS)
+    sizes = [blob_size(pages_dir, path) for path in PLAYER_PATHS]
+    # Room for the first page with either of the others, but not for all three
+    monkeypatch.setattr(config, "HTTP_CACHE_MAX_BYTES", sizes[0] + max(sizes[1:]))
+
+    http_client.get_text_and_source(first)
+    http_client.get_text_and_source(second)
+    assert http_client.get_text_and_source(first)[1] == "cache"    # The second page is now the least recent
+    http_client.get_text_and_source(third)
+
+    index = http_cache._load_index()
+    assert sorted(index) == sorted([first, third])
+    assert http_cache._total_size == sum(entry["size"] for entry in index.values())
+    assert http_client.get_text_and_source(second)[1] == "network"
+
+
+def test_fresh_pages_can_be_revalidated(server_url):
+    url = server_url + PLAYER_PATHS[0]
+    text, _ = http_client.get_text_and_source(url)
+    assert http_client.get_text_and_source(url, revalidate=True) == (text, "revalidated")
@@ -0,0 +1,27 @@
+"""
+Parity of the optimized parsing and adjusting with their reference versions, on the saved pages.
+"""
+
+import pandas as pd
+import pytest
+from conftest import PAGES_DIR
+from benchmark_functions import read_pages, check_parser_parity, same_rows, \
+    legacy_adjust_info, legacy_adjust_injuries, legacy_adjust_teams
+from dataset_functions import read_dataset
+from Soccerway_create_db import adjust_info, adjust_injuries, adjust_teams
+
+
+def test_parsers_extract_the_same_data():
+    pages = read_pages(PAGES_DIR, "players")
+    assert pages
+    assert check_parser_parity(pages) == []
+
+
+@pytest.mark.parametrize("file_name, function, legacy_function", [
+    ("player", adjust_info, legacy_adjust_info),
+    ("injury", adjust_injuries, legacy_adjust_injuries),
+    ("player_team", adjust_teams, legacy_adjust_teams)])
+def test_adjust_functions_match_the_row_by_row_versions(offline_run, file_name, function, legacy_function):
+    df = pd.concat(list(read_dataset(file_name)))
+    assert not df.empty
+    assert same_rows(function(df.copy()), legacy_function(df.copy()))
@@ -0,0 +1,119 @@
+"""
+Token bucket of the rate limiter, and the backoff of the HTTP client on 429 answers, on a fake
+clock (so nothing really sleeps, and the waits are exact).
+"""
+
+import pytest
+import requests
+import config
+import http_client
+import rate_limiter
+
+HOST = "int.soccerway.com"
+URL = f"https://{HOST}/players/x/1/"
+
+
+class FakeClock:
+    """
+    Clock whose time only moves when sleeping.
+    """
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeSession:
+    """
+    Session answering every request with the next of the given statuses.
+    """
+    def __init__(self, statuses, retry_after=None):
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.statuses[min(self.requests, len(self.statuses) - 1)]
+        response.url = url
+        response._content = b""
+        if self.retry_after is not None:
+            response.headers["Retry-After"] = str(self.retry_after)
+        self.requests += 1
+        return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Run the rate limiter and the HTTP client on a fake clock, with new buckets.
+    :param monkeypatch: pytest's monkeypatch
+    :return: The fake clock
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(http_client, "time", clock)
+    monkeypatch.setattr(rate_limiter, "_buckets", {})
+    monkeypatch.setattr(config, "HTTP_START_RATE", 2)
+    monkeypatch.setattr(config, "HTTP_RATE_BURST", 3)
+    return clock
+
+
+def test_requests_are_spaced_by_the_rate(clock):
+    for _ in range(4):
+        rate_limiter.acquire(HOST)
+
+    # The bucket starts with one token, and gets one every 1 / 2 seconds
+    assert clock.sleeps == [0.5, 0.5, 0.5]
+
+
+def test_idle_hosts_get_a_burst(clock):
+    rate_limiter.acquire(HOST)
+    clock.sleep(10)
+    del clock.sleeps[:]
+
+    for _ in range(4):
+        rate_limiter.acquire(HOST)
+    assert clock.sleeps == [0.5]
+
+
+def test_rate_drops_on_errors_and_grows_back_on_successes(clock):
+    rate_limiter.report(HOST, success=False)
+    assert rate_limiter.get_rate(HOST) == pytest.approx(2 * config.HTTP_RATE_DECREASE)
+    rate_limiter.report(HOST, success=True)
+    assert rate_limiter.get_rate(HOST) == pytest.approx(2 * config.HTTP_RATE_DECREASE * config.HTTP_RATE_INCREASE)
+
+    for _ in range(100):
+        rate_limiter.report(HOST, success=False)
+    assert rate_limiter.get_rate(HOST) == config.HTTP_MIN_RATE
+    for _ in range(1000):
+        rate_limiter.report(HOST, success=True)
+    assert rate_limiter.get_rate(HOST) == config.HTTP_MAX_RATE
+
+
+def test_too_many_requests_are_retried_after_the_asked_delay(clock, monkeypatch):
+    session = FakeSession([429, 200], retry_after=3)
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+
+    assert http_client.get(URL).status_code == 200
+    assert session.requests == 2
+    # The backoff of the first retry is at most a second, so the server's delay is waited
+    assert 3 in clock.sleeps
+    assert rate_limiter.get_rate(HOST) == pytest.approx(2 * config.HTTP_RATE_DECREASE * config.HTTP_RATE_INCREASE)
+
+
+def test_retries_stop_after_the_maximal_number(clock, monkeypatch):
+    session = FakeSession([503])
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 2)
+
+    with pytest.raises(requests.HTTPError):
+        http_client.get(URL)
+    assert session.requests == 3
+    assert rate_limiter.get_rate(HOST) == pytest.approx(2 * config.HTTP_RATE_DECREASE ** 3)
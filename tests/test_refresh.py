@@ -0,0 +1,94 @@
+"""
+Incremental refresh of the SQLite DB built from the saved pages: pages which couldn't be fetched
+never delete rows, and only rows which changed are rewritten.
+"""
+
+import os
+import pytest
+from conftest import PAGES_DIR
+import config
+import refresh_functions
+from db_functions import pooled_connection
+from http_client import get_page_path
+
+TABLES = ("injuries", "player_season", "player_team")
+
+
+def count_rows():
+    """
+    Count the rows of the refreshed tables.
+    :return: Dictionary of the tables' names and their number of rows.
+    """
+    with pooled_connection("localhost", "root", "") as con:
+        with con.cursor() as cur:
+            counts = {}
+            for table in TABLES:
+                cur.execute(f"SELECT COUNT(*) FROM {table}")
+                counts[table] = cur.fetchall()[0][0]
+    return counts
+
+
+def get_players_urls():
+    """
+    Get the players in the DB.
+    :return: List of the players' URLs, by their ids.
+    """
+    with pooled_connection("localhost", "root", "") as con:
+        with con.cursor() as cur:
+            cur.execute("SELECT url FROM players WHERE url IS NOT NULL ORDER BY id")
+            return [url for url, in cur.fetchall()]
+
+
+@pytest.fixture
+def refresh_state_file(offline_db, tmp_path, monkeypatch):
+    """
+    Refresh with no previous refresh state.
+    :param offline_db: DB built from the saved pages (see conftest)
+    :param tmp_path: pytest's temporary directory
+    :param monkeypatch: pytest's monkeypatch
+    :return: Path of the refresh state file
+    """
+    state_file = str(tmp_path / "refresh_state.json")
+    monkeypatch.setattr(config, "REFRESH_STATE_FILE", state_file)
+    return state_file
+
+
+@pytest.mark.parametrize("page", [None, "", "<html><body><h1>403 Forbidden</h1></body></html>"])
+def test_pages_which_could_not_be_fetched_keep_their_rows(refresh_state_file, tmp_path, monkeypatch, page):
+    pages_dir = tmp_path / "pages"
+    pages_dir.mkdir()
+    if page is not None:
+        for player_url in get_players_urls():
+            page_path = get_page_path(player_url, str(pages_dir))
+            os.makedirs(os.path.dirname(page_path))
+            with open(page_path, 'w', encoding='utf-8') as page_file:
+                page_file.write(page)
+    monkeypatch.setattr(config, "OFFLINE_PAGES_DIR", str(pages_dir))
+    counts = count_rows()
+
+    assert refresh_functions.refresh_players("localhost", "root", "") == 0
+    assert count_rows() == counts
+    assert refresh_functions.load_refresh_state() == {}
+
+
+def test_only_changed_rows_are_rewritten(refresh_state_file, monkeypatch):
+    monkeypatch.setattr(config, "OFFLINE_PAGES_DIR", PAGES_DIR)
+    counts = count_rows()
+
+    # The first refresh has no hashes, so its players are compared with their rows in the DB
+    assert refresh_functions.refresh_players("localhost", "root", "") == 0
+    refresh_state = refresh_functions.load_refresh_state()
+    assert set(refresh_state) == set(get_players_urls())
+    assert refresh_functions.refresh_players("localhost", "root", "") == 0
+
+    # A row which isn't on the page anymore is deleted, once the player's page changed
+    with pooled_connection("localhost", "root", "") as con:
+        with con.cursor() as cur:
+            cur.execute("INSERT INTO injuries (player_id, description, start_date, end_date) "
+                        "VALUES (1, 'Removed injury', '2020-01-01', '2020-02-01')")
+        con.commit()
+    del refresh_state[get_players_urls()[0]]
+    refresh_functions.save_refresh_state(refresh_state)
+
+    assert refresh_functions.refresh_players("localhost", "root", "") == 1
+    assert count_rows() == counts
@@ -0,0 +1,113 @@
+"""
+Players listed in more than one squad (e.g. loaned players) are scraped once, also when a crashed
+run is resumed from its checkpoint journal.
+"""
+
+import json
+from collections import Counter
+import pytest
+import config
+import http_client
+import scraping_functions
+from checkpoint_functions import load_checkpoint
+
+LOANS_URL = config.SOCCER_URL + "/teams/england/loans/1/"
+
+
+@pytest.fixture
+def teams(offline_pages, monkeypatch):
+    """
+    Scrape the saved teams, and add a team whose squad is the second team's squad (so all its
+    players are listed in two squads).
+    :param offline_pages: Working directory of the offline scraping (see conftest)
+    :param monkeypatch: pytest's monkeypatch
+    :return: Dictionary of the teams
+    """
+    teams = scraping_functions.scrape_teams(scraping_functions.scrape_leagues())
+    teams[len(teams)] = {"league_id": teams[1]["league_id"], "name": "Loans", "url": LOANS_URL}
+
+    get_text = http_client.get_text
+    monkeypatch.setattr(http_client, "get_text",
+                        lambda url, *args: get_text(url.replace(LOANS_URL, teams[1]["url"]), *args))
+    return teams
+
+
+@pytest.fixture
+def fetched_urls(teams, monkeypatch):
+    """
+    Record the URLs of the fetched pages.
+    :param teams: Teams to scrape
+    :param monkeypatch: pytest's monkeypatch
+    :return: List of the fetched URLs
+    """
+    urls = []
+    get_text = http_client.get_text
+
+    def recording_get_text(url, *args):
+        urls.append(url)
+        return get_text(url, *args)
+
+    monkeypatch.setattr(http_client, "get_text", recording_get_text)
+    return urls
+
+
+def to_json(datasets):
+    """
+    Serialize the scraped datasets, to compare them.
+    :param datasets: Tuple of the scraped players' datasets
+    :return: JSON of the datasets.
+    """
+    return json.dumps(datasets, sort_keys=True, default=lambda record: record.to_dict())
+
+
+def players_ids(players):
+    """
+    Index the scraped players by their URLs.
+    :param players: Dictionary of the scraped players
+    :return: Dictionary of the players' URLs and their ids.
+    """
+    return {player["url"]: player_id for player_id, player in players.items()}
+
+
+def test_players_in_two_squads_are_scraped_once(teams, fetched_urls):
+    reference = scraping_functions.scrape_players({i: teams[i] for i in range(len(teams) - 1)})
+    del fetched_urls[:]
+    seen_players = {}
+    datasets = scraping_functions.scrape_players(teams, seen_players=seen_players)
+
+    assert to_json(datasets) == to_json(reference)
+    assert seen_players == players_ids(datasets[0])
+    assert sorted(seen_players.values()) == list(range(len(seen_players)))
+    assert Counter(url for url in fetched_urls if url in seen_players).most_common(1)[0][1] == 1
+
+
+def test_resumed_run_keeps_the_players_it_already_scraped(teams, fetched_urls, tmp_path, monkeypatch):
+    reference = scraping_functions.scrape_players(teams)
+    journal_file = str(tmp_path / "journal.jsonl")
+    monkeypatch.setattr(config, "CHECKPOINT_SYNC_EVERY", 3)
+
+    add_player_records = scraping_functions.add_player_records
+    added = []
+
+    def crashing_add_player_records(*args):
+        added.append(args)
+        if len(added) == 7:
+            raise RuntimeError("Crashed")
+        return add_player_records(*args)
+
+    monkeypatch.setattr(scraping_functions, "add_player_records", crashing_add_player_records)
+    with pytest.raises(RuntimeError):
+        scraping_functions.scrape_players(teams, checkpoint=load_checkpoint(journal_file))
+    monkeypatch.setattr(scraping_functions, "add_player_records", add_player_records)
+
+    checkpoint = load_checkpoint(journal_file)
+    restored_players = dict(checkpoint["seen_players"])
+    assert restored_players == players_ids(checkpoint["players"])
+    del fetched_urls[:]
+    seen_players = {}
+    datasets = scraping_functions.scrape_players(teams, checkpoint=checkpoint, seen_players=seen_players)
+
+    assert to_json(datasets) == to_json(reference)
+    # Ids of the players scraped after the resume continue from the restored counters
+    assert seen_players == players_ids(datasets[0])
+    assert not set(fetched_urls) & set(restored_players)